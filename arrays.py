@@ -0,0 +1,230 @@
+# arrays.py
+'''
+Almacenamiento de arrays de los motores de ejecución
+====================================================
+Los arrays de 'integer', 'float', 'boolean' y 'char' se guardan en
+buffers tipados de array.array (8 bytes por entero o flotante, 1 byte
+por booleano, 4 por carácter) en vez de listas de objetos de Python.
+Los de otros tipos (string, arrays sin tamaño) siguen siendo listas.
+
+Los arrays multidimensionales con todas sus dimensiones declaradas
+('array [n] array [m] integer') son un NDArray: un único buffer en
+orden row-major con los strides de cada dimensión. Los motores
+resuelven 'a[i][j]' con locate(), que calcula la posición en el buffer
+sin crear objetos para las filas.
+
+Los buffers de array.array exponen el protocolo de buffer, así que
+numpy.frombuffer puede operar sobre ellos sin copiarlos.
+'''
+from array import array, typecodes
+
+from model   import ArrayType, ArraySubscript, VarLocation
+from typesys import integer_type, float_type, boolean_type, char_type, ArrayOf
+
+
+class BoolArray(array):
+  '''
+  array('b') cuyos elementos se leen como bool de Python, de modo que
+  'print' y las comparaciones ven 'true'/'false' y no 1/0.
+  '''
+  __slots__ = ()
+
+  def __getitem__(self, index):
+    value = array.__getitem__(self, index)
+    return value if type(index) is slice else value != 0
+
+  def __iter__(self):
+    for value in array.__iter__(self):
+      yield value != 0
+
+  def tolist(self):
+    return list(self)
+
+
+class NDArray:
+  '''
+  Array multidimensional sobre un buffer contiguo (row-major). a[i]
+  devuelve una vista de la fila i que comparte el buffer; asignar una
+  fila copia sus elementos.
+  '''
+  __slots__ = ('buffer', 'shape', 'strides', 'start')
+
+  def __init__(self, buffer, shape, start=0):
+    self.buffer = buffer
+    self.shape = tuple(shape)
+    self.start = start
+    strides = [1]
+    for dim in reversed(self.shape[1:]):
+      strides.insert(0, strides[0] * dim)
+    self.strides = tuple(strides)
+
+  def __len__(self):
+    return self.shape[0]
+
+  def _position(self, index):
+    if not 0 <= index < self.shape[0]:
+      raise IndexError(f'Índice fuera de rango: {index}')
+    return self.start + index * self.strides[0]
+
+  def __getitem__(self, index):
+    position = self._position(index)
+    if len(self.shape) == 1:
+      return self.buffer[position]
+    return NDArray(self.buffer, self.shape[1:], position)
+
+  def __setitem__(self, index, value):
+    position = self._position(index)
+    if len(self.shape) == 1:
+      self.buffer[position] = value
+      return
+    row = NDArray(self.buffer, self.shape[1:], position)
+    for i in range(min(len(row), len(value))):
+      row[i] = value[i]
+
+  def __iter__(self):
+    for index in range(self.shape[0]):
+      yield self[index]
+
+  def tolist(self):
+    return [row.tolist() if isinstance(row, NDArray) else row for row in self]
+
+  def __repr__(self):
+    return f'NDArray({self.tolist()!r})'
+
+
+# 'u' está obsoleto desde Python 3.13, que agrega 'w' (UCS-4)
+_char_code = 'w' if 'w' in typecodes else 'u'
+
+# Tipo de elemento -> (código de array.array, clase del buffer)
+_typecodes = {
+  integer_type: ('q', array),
+  float_type:   ('d', array),
+  boolean_type: ('b', BoolArray),
+  char_type:    (_char_code, array),
+}
+
+# Valores por defecto de los elementos que no se inicializan
+_list_defaults = {
+  float_type:   0.0,
+  boolean_type: False,
+}
+
+# Para 'isinstance' y para 'type(x) in ...' en los caminos rápidos
+array_types = (list, array, NDArray)
+array_classes = frozenset({list, array, BoolArray})
+
+def new_array(element, size, values=None):
+  '''
+  Crea un array de 'size' elementos de tipo 'element' (un tipo de
+  typesys). Los valores iniciales se rellenan con el valor por defecto
+  (cero) o se truncan al tamaño. Un entero que no cabe en 64 bits
+  lanza OverflowError.
+  '''
+  typecode = _typecodes.get(element)
+  if typecode is None:
+    default_value = _list_defaults.get(element, 0)
+    if values is None:
+      return [default_value] * size
+    if len(values) < size:
+      values.extend([default_value] * (size - len(values)))
+    return values[:size]
+
+  code, cls = typecode
+  buffer = cls(code, values[:size] if values else ())
+  missing = size - len(buffer)
+  if missing > 0:
+    # Los bytes en cero son 0, 0.0, false y '\0'
+    buffer.frombytes(bytes(missing * buffer.itemsize))
+  return buffer
+
+def dimensions(type_node):
+  '''
+  Expresiones de tamaño de las dimensiones internas de un ArrayType
+  ('array [n] array [m] array [k] T' -> [m, k]). Lista vacía si el
+  array es de una dimensión o si alguna dimensión interna no tiene
+  tamaño (en ese caso se usa una lista de filas).
+  '''
+  sizes = []
+  element = type_node.element_type
+  while isinstance(element, ArrayType):
+    if element.size is None:
+      return []
+    sizes.append(element.size)
+    element = element.element_type
+  return sizes
+
+def new_ndarray(element, shape, values=None):
+  '''
+  Crea un NDArray con las dimensiones 'shape' (el tipo 'element' es el
+  de las filas, p. ej. 'array [] integer'). Los valores iniciales son
+  filas que se copian en el buffer.
+  '''
+  while isinstance(element, ArrayOf):
+    element = element.element
+  shape = [max(dim, 0) for dim in shape]
+  total = 1
+  for dim in shape:
+    total *= dim
+  matrix = NDArray(new_array(element, total), shape)
+  for index, row in enumerate((values or [])[:shape[0]]):
+    matrix[index] = row
+  return matrix
+
+def subscript_chain(node):
+  '''
+  Para 'a[i][j]...' retorna (VarLocation de 'a', [nodos ArraySubscript
+  desde 'a[i]' hasta el nodo completo]); None si no hay anidamiento.
+  '''
+  levels = []
+  while isinstance(node, ArraySubscript):
+    levels.append(node)
+    node = node.location
+  if len(levels) < 2 or not isinstance(node, VarLocation):
+    return None
+  levels.reverse()
+  return node, levels
+
+def locate(levels, array, indices, validate):
+  '''
+  Resuelve 'array[i][j]...' a (contenedor, índice) para leer o escribir
+  el elemento. Con un NDArray y todos los índices válidos es solo el
+  cálculo de la posición en el buffer; si no, se indexa dimensión por
+  dimensión con 'validate(nodo, array, índice)', que reporta el error.
+  '''
+  if type(array) is NDArray and len(indices) == len(array.shape):
+    position = array.start
+    for index, dim, stride in zip(indices, array.shape, array.strides):
+      if type(index) is not int or not 0 <= index < dim:
+        break
+      position += index * stride
+    else:
+      return array.buffer, position
+  last = len(indices) - 1
+  for level, (node, index) in enumerate(zip(levels, indices)):
+    validate(node, array, index)
+    if level == last:
+      return array, index
+    array = array[index]
+
+def overflow_message(value=None):
+  message = "Entero fuera de rango para un array de 64 bits"
+  return message if value is None else f"{message}: {value}"
+
+def store_message(value):
+  '''
+  Mensaje del error al guardar 'value' en un buffer tipado: un entero que
+  no cabe en 64 bits (OverflowError) o un valor que no es del tipo del
+  array, como una variable declarada sin inicializar (TypeError).
+  '''
+  if type(value) is int:
+    return overflow_message(value)
+  return f"Valor inválido para un array tipado, se obtuvo {type(value).__name__}"
+
+def values_message(values):
+  '''
+  store_message del valor de un inicializador que no pudo guardarse.
+  '''
+  for value in values:
+    if not isinstance(value, (int, float, str)):
+      return store_message(value)
+  return overflow_message(max(values, key=abs))
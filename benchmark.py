@@ -0,0 +1,568 @@
+# benchmark.py
+'''
+Pruebas de rendimiento del compilador B-Minor.
+
+Cada prueba genera (o lee) un programa B-Minor, ejecuta la fase que
+se quiere medir varias veces y reporta el mejor tiempo obtenido.
+
+Uso:
+    python benchmark.py checker [--functions N] [--jobs J] [--repeat R]
+    python benchmark.py operators [--statements N] [--repeat R]
+    python benchmark.py interp [--fib N] [--loop N] [--engines E,E] [--repeat R]
+    python benchmark.py recursion [--depth N] [--times N] [--engines E,E] [--repeat R]
+    python benchmark.py hooks [--fib N] [--loop N] [--repeat R]
+    python benchmark.py fold [--loop N] [--engines E,E] [--repeat R]
+    python benchmark.py output [--lines N] [--engines E,E] [--repeat R]
+    python benchmark.py builtins [--loop N] [--engines E,E] [--repeat R]
+    python benchmark.py arrays [--size N] [--times N] [--engines E,E] [--repeat R]
+'''
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+from rich import print
+
+from errors  import errors_detected, clear_errors
+from parser  import parse
+from checker import SemanticAnalyzer
+from model   import BinOper, UnaryOper
+from output  import Output
+import typesys
+
+
+# =====================================================================
+# Verificación semántica con miles de funciones
+# =====================================================================
+
+def make_many_functions_program(functions):
+    """Genera un programa con 'functions' funciones independientes."""
+    lines = ['LIMIT: integer = 100;', '']
+    for i in range(functions):
+        call = f'f{i - 1}(i, a)' if i > 0 else 'i'
+        lines.append(f'''f{i}: function integer (n: integer, a: array [] integer) = {{
+    total: integer = 0;
+    scale: float = 1.5;
+    i: integer;
+    for (i = 0; i < n; i++) {{
+        if (a[i] % 2 == 0 && total < LIMIT) {{
+            total = total + a[i] * {i % 7 + 1};
+        }} else {{
+            total = total - {call};
+        }}
+        scale = scale * 2.0 - 1.0;
+    }}
+    while (total > LIMIT) {{
+        total = total / 2;
+    }}
+    return total;
+}}
+''')
+    lines.append(f'''main: function void () = {{
+    data: array [4] integer = {{1, 2, 3, 4}};
+    print f{functions - 1}(4, data);
+}}''')
+    return '\n'.join(lines)
+
+def bench_checker(args):
+    source = make_many_functions_program(args.functions)
+    print(f"[bold blue]Verificacion semantica: {args.functions} funciones, "
+          f"{len(source.splitlines())} lineas[/bold blue]")
+
+    results = {}
+    for jobs in sorted({1, args.jobs}):
+        def run():
+            clear_errors()
+            program = parse(source)
+            start = time.perf_counter()
+            SemanticAnalyzer.checker(program, jobs=jobs)
+            return time.perf_counter() - start, errors_detected()
+        # El parseo queda fuera de la medición: solo interesa el checker
+        timings = [run() for _ in range(args.repeat)]
+        best = min(elapsed for elapsed, _ in timings)
+        results[jobs] = best
+        print(f"  jobs={jobs:<3} {best * 1000:9.1f} ms  (errores: {timings[-1][1]})")
+
+    if args.jobs > 1:
+        print(f"  aceleracion: {results[1] / results[args.jobs]:.2f}x")
+
+
+
+# =====================================================================
+# Verificación de operadores en un programa con muchas expresiones
+# =====================================================================
+
+def make_expression_program(statements):
+    """Genera un programa con 'statements' asignaciones de expresiones largas."""
+    lines = ['main: function void () = {',
+             '    a: integer = 1; b: integer = 2; c: integer = 3;',
+             '    x: float = 1.5; y: float = 2.5;',
+             '    p: boolean = true; q: boolean = false;',
+             '    s: string = "s";']
+    for i in range(statements):
+        lines.append(f'    a = (a + b * c - {i}) / (c % 7 + 1) - -b;')
+        lines.append(f'    x = x * y + (x - y) / {i}.5 - -x;')
+        lines.append(f'    p = (a < b && x >= y) || !(q == p) || a + {i} != c;')
+        lines.append(f'    s = s + "t";')
+    lines.append('}')
+    return '\n'.join(lines)
+
+def _operator_uses(node, out):
+    """Recolecta los operadores (op, tipos) ya anotados por el checker."""
+    if isinstance(node, BinOper):
+        out.append((node.op, node.left.type, node.right.type))
+    elif isinstance(node, UnaryOper) and node.op not in ('++', '--'):
+        out.append((node.op, node.expr.type, None))
+    for value in vars(node).values():
+        children = value if isinstance(value, list) else [value]
+        for child in children:
+            if hasattr(child, 'accept'):
+                _operator_uses(child, out)
+    return out
+
+def bench_operators(args):
+    source = make_expression_program(args.statements)
+    print(f"[bold blue]Operadores: {args.statements * 4} sentencias, "
+          f"{len(source.splitlines())} lineas[/bold blue]")
+
+    def run():
+        clear_errors()
+        program = parse(source)
+        start = time.perf_counter()
+        SemanticAnalyzer.checker(program)
+        return time.perf_counter() - start, errors_detected(), program
+    timings = [run() for _ in range(args.repeat)]
+    best = min(elapsed for elapsed, _, _ in timings)
+    print(f"  checker            {best * 1000:9.1f} ms  (errores: {timings[-1][1]})")
+
+    # Consultas aisladas: diccionario con clave tupla vs. tabla densa
+    uses = _operator_uses(timings[-1][2], [])
+    binary = [(op, l, r) for op, l, r in uses if r is not None]
+    unary = [(op, t) for op, t, r in uses if r is None]
+    binary_ids = [(typesys.bin_op_ids[op], l, r) for op, l, r in binary]
+    unary_ids = [(typesys.unary_op_ids[op], t) for op, t in unary]
+
+    def by_tuple_key():
+        bin_ops, unary_ops = typesys._bin_ops, typesys._unary_ops
+        for op, l, r in binary:
+            bin_ops.get((l, op, r))
+        for op, t in unary:
+            unary_ops.get((op, t))
+
+    def by_dense_table():
+        binop_result, unaryop_result = typesys.binop_result, typesys.unaryop_result
+        for op_id, l, r in binary_ids:
+            binop_result(op_id, l, r)
+        for op_id, t in unary_ids:
+            unaryop_result(op_id, t)
+
+    for label, lookup in (('clave tupla', by_tuple_key), ('tabla densa', by_dense_table)):
+        elapsed = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for _ in range(10):
+                lookup()
+            elapsed.append(time.perf_counter() - start)
+        print(f"  {label:<18} {min(elapsed) * 1000:9.1f} ms  ({len(uses) * 10} consultas)")
+
+
+
+# =====================================================================
+# Motores de ejecución del intérprete
+# =====================================================================
+
+def make_fibonacci_program(fib, loop):
+    """Fibonacci recursivo (como test/codegen/fibonacci.bminor) más un bucle aritmético."""
+    return f'''fibonacci: function integer ( n: integer ) = {{
+    if ( n <= 1 ) {{
+        return 1;
+    }}
+    return fibonacci( n - 1 ) + fibonacci( n - 2 );
+}}
+
+sum_loop: function integer ( n: integer ) = {{
+    i: integer;
+    total: integer = 0;
+    for ( i = 0; i < n; i++ ) {{
+        if ( i % 3 == 0 || i % 5 == 0 ) {{
+            total = total + i * 2 - 1;
+        }}
+    }}
+    return total;
+}}
+
+main: function void () = {{
+    print fibonacci( {fib} );
+    print sum_loop( {loop} );
+}}'''
+
+def run_engines(source, args):
+    """Ejecuta 'source' con cada motor de --engines y compara los tiempos."""
+    from bminor import engines
+
+    results = {}
+    for engine in args.engines.split(','):
+        def run():
+            clear_errors()
+            program = parse(source)
+            output = io.StringIO()
+            interpreter = engines[engine]()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(output):
+                interpreter.interpret(program)
+            return time.perf_counter() - start, output.getvalue().split()
+        timings = [run() for _ in range(args.repeat)]
+        best = min(elapsed for elapsed, _ in timings)
+        results[engine] = best
+        print(f"  {engine:<8} {best * 1000:9.1f} ms  (salida: {' '.join(timings[-1][1])})")
+
+    baseline = results.get('tree')
+    if baseline:
+        for engine, elapsed in results.items():
+            if engine != 'tree':
+                print(f"  aceleracion {engine}: {baseline / elapsed:.2f}x")
+
+def bench_interp(args):
+    source = make_fibonacci_program(args.fib, args.loop)
+    print(f"[bold blue]Interprete: fibonacci({args.fib}) + bucle de {args.loop} iteraciones[/bold blue]")
+    run_engines(source, args)
+
+
+
+# =====================================================================
+# Recursión profunda: cada nivel es una llamada y un return
+# =====================================================================
+
+def make_recursion_program(depth, times):
+    """Suma recursiva de 1..depth, repetida 'times' veces."""
+    return f'''sum_to: function integer ( n: integer ) = {{
+    if ( n == 0 ) {{
+        return 0;
+    }}
+    return n + sum_to( n - 1 );
+}}
+
+main: function void () = {{
+    i: integer;
+    total: integer = 0;
+    for ( i = 0; i < {times}; i++ ) {{
+        total = total + sum_to( {depth} );
+    }}
+    print total;
+}}'''
+
+def bench_recursion(args):
+    source = make_recursion_program(args.depth, args.times)
+    print(f"[bold blue]Recursion: sum_to({args.depth}) x {args.times} "
+          f"({args.depth * args.times} llamadas y returns)[/bold blue]")
+    # El interprete tree-walking usa varios marcos de Python por nivel
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), args.depth * 60))
+    run_engines(source, args)
+
+
+# =====================================================================
+# Costo de los hooks de debugger/profiler en el intérprete tree-walking
+# =====================================================================
+
+def bench_hooks(args):
+    from interp import Interpreter
+    source = make_fibonacci_program(args.fib, args.loop)
+    print(f"[bold blue]Hooks: fibonacci({args.fib}) + bucle de {args.loop} iteraciones (motor tree)[/bold blue]")
+
+    results = {}
+    for label, options in (('sin hooks', {}), ('--profile', {'profile': True}), ('--debug', {'debug': True})):
+        def run():
+            clear_errors()
+            program = parse(source)
+            output = io.StringIO()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(output):
+                Interpreter(**options).interpret(program)
+            return time.perf_counter() - start
+        results[label] = min(run() for _ in range(args.repeat))
+        print(f"  {label:<10} {results[label] * 1000:9.1f} ms")
+
+    baseline = results['sin hooks']
+    for label, elapsed in results.items():
+        if label != 'sin hooks':
+            print(f"  costo {label}: {elapsed / baseline:.2f}x")
+
+
+# =====================================================================
+# Plegado de constantes (optimizer.py) antes de ejecutar
+# =====================================================================
+
+def make_constant_program(loop):
+    """Bucle con expresiones constantes, identidades e invariantes."""
+    return f'''main: function void () = {{
+    i: integer;
+    n: integer = {loop};
+    total: integer = 0;
+    scale: float = 1.0;
+    for ( i = 0; i < {loop}; i++ ) {{
+        total = total + 2 * 3 + i * 1 - (10 - 4) * 2 + (n * n - n) / 7;
+        scale = scale * 1.0 + 0.5 * 4.0 - 2.0;
+        if ( 1 < 2 && true ) {{
+            total = total + 0;
+        }}
+    }}
+    print total, " ", scale;
+}}'''
+
+def bench_fold(args):
+    from bminor import engines
+    from optimizer import optimize
+    source = make_constant_program(args.loop)
+    print(f"[bold blue]Plegado de constantes: bucle de {args.loop} iteraciones[/bold blue]")
+
+    for engine in args.engines.split(','):
+        results = {}
+        for label, optimize_ast in (('sin optimizar', False), ('optimizado', True)):
+            def run():
+                clear_errors()
+                program = parse(source)
+                if optimize_ast:
+                    SemanticAnalyzer.checker(program)
+                    program, _ = optimize(program)
+                output = io.StringIO()
+                interpreter = engines[engine]()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(output):
+                    interpreter.interpret(program)
+                return time.perf_counter() - start, output.getvalue().split()
+            timings = [run() for _ in range(args.repeat)]
+            results[label] = min(elapsed for elapsed, _ in timings)
+            print(f"  {engine:<8} {label:<14} {results[label] * 1000:9.1f} ms  (salida: {' '.join(timings[-1][1])})")
+        print(f"  aceleracion {engine}: {results['sin optimizar'] / results['optimizado']:.2f}x")
+
+
+# =====================================================================
+# Salida de 'print': rich.print por línea vs. escritor con buffer
+# =====================================================================
+
+def make_print_program(lines):
+    """Un print con varios valores por iteración."""
+    return f'''main: function void () = {{
+    i: integer;
+    for ( i = 0; i < {lines}; i++ ) {{
+        print "linea ", i, ": ", i * 2, " [ok]\\n";
+    }}
+}}'''
+
+class RichOutput(Output):
+    """La salida anterior: cada print pasa por rich.print."""
+    def write(self, text):
+        print(text, end='')
+
+def bench_output(args):
+    from bminor import engines
+    source = make_print_program(args.lines)
+    print(f"[bold blue]Salida: {args.lines} prints[/bold blue]")
+
+    writers = (('rich.print', lambda: RichOutput()),
+               ('sin buffer', lambda: Output(buffer_size=0)),
+               ('buffer 64K', lambda: Output(buffer_size=Output.DEFAULT_BUFFER)))
+    for engine in args.engines.split(','):
+        results = {}
+        for label, writer in writers:
+            def run():
+                clear_errors()
+                program = parse(source)
+                output = io.StringIO()
+                interpreter = engines[engine](output=writer())
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(output):
+                    interpreter.interpret(program)
+                return time.perf_counter() - start, len(output.getvalue().splitlines())
+            timings = [run() for _ in range(args.repeat)]
+            results[label] = min(elapsed for elapsed, _ in timings)
+            print(f"  {engine:<8} {label:<11} {results[label] * 1000:9.1f} ms  ({timings[-1][1]} lineas)")
+        print(f"  aceleracion {engine}: {results['rich.print'] / results['buffer 64K']:.2f}x")
+
+
+# =====================================================================
+# Llamadas a builtins: resueltas por el checker vs. buscadas por nombre
+# =====================================================================
+
+def make_builtins_program(loop):
+    """Bucle que llama varios builtins por iteración."""
+    return f'''data: array [8] integer;
+main: function void () = {{
+    i: integer;
+    total: float = 0.0;
+    for ( i = 0; i < {loop}; i++ ) {{
+        total = total + sqrt(abs(total - 1.5)) + max(0.5, min(total, 2.0)) + length(data);
+    }}
+    print total;
+}}'''
+
+def _unresolve_builtins(node):
+    """Quita la anotación 'builtin' del checker: las llamadas vuelven a buscarse por nombre."""
+    from model import Node
+    if getattr(node, 'builtin', None) is not None:
+        node.builtin = None
+    for value in vars(node).values():
+        for child in value if isinstance(value, list) else [value]:
+            if isinstance(child, Node):
+                _unresolve_builtins(child)
+
+def bench_builtins(args):
+    from bminor import engines
+    from pyexec import _code_cache
+    source = make_builtins_program(args.loop)
+    print(f"[bold blue]Builtins: bucle de {args.loop} iteraciones con 5 llamadas[/bold blue]")
+
+    for engine in args.engines.split(','):
+        results = {}
+        for label, resolved in (('por nombre', False), ('resueltas', True)):
+            # El código traducido por pyexec se guarda en caché por AST,
+            # sin distinguir las anotaciones
+            _code_cache.clear()
+            def run():
+                clear_errors()
+                program = parse(source)
+                SemanticAnalyzer.checker(program)
+                if not resolved:
+                    _unresolve_builtins(program)
+                output = io.StringIO()
+                interpreter = engines[engine]()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(output):
+                    interpreter.interpret(program, check=False)
+                return time.perf_counter() - start, output.getvalue().split()
+            timings = [run() for _ in range(args.repeat)]
+            results[label] = min(elapsed for elapsed, _ in timings)
+            print(f"  {engine:<8} {label:<11} {results[label] * 1000:9.1f} ms  (salida: {' '.join(timings[-1][1])})")
+        print(f"  aceleracion {engine}: {results['por nombre'] / results['resueltas']:.2f}x")
+
+
+# =====================================================================
+# Builtins de arrays: ciclos en B-Minor vs. sum/dot/scale/sort
+# =====================================================================
+
+def make_arrays_program(size, times, vectorized):
+    """Llena, escala y reduce dos arrays, con ciclos o con builtins."""
+    if vectorized:
+        body = '''
+        fill(a, 1.5);
+        copy(b, a);
+        scale(b, 2.0);
+        sort(b);
+        total = total + sum(a) + dot(a, b) + max_array(b) - min_array(a);'''
+    else:
+        body = f'''
+        for ( i = 0; i < {size}; i++ ) {{ a[i] = 1.5; }}
+        for ( i = 0; i < {size}; i++ ) {{ b[i] = a[i] * 2.0; }}
+        hi = b[0];
+        lo = a[0];
+        for ( i = 0; i < {size}; i++ ) {{
+            total = total + a[i] + a[i] * b[i];
+            if ( b[i] > hi ) {{ hi = b[i]; }}
+            if ( a[i] < lo ) {{ lo = a[i]; }}
+        }}
+        total = total + hi - lo;'''
+    return f'''a: array [{size}] float;
+b: array [{size}] float;
+main: function void () = {{
+    i: integer;
+    k: integer;
+    hi: float;
+    lo: float;
+    total: float = 0.0;
+    for ( k = 0; k < {times}; k++ ) {{{body}
+    }}
+    print total;
+}}'''
+
+def bench_arrays(args):
+    from bminor import engines
+    from checker import load_builtins
+    backend = 'NumPy' if load_builtins().numpy is not None else 'Python'
+    print(f"[bold blue]Arrays: {args.times} pasadas sobre {args.size} elementos (builtins con {backend})[/bold blue]")
+
+    for engine in args.engines.split(','):
+        results = {}
+        for label, vectorized in (('ciclos', False), ('builtins', True)):
+            source = make_arrays_program(args.size, args.times, vectorized)
+            def run():
+                clear_errors()
+                program = parse(source)
+                output = io.StringIO()
+                interpreter = engines[engine]()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(output):
+                    interpreter.interpret(program)
+                return time.perf_counter() - start, output.getvalue().split()
+            timings = [run() for _ in range(args.repeat)]
+            results[label] = min(elapsed for elapsed, _ in timings)
+            print(f"  {engine:<8} {label:<9} {results[label] * 1000:9.1f} ms  (salida: {' '.join(timings[-1][1])})")
+        print(f"  aceleracion {engine}: {results['ciclos'] / results['builtins']:.2f}x")
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Pruebas de rendimiento del compilador B-Minor.")
+    subparsers = argument_parser.add_subparsers(dest='benchmark', required=True)
+
+    checker_parser = subparsers.add_parser('checker', help='Verificacion semantica secuencial vs. en paralelo.')
+    checker_parser.add_argument('--functions', type=int, default=5000)
+    checker_parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    checker_parser.add_argument('--repeat', type=int, default=3)
+    checker_parser.set_defaults(func=bench_checker)
+
+    operators_parser = subparsers.add_parser('operators', help='Consultas de operadores del sistema de tipos.')
+    operators_parser.add_argument('--statements', type=int, default=2000)
+    operators_parser.add_argument('--repeat', type=int, default=3)
+    operators_parser.set_defaults(func=bench_operators)
+
+    interp_parser = subparsers.add_parser('interp', help='Motores de ejecucion del interprete.')
+    interp_parser.add_argument('--fib', type=int, default=20)
+    interp_parser.add_argument('--loop', type=int, default=100000)
+    interp_parser.add_argument('--engines', default='tree,closure,vm,pyexec')
+    interp_parser.add_argument('--repeat', type=int, default=3)
+    interp_parser.set_defaults(func=bench_interp)
+
+    recursion_parser = subparsers.add_parser('recursion', help='Llamadas y returns con recursion profunda.')
+    recursion_parser.add_argument('--depth', type=int, default=300)
+    recursion_parser.add_argument('--times', type=int, default=100)
+    recursion_parser.add_argument('--engines', default='tree,closure,vm,pyexec')
+    recursion_parser.add_argument('--repeat', type=int, default=3)
+    recursion_parser.set_defaults(func=bench_recursion)
+
+    hooks_parser = subparsers.add_parser('hooks', help='Costo de la instrumentacion del debugger/profiler.')
+    hooks_parser.add_argument('--fib', type=int, default=15)
+    hooks_parser.add_argument('--loop', type=int, default=20000)
+    hooks_parser.add_argument('--repeat', type=int, default=3)
+    hooks_parser.set_defaults(func=bench_hooks)
+
+    fold_parser = subparsers.add_parser('fold', help='Ejecucion con y sin la optimizacion del AST.')
+    fold_parser.add_argument('--loop', type=int, default=50000)
+    fold_parser.add_argument('--engines', default='tree,closure')
+    fold_parser.add_argument('--repeat', type=int, default=3)
+    fold_parser.set_defaults(func=bench_fold)
+
+    output_parser = subparsers.add_parser('output', help='Salida de print con rich.print vs. con buffer.')
+    output_parser.add_argument('--lines', type=int, default=20000)
+    output_parser.add_argument('--engines', default='tree,closure,vm,pyexec')
+    output_parser.add_argument('--repeat', type=int, default=3)
+    output_parser.set_defaults(func=bench_output)
+
+    builtins_parser = subparsers.add_parser('builtins', help='Llamadas a builtins resueltas por el checker vs. por nombre.')
+    builtins_parser.add_argument('--loop', type=int, default=50000)
+    builtins_parser.add_argument('--engines', default='tree,closure,vm,pyexec')
+    builtins_parser.add_argument('--repeat', type=int, default=3)
+    builtins_parser.set_defaults(func=bench_builtins)
+
+    arrays_parser = subparsers.add_parser('arrays', help='Ciclos sobre arrays vs. builtins de arrays (sum, dot, scale...).')
+    arrays_parser.add_argument('--size', type=int, default=10000)
+    arrays_parser.add_argument('--times', type=int, default=20)
+    arrays_parser.add_argument('--engines', default='tree,closure,vm,pyexec')
+    arrays_parser.add_argument('--repeat', type=int, default=3)
+    arrays_parser.set_defaults(func=bench_arrays)
+
+    parsed_args = argument_parser.parse_args()
+    parsed_args.func(parsed_args)
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
 import sys
+import os
+import json
+import pickle
 import argparse
 import pandas as pd
 from tabulate import tabulate
@@ -6,10 +9,26 @@ from rich import print
 
 from bminor_lexer import Lexer
 from parser import parse
-from errors import errors_detected, clear_errors
-from checker import SemanticAnalyzer
+from errors import ErrorCollector
+from checker import SemanticAnalyzer, load_builtins
 from codegen import generate_code
+from optimizer import optimize
 from interp import Interpreter, Context
+from arrays import array_types
+from closures import ClosureInterpreter
+from vm import VMInterpreter
+from pyexec import PyExecInterpreter
+from limits import Limits
+from output import Output
+from snapshot import Checkpoint, SnapshotError, save_snapshot, load_snapshot
+
+# Motores de ejecucion disponibles para --interp
+engines = {
+    'tree': Interpreter,
+    'closure': ClosureInterpreter,
+    'vm': VMInterpreter,
+    'pyexec': PyExecInterpreter,
+}
 
 def perform_lexical_analysis(input_file):
     """Ejecuta el escaneo léxico del código fuente y presenta los tokens identificados."""
@@ -68,20 +87,21 @@ def perform_syntax_analysis(input_file):
         print(f"Error: El archivo '{input_file}' no fue encontrado.")
         sys.exit(1)
 
-    clear_errors()
+    errors = ErrorCollector(source_code)
     
-    syntax_tree = parse(source_code)
+    syntax_tree = parse(source_code, errors)
     
-    if not errors_detected():
+    if not errors:
         print("[bold green]Analisis sintactico completado sin errores.[/bold green]")
         if syntax_tree:
             print("[bold blue]Mostrando Arbol de Sintaxis Abstracta (AST):[/bold blue]")
             tree_visualization = syntax_tree.pretty()
             print(tree_visualization)
     else:
-        print(f"[bold red]Se encontraron {errors_detected()} errores de sintaxis.[/bold red]")
+        errors.render()
+        print(f"[bold red]Se encontraron {len(errors)} errores de sintaxis.[/bold red]")
 
-def perform_semantic_analysis(input_file):
+def perform_semantic_analysis(input_file, jobs=1):
     """Ejecuta el análisis sintáctico y semántico completo del código fuente."""
     try:
         with open(input_file, 'r', encoding='utf-8') as source_file:
@@ -90,28 +110,30 @@ def perform_semantic_analysis(input_file):
         print(f"Error: El archivo '{input_file}' no fue encontrado.")
         sys.exit(1)
 
-    clear_errors()
+    errors = ErrorCollector(source_code)
     
-    syntax_tree = parse(source_code)
+    syntax_tree = parse(source_code, errors)
     
     # Verificar errores sintacticos antes de proceder
-    if errors_detected():
-        print(f"[bold red]Se encontraron {errors_detected()} errores de sintaxis. No se puede continuar con el analisis semantico.[/bold red]")
+    if errors:
+        errors.render()
+        print(f"[bold red]Se encontraron {len(errors)} errores de sintaxis. No se puede continuar con el analisis semantico.[/bold red]")
         return
         
     print("[bold blue]Analisis sintactico completado. Iniciando analisis semantico...[/bold blue]")
     
-    # Ejecutar verificacion semantica
-    global_symbol_table = SemanticAnalyzer.checker(syntax_tree)
+    # Ejecutar verificacion semantica (conservando los alcances para imprimirlos)
+    global_symbol_table = SemanticAnalyzer.checker(syntax_tree, retain_scopes=True, jobs=jobs, errors=errors)
     
-    if not errors_detected():
+    if not errors:
         print("[bold green]Analisis semantico completado sin errores.[/bold green]")
         print("[bold blue]Mostrando Tablas de Simbolos:[/bold blue]")
         global_symbol_table.print()
     else:
-        print(f"[bold red]Se encontraron {errors_detected()} errores en total.[/bold red]")
+        errors.render()
+        print(f"[bold red]Se encontraron {len(errors)} errores en total.[/bold red]")
 
-def generate_llvm_code(input_file):
+def generate_llvm_code(input_file, jobs=1, optimize_ast=True):
     """
     Ejecuta el proceso completo de compilación: Análisis, Verificación y Generación de Código IR.
     """
@@ -122,23 +144,30 @@ def generate_llvm_code(input_file):
         print(f"Error: El archivo '{input_file}' no fue encontrado.")
         sys.exit(1)
 
-    clear_errors()
+    errors = ErrorCollector(source_code)
     
     # Primera etapa: Analisis lexico y sintactico
     print("Fase 1: Analisis Lexico y Sintactico...")
-    syntax_tree = parse(source_code)
-    if errors_detected():
-        print(f"[bold red]Se encontraron {errors_detected()} errores de sintaxis. No se puede continuar.[/bold red]")
+    syntax_tree = parse(source_code, errors)
+    if errors:
+        errors.render()
+        print(f"[bold red]Se encontraron {len(errors)} errores de sintaxis. No se puede continuar.[/bold red]")
         return
     print("Analisis sintactico completado sin errores.\n")
 
     # Segunda etapa: Verificacion semantica
     print("Fase 2: Analisis Semantico...")
-    global_symbol_table = SemanticAnalyzer.checker(syntax_tree)
-    if errors_detected():
-        print(f"[bold red]Se encontraron {errors_detected()} errores semanticos. No se puede continuar.[/bold red]")
+    global_symbol_table = SemanticAnalyzer.checker(syntax_tree, jobs=jobs, errors=errors)
+    if errors:
+        errors.render()
+        print(f"[bold red]Se encontraron {len(errors)} errores semanticos. No se puede continuar.[/bold red]")
         return
     print("Analisis semantico completado sin errores.\n")
+    if optimize_ast:
+        syntax_tree, _ = optimize(syntax_tree, errors)
+        if errors:
+            errors.render()
+            return
 
     # Tercera etapa: Generacion de codigo intermedio
     print("Fase 3: Generacion de Codigo LLVM...")
@@ -157,7 +186,50 @@ def generate_llvm_code(input_file):
         import traceback
         traceback.print_exc()
 
-def interpret_code(input_file, debug=False, profile=False):
+def batch_code(input_file, inputs_dir, report=None, jobs=1, engine='tree', paranoid=False,
+               optimize_ast=True, memoize=False, limits=None):
+    """
+    Compila una vez el programa y lo ejecuta con cada archivo de 'inputs_dir'
+    como entrada, en 'jobs' procesos (ver embed.py). Escribe un registro
+    JSON por entrada en 'report' (o en la salida estandar si es None).
+    """
+    from embed import compile_program, CompileError
+
+    try:
+        with open(input_file, 'r', encoding='utf-8') as source_file:
+            source_code = source_file.read()
+    except FileNotFoundError:
+        print(f"Error: El archivo '{input_file}' no fue encontrado.")
+        sys.exit(1)
+    if not os.path.isdir(inputs_dir):
+        print(f"Error: El directorio '{inputs_dir}' no existe.")
+        sys.exit(1)
+    paths = sorted(os.path.join(inputs_dir, name) for name in os.listdir(inputs_dir)
+                   if os.path.isfile(os.path.join(inputs_dir, name)))
+
+    try:
+        program = compile_program(source_code, engine=engine, optimize_ast=optimize_ast, jobs=jobs)
+    except CompileError as err:
+        err.errors.render()
+        print(f"[bold red]Se encontraron {err.count} errores. No se puede continuar.[/bold red]")
+        sys.exit(1)
+
+    stream = sys.stdout if report is None else open(report, 'w', encoding='utf-8')
+    failed = 0
+    try:
+        for path, record in program.run_batch(paths, jobs=jobs, limits=limits,
+                                              memoize=memoize, paranoid=paranoid):
+            failed += not record['ok']
+            stream.write(json.dumps({'input': os.path.basename(path), **record}, ensure_ascii=False) + '\n')
+    finally:
+        if report is not None:
+            stream.close()
+    if report is not None:
+        print(f"{len(paths)} entradas ejecutadas, {failed} con errores. Reporte: {report}")
+
+def interpret_code(input_file, debug=False, profile=False, jobs=1, engine='tree', paranoid=False,
+                   optimize_ast=True, memoize=False, limits=None, output_buffer=None,
+                   checkpoint=None, resume=None):
     """
     Ejecuta el interprete tree-walking para el codigo BMinor.
     
@@ -165,6 +237,15 @@ def interpret_code(input_file, debug=False, profile=False):
         input_file: Archivo .bminor a ejecutar
         debug: Habilita modo debugging
         profile: Habilita perfilamiento
+        jobs: Procesos para verificar los cuerpos de funciones en paralelo
+        engine: Motor de ejecucion ('tree', 'closure', 'vm' o 'pyexec')
+        paranoid: Valida los operandos de cada operacion en tiempo de ejecucion
+        optimize_ast: Pliega constantes y poda ramas antes de ejecutar (ver optimizer.py)
+        memoize: Cachea los resultados de las funciones puras
+        limits: Limites de ejecucion (limits.Limits) o None
+        output_buffer: Caracteres de salida acumulados antes de escribir (None: automatico)
+        checkpoint: Guardado periodico de la ejecucion (snapshot.Checkpoint) o None
+        resume: Checkpoint desde el cual continuar la ejecucion, o None
     """
     try:
         with open(input_file, 'r', encoding='utf-8') as source_file:
@@ -173,31 +254,55 @@ def interpret_code(input_file, debug=False, profile=False):
         print(f"Error: El archivo '{input_file}' no fue encontrado.")
         sys.exit(1)
 
-    clear_errors()
+    errors = ErrorCollector(source_code)
     
     # Primera etapa: Analisis lexico y sintactico
     print("[bold blue]Fase 1: Analisis Lexico y Sintactico...[/bold blue]")
-    syntax_tree = parse(source_code)
-    if errors_detected():
-        print(f"[bold red]Se encontraron {errors_detected()} errores de sintaxis. No se puede continuar.[/bold red]")
+    syntax_tree = parse(source_code, errors)
+    if errors:
+        errors.render()
+        print(f"[bold red]Se encontraron {len(errors)} errores de sintaxis. No se puede continuar.[/bold red]")
         return
     print("[bold green]Analisis sintactico completado sin errores.[/bold green]\n")
 
     # Segunda etapa: Verificacion semantica
     print("[bold blue]Fase 2: Analisis Semantico...[/bold blue]")
-    global_symbol_table = SemanticAnalyzer.checker(syntax_tree)
-    if errors_detected():
-        print(f"[bold red]Se encontraron {errors_detected()} errores semanticos. No se puede continuar.[/bold red]")
+    global_symbol_table = SemanticAnalyzer.checker(syntax_tree, jobs=jobs, errors=errors)
+    if errors:
+        errors.render()
+        print(f"[bold red]Se encontraron {len(errors)} errores semanticos. No se puede continuar.[/bold red]")
         return
     print("[bold green]Analisis semantico completado sin errores.[/bold green]\n")
+    if optimize_ast:
+        syntax_tree, _ = optimize(syntax_tree, errors)
+        if errors:
+            errors.render()
+            return
 
     # Tercera etapa: Ejecucion con el interprete
     print("[bold blue]Fase 3: Ejecucion del Interprete...[/bold blue]")
     print("[bold yellow]==========================================[/bold yellow]")
+    snapshots = {}
+    if checkpoint is not None or resume is not None:
+        # Solo la VM tiene sus marcos de llamada como datos que se pueden guardar
+        if debug or profile or memoize:
+            print("[bold red]--checkpoint/--resume no se pueden usar con --debug/--profile/--memoize.[/bold red]")
+            return
+        if engine != 'vm':
+            print(f"[yellow]--checkpoint/--resume usan el motor vm en vez de {engine}.[/yellow]")
+            engine = 'vm'
+        snapshots = {'checkpoint': checkpoint, 'resume': resume}
+    if engine in ('vm', 'pyexec') and (debug or profile or memoize):
+        # Estos motores no instrumentan la ejecucion: se usa el motor tree-walking
+        print(f"[yellow]El motor {engine} no soporta --debug/--profile/--memoize; se usa el motor tree.[/yellow]")
+        engine = 'tree'
     try:
         ctxt = Context()
         # Opciones de debugging y profiling
-        interpreter = Interpreter(ctxt, debug=debug, profile=profile)
+        interpreter = engines[engine](ctxt, debug=debug, profile=profile, paranoid=paranoid,
+                                      memoize=memoize, limits=limits,
+                                      output=None if output_buffer is None else Output(buffer_size=output_buffer),
+                                      **snapshots)
         interpreter.interpret(syntax_tree)
         
         if ctxt.have_errors:
@@ -218,7 +323,7 @@ def repl_mode():
     """
     from rich.console import Console
     from rich.panel import Panel
-    from model import Program, Expression, Assignment, PrintStmt, ReturnStmt
+    from model import Program, Expression, Assignment, PrintStmt, ReturnStmt, VarDecl, ArrayDecl, FuncDecl
     
     console = Console()
     
@@ -227,27 +332,21 @@ def repl_mode():
     print("[dim]  .exit o .quit - Salir del REPL[/dim]")
     print("[dim]  .vars - Mostrar variables definidas[/dim]")
     print("[dim]  .clear - Limpiar todas las variables[/dim]")
+    print("[dim]  .save ARCHIVO / .load ARCHIVO - Guardar / restaurar la sesion[/dim]")
     print("[dim]  .help - Mostrar ayuda[/dim]")
     print()
     
     # Inicializar interprete y contexto
     ctxt = Context()
-    interpreter = Interpreter(ctxt)
+    # Sin buffer: cada print se ve en cuanto se ejecuta
+    interpreter = Interpreter(ctxt, output=Output(buffer_size=0))
     
-    # Inicializar builtins y constantes (usar el mismo metodo que interp.py)
-    import importlib.util
-    import os
+    # Inicializar builtins y constantes (los mismos que usa interp.py)
     from symtab import SymbolTable
     
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    builtins_path = os.path.join(current_dir, "builtins.py")
-    spec = importlib.util.spec_from_file_location("bminor_builtins", builtins_path)
-    bminor_builtins = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(bminor_builtins)
-    
-    for name, cval in bminor_builtins.consts.items():
+    for name, cval in load_builtins().consts.items():
         interpreter.env[name] = cval
-    for name, func in bminor_builtins.builtins.items():
+    for name, func in interpreter.builtin_functions.items():
         interpreter.env[name] = func
     
     # Tabla de simbolos global para el REPL (se actualiza incrementalmente)
@@ -260,6 +359,8 @@ def repl_mode():
     # Buffer para lineas multi-linea
     buffer = ""
     line_count = 0
+    # Codigo fuente de las entradas con declaraciones (para .save)
+    declarations = []
     
     try:
         while True:
@@ -295,6 +396,16 @@ def repl_mode():
                 elif line_stripped == '.help':
                     _show_help()
                     continue
+                elif line_stripped.startswith(('.save ', '.load ')):
+                    command, path = line_stripped.split(None, 1)
+                    try:
+                        if command == '.save':
+                            _save_session(path, interpreter, declarations)
+                        else:
+                            _load_session(path, interpreter, global_symbol_table, declarations)
+                    except (OSError, SnapshotError, pickle.UnpicklingError) as e:
+                        print(f"[red]Error: {e}[/red]")
+                    continue
                 elif line_stripped == '':
                     continue
                 
@@ -311,29 +422,30 @@ def repl_mode():
                 
                 # Intentar parsear y ejecutar
                 try:
-                    clear_errors()
+                    errors = ErrorCollector(buffer)
                     
                     # Parsear el codigo
-                    syntax_tree = parse(buffer)
+                    syntax_tree = parse(buffer, errors)
                     
-                    if errors_detected():
+                    if errors:
                         # Si hay errores, podria ser porque falta mas codigo
                         # Verificar si es un error de EOF
-                        error_msg = str(errors_detected())
-                        if "EOF" in error_msg or "final" in error_msg.lower():
+                        if any("EOF" in d.message for d in errors.diagnostics):
                             # Continuar leyendo
                             continue
                         else:
                             # Error real, mostrar y limpiar buffer
+                            errors.render()
                             print(f"[red]Error de sintaxis[/red]")
                             buffer = ""
                             continue
                     
                     # Verificar semanticamente usando la tabla de simbolos acumulada
-                    analyzer = SemanticAnalyzer()
+                    analyzer = SemanticAnalyzer(errors=errors)
                     analyzer.visit(syntax_tree, global_symbol_table)
                     
-                    if errors_detected():
+                    if errors:
+                        errors.render()
                         print(f"[red]Error semantico[/red]")
                         buffer = ""
                         continue
@@ -352,6 +464,8 @@ def repl_mode():
                                 # Si es una declaracion, se agregara a la tabla de simbolos automaticamente
                                 stmt.accept(interpreter)
                     
+                    if any(isinstance(stmt, (VarDecl, ArrayDecl, FuncDecl)) for stmt in syntax_tree.body):
+                        declarations.append(buffer)
                     # Limpiar buffer despues de ejecucion exitosa
                     buffer = ""
                     line_count += 1
@@ -391,7 +505,7 @@ def _show_variables(interpreter):
             continue
         vars_found = True
         value_str = str(value)
-        if isinstance(value, list):
+        if isinstance(value, array_types):
             value_str = f"[{len(value)} elementos]"
         elif isinstance(value, str) and len(value_str) > 50:
             value_str = value_str[:50] + "..."
@@ -404,12 +518,12 @@ def _show_variables(interpreter):
 
 def _clear_variables(interpreter):
     """Limpia todas las variables del entorno (excepto builtins)."""
-    from builtins import builtins, consts
+    consts = load_builtins().consts
     
     # Guardar builtins y constantes
     saved_builtins = {}
     saved_consts = {}
-    for name in builtins.keys():
+    for name in interpreter.builtin_functions.keys():
         if name in interpreter.env:
             saved_builtins[name] = interpreter.env[name]
     for name in consts.keys():
@@ -427,6 +541,37 @@ def _clear_variables(interpreter):
     
     print("[green]Variables limpiadas.[/green]")
 
+def _save_session(path, interpreter, declarations):
+    """Guarda las declaraciones de la sesion y los valores de las variables."""
+    snapshot = interpreter.snapshot()
+    snapshot.declarations = list(declarations)
+    save_snapshot(path, snapshot)
+    print(f"[green]Sesion guardada en '{path}' ({len(snapshot.globals)} variables).[/green]")
+
+def _load_session(path, interpreter, symbol_table, declarations):
+    """
+    Restaura una sesion guardada con .save: vuelve a verificar sus
+    declaraciones y a declarar sus funciones (sin ejecutar el resto de
+    las sentencias) y asigna los valores guardados de las variables.
+    """
+    from model import FuncDecl
+
+    snapshot = load_snapshot(path)
+    for source in snapshot.declarations:
+        errors = ErrorCollector(source)
+        syntax_tree = parse(source, errors)
+        if not errors:
+            SemanticAnalyzer(errors=errors).visit(syntax_tree, symbol_table)
+        if errors:
+            errors.render()
+            continue
+        for stmt in syntax_tree.body:
+            if isinstance(stmt, FuncDecl):
+                stmt.accept(interpreter)
+        declarations.append(source)
+    interpreter.restore(snapshot)
+    print(f"[green]Sesion restaurada desde '{path}' ({len(snapshot.globals)} variables).[/green]")
+
 def _show_help():
     """Muestra ayuda sobre el REPL."""
     help_text = """
@@ -435,6 +580,8 @@ def _show_help():
 [cyan].exit, .quit, .q[/cyan]  - Salir del REPL
 [cyan].vars[/cyan]            - Mostrar todas las variables definidas
 [cyan].clear[/cyan]           - Limpiar todas las variables
+[cyan].save ARCHIVO[/cyan]    - Guardar la sesion (declaraciones y valores)
+[cyan].load ARCHIVO[/cyan]    - Restaurar una sesion guardada
 [cyan].help[/cyan]            - Mostrar esta ayuda
 
 [bold]Ejemplos:[/bold]
@@ -455,6 +602,22 @@ def main():
     argument_parser.add_argument('--repl', action='store_true', help='Inicia el modo interactivo (REPL).')
     argument_parser.add_argument('--debug', action='store_true', help='Habilita el modo debugging (breakpoints, inspeccion de variables).')
     argument_parser.add_argument('--profile', action='store_true', help='Habilita el perfilamiento (medicion de tiempo y llamadas a funciones).')
+    argument_parser.add_argument('--jobs', type=int, default=1, help='Numero de procesos para verificar los cuerpos de funciones en paralelo.')
+    argument_parser.add_argument('--engine', choices=sorted(engines), default='tree', help='Motor de ejecucion para --interp: tree-walking, compilado a closures, maquina virtual de bytecode o traducido a Python.')
+    argument_parser.add_argument('--paranoid', action='store_true', help='Valida en tiempo de ejecucion los operandos de cada operacion aunque el checker ya verifico sus tipos.')
+    argument_parser.add_argument('--no-optimize', dest='optimize_ast', action='store_false', help='No pliega constantes ni poda ramas constantes antes de --interp/--codegen.')
+    argument_parser.add_argument('--memoize', action='store_true', help='Cachea los resultados de las funciones puras con argumentos escalares (motores tree y closure).')
+    argument_parser.add_argument('--max-steps', type=int, help='Maximo de pasos (iteraciones de ciclos y llamadas) para --interp.')
+    argument_parser.add_argument('--max-depth', type=int, help='Maximo de llamadas anidadas para --interp.')
+    argument_parser.add_argument('--max-array', type=int, help='Maximo de elementos de un array para --interp.')
+    argument_parser.add_argument('--timeout', type=float, help='Tiempo maximo de ejecucion en segundos para --interp.')
+    argument_parser.add_argument('--output-buffer', type=int, help='Caracteres de salida de print acumulados antes de escribir (0: sin buffer; por defecto 64K, o sin buffer en una terminal).')
+    argument_parser.add_argument('--checkpoint', metavar='FILE', help='Guarda periodicamente la ejecucion de --interp en FILE (motor vm).')
+    argument_parser.add_argument('--checkpoint-every', type=int, default=1000000, metavar='N', help='Iteraciones de ciclos entre dos guardados de --checkpoint.')
+    argument_parser.add_argument('--resume', metavar='FILE', help='Continua la ejecucion de --interp desde el checkpoint FILE (motor vm).')
+    argument_parser.add_argument('--batch', metavar='DIR', help='Ejecuta el programa con cada archivo de DIR como entrada (en --jobs procesos) y reporta un JSON por entrada.')
+    argument_parser.add_argument('--report', metavar='FILE', help='Archivo JSON Lines para el reporte de --batch (por defecto, la salida estandar).')
+    argument_parser.add_argument('--vm', dest='engine', action='store_const', const='vm', help='Equivale a --engine vm.')
     
     argument_parser.add_argument('filepath', type=str, nargs='?', help='El archivo .bminor a procesar.')
     parsed_args = argument_parser.parse_args()
@@ -475,17 +638,27 @@ def main():
         if not parsed_args.filepath:
             print("Error: Se requiere un archivo para --check")
             sys.exit(1)
-        perform_semantic_analysis(parsed_args.filepath)
+        perform_semantic_analysis(parsed_args.filepath, jobs=parsed_args.jobs)
     elif parsed_args.codegen:
         if not parsed_args.filepath:
             print("Error: Se requiere un archivo para --codegen")
             sys.exit(1)
-        generate_llvm_code(parsed_args.filepath)
+        generate_llvm_code(parsed_args.filepath, jobs=parsed_args.jobs, optimize_ast=parsed_args.optimize_ast)
+    elif parsed_args.batch:
+        if not parsed_args.filepath:
+            print("Error: Se requiere un archivo para --batch")
+            sys.exit(1)
+        batch_code(parsed_args.filepath, parsed_args.batch, report=parsed_args.report, jobs=parsed_args.jobs, engine=parsed_args.engine, paranoid=parsed_args.paranoid, optimize_ast=parsed_args.optimize_ast, memoize=parsed_args.memoize,
+                   limits=Limits(parsed_args.max_steps, parsed_args.max_depth, parsed_args.max_array, parsed_args.timeout))
     elif parsed_args.interp:
         if not parsed_args.filepath:
             print("Error: Se requiere un archivo para --interp")
             sys.exit(1)
-        interpret_code(parsed_args.filepath, debug=parsed_args.debug, profile=parsed_args.profile)
+        interpret_code(parsed_args.filepath, debug=parsed_args.debug, profile=parsed_args.profile, jobs=parsed_args.jobs, engine=parsed_args.engine, paranoid=parsed_args.paranoid, optimize_ast=parsed_args.optimize_ast, memoize=parsed_args.memoize,
+                       limits=Limits(parsed_args.max_steps, parsed_args.max_depth, parsed_args.max_array, parsed_args.timeout),
+                       output_buffer=parsed_args.output_buffer,
+                       checkpoint=Checkpoint(parsed_args.checkpoint, parsed_args.checkpoint_every) if parsed_args.checkpoint else None,
+                       resume=parsed_args.resume)
     else:
         print("Accion no especificada. Debes usar --scan, --parse, --check, --codegen, --interp, o --repl.")
         argument_parser.print_help()
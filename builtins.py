@@ -3,6 +3,15 @@
 Funciones y constantes built-in para el intérprete BMinor
 '''
 import math
+from array import array
+
+from arrays import NDArray, store_message
+
+try:
+    import numpy
+except ImportError:
+    # Sin NumPy los builtins de arrays usan ciclos de Python
+    numpy = None
 
 class CallError(Exception):
     """Excepcion lanzada cuando hay un error al llamar una funcion built-in"""
@@ -13,93 +22,251 @@ consts = {
     # Puedes agregar constantes aqui si es necesario
 }
 
-# Funciones built-in
-def read_integer(*args):
+# Registro de funciones built-in
+class Builtin:
+    """
+    Firma de una funcion built-in. 'params' y 'result' son tipos de
+    B-Minor ('integer', 'float', 'string', 'array [] integer'...). El
+    checker declara las funciones con esta firma y verifica cada llamada,
+    asi que la funcion recibe exactamente sus argumentos posicionales ya
+    con el tipo correcto y no vuelve a validarlos.
+
+    Una firma generica usa 'T' como tipo de elemento ('array [] T'): el
+    checker toma T del primer argumento, que debe ser un array de uno de
+    los tipos de 'element_types', y verifica el resto con ese tipo.
+    """
+    __slots__ = ('name', 'function', 'params', 'result')
+
+    def __init__(self, name, function, params, result):
+        self.name = name
+        self.function = function
+        self.params = params
+        self.result = result
+
+    element_types = ('integer', 'float')
+
+    @property
+    def generic(self):
+        return any(spec.split()[-1] == 'T' for spec in (self.result, *self.params))
+
+    def instantiate(self, element):
+        """Firma (params, result) con T reemplazado por 'element'"""
+        def replace(spec):
+            words = spec.split()
+            return ' '.join(element if word == 'T' else word for word in words)
+        return tuple(replace(spec) for spec in self.params), replace(self.result)
+
+    @property
+    def param_names(self):
+        code = self.function.__code__
+        return code.co_varnames[:code.co_argcount]
+
+    def __repr__(self):
+        return f"Builtin({self.name}: function {self.result} ({', '.join(self.params)}))"
+
+registry = {}
+
+def builtin(name, result, *params):
+    """Registra la funcion decorada como built-in 'name' con la firma dada"""
+    def register(function):
+        registry[name] = Builtin(name, function, params, result)
+        return function
+    return register
+
+def _read_line(name):
+    """Lee una linea de la entrada; al final de la entrada es un error de ejecucion"""
+    try:
+        return input()
+    except EOFError:
+        raise CallError(f"{name}(): no hay mas datos en la entrada")
+
+@builtin('read_integer', 'integer')
+def read_integer():
     """Lee un numero entero del usuario"""
-    if len(args) > 0:
-        raise CallError("read_integer() no acepta argumentos")
+    value = _read_line('read_integer')
     try:
-        value = input()
         return int(value)
     except ValueError:
         raise CallError(f"Error: '{value}' no es un numero entero valido")
 
-def read_float(*args):
+@builtin('read_string', 'string')
+def read_string():
+    """Lee una cadena de texto del usuario"""
+    return _read_line('read_string')
+
+@builtin('read_float', 'float')
+def read_float():
     """Lee un numero flotante del usuario"""
-    if len(args) > 0:
-        raise CallError("read_float() no acepta argumentos")
+    value = _read_line('read_float')
     try:
-        value = input()
         return float(value)
     except ValueError:
         raise CallError(f"Error: '{value}' no es un numero flotante valido")
 
-def read_string(*args):
-    """Lee una cadena de texto del usuario"""
-    if len(args) > 0:
-        raise CallError("read_string() no acepta argumentos")
-    return input()
-
-def sqrt(*args):
+@builtin('sqrt', 'float', 'float')
+def sqrt(x):
     """Calcula la raiz cuadrada de un numero"""
-    if len(args) != 1:
-        raise CallError(f"sqrt() requiere 1 argumento, se recibieron {len(args)}")
-    value = args[0]
-    if not isinstance(value, (int, float)):
-        raise CallError(f"sqrt() requiere un numero, se recibio {type(value).__name__}")
-    if value < 0:
+    if x < 0:
         raise CallError("sqrt() no puede calcular la raiz de un numero negativo")
-    return math.sqrt(float(value))
-
-def abs_func(*args):
-    """Calcula el valor absoluto de un numero"""
-    if len(args) != 1:
-        raise CallError(f"abs() requiere 1 argumento, se recibieron {len(args)}")
-    value = args[0]
-    if not isinstance(value, (int, float)):
-        raise CallError(f"abs() requiere un numero, se recibio {type(value).__name__}")
-    return abs(value)
-
-def max_func(*args):
-    """Encuentra el maximo entre dos o mas numeros"""
-    if len(args) < 1:
-        raise CallError("max() requiere al menos 1 argumento")
-    for arg in args:
-        if not isinstance(arg, (int, float)):
-            raise CallError(f"max() requiere numeros, se recibio {type(arg).__name__}")
-    return max(args)
-
-def min_func(*args):
-    """Encuentra el minimo entre dos o mas numeros"""
-    if len(args) < 1:
-        raise CallError("min() requiere al menos 1 argumento")
-    for arg in args:
-        if not isinstance(arg, (int, float)):
-            raise CallError(f"min() requiere numeros, se recibio {type(arg).__name__}")
-    return min(args)
-
-def length(*args):
-    """Calcula la longitud de un array o string"""
-    if len(args) != 1:
-        raise CallError(f"length() requiere 1 argumento, se recibieron {len(args)}")
-    value = args[0]
-    if isinstance(value, list):
-        return len(value)
-    elif isinstance(value, str):
-        return len(value)
+    return math.sqrt(x)
+
+@builtin('abs', 'float', 'float')
+def abs_func(x):
+    """Calcula el valor absoluto de un numero (abs_func evita el conflicto con abs() de Python)"""
+    return abs(x)
+
+@builtin('max', 'float', 'float', 'float')
+def max_func(a, b):
+    """Maximo entre dos numeros"""
+    return a if a >= b else b
+
+@builtin('min', 'float', 'float', 'float')
+def min_func(a, b):
+    """Minimo entre dos numeros"""
+    return a if a <= b else b
+
+@builtin('length', 'integer', 'array [] integer')
+def length(arr):
+    """Calcula la longitud de un array"""
+    return len(arr)
+
+# Alias de length para arrays
+registry['array_length'] = Builtin('array_length', length, ('array [] integer',), 'integer')
+
+# Builtins de arrays de enteros y flotantes
+#
+# Los arrays de 'integer' y 'float' son buffers de array.array ('q' y 'd',
+# ver arrays.py) o filas de un NDArray; con NumPy se operan con una vista
+# sin copia (numpy.frombuffer) en vez de recorrerlos elemento a elemento.
+# La suma de enteros es exacta, como la aritmetica del interprete: NumPy
+# solo se usa si el resultado no puede salirse de 64 bits. La suma de
+# flotantes de NumPy es por pares y puede diferir en los ultimos digitos
+# de la de un ciclo.
+_dtypes = {'q': 'int64', 'd': 'float64'}
+
+_INT64_MAX = 2**63 - 1
+
+def _view(arr):
+    """Vista de NumPy de un array de enteros o flotantes, o None"""
+    if numpy is None:
+        return None
+    if type(arr) is NDArray:
+        buffer, start = arr.buffer, arr.start
+    elif type(arr) is array:
+        buffer, start = arr, 0
     else:
-        raise CallError(f"length() requiere un array o string, se recibio {type(value).__name__}")
-
-# Funciones built-in
-builtins = {
-    'read_integer': read_integer,
-    'read_float': read_float,
-    'read_string': read_string,
-    'sqrt': sqrt,
-    'abs': abs_func,  # Usar abs_func para evitar conflicto con abs() de Python
-    'max': max_func,  # Usar max_func para evitar conflicto con max() de Python
-    'min': min_func,  # Usar min_func para evitar conflicto con min() de Python
-    'length': length,
-    'array_length': length,  # Alias de length para arrays
-}
+        return None
+    dtype = _dtypes.get(buffer.typecode)
+    if dtype is None:
+        return None
+    return numpy.frombuffer(buffer, dtype=dtype, count=len(arr), offset=start * buffer.itemsize)
+
+def _is_integer(view):
+    return view.dtype.kind == 'i'
+
+def _magnitude(view):
+    """Mayor valor absoluto de una vista de enteros (0 si esta vacia)"""
+    if not len(view):
+        return 0
+    return max(abs(int(view.min())), abs(int(view.max())))
+
+def _store(arr, values):
+    """Escribe 'values' en los primeros elementos de 'arr'"""
+    try:
+        for index, value in enumerate(values):
+            arr[index] = value
+    except (OverflowError, TypeError):
+        raise CallError(store_message(value))
+
+def _number(value):
+    """Escalar de fill/scale: una variable sin inicializar es un error de ejecucion"""
+    if type(value) not in (int, float):
+        raise CallError(store_message(value))
+    return value
+
+def _zero(arr):
+    """Suma de un array vacio: 0.0 para los arrays de flotantes"""
+    buffer = arr.buffer if type(arr) is NDArray else arr
+    return 0.0 if getattr(buffer, 'typecode', None) == 'd' else 0
+
+@builtin('sum', 'T', 'array [] T')
+def sum_array(arr):
+    """Suma de los elementos de un array"""
+    view = _view(arr)
+    if view is None or (_is_integer(view) and len(view) * _magnitude(view) > _INT64_MAX):
+        return sum(arr, _zero(arr))
+    return view.sum().item()
+
+@builtin('dot', 'T', 'array [] T', 'array [] T')
+def dot(a, b):
+    """Producto punto de dos arrays (hasta el largo del mas corto)"""
+    size = min(len(a), len(b))
+    va, vb = _view(a), _view(b)
+    if (va is None or vb is None or
+            (_is_integer(va) and size * _magnitude(va[:size]) * _magnitude(vb[:size]) > _INT64_MAX)):
+        return sum((a[i] * b[i] for i in range(size)), _zero(a))
+    return numpy.dot(va[:size], vb[:size]).item()
+
+@builtin('fill', 'void', 'array [] T', 'T')
+def fill(arr, value):
+    """Asigna 'value' a todos los elementos de un array"""
+    value = _number(value)
+    view = _view(arr)
+    if view is None:
+        _store(arr, [value] * len(arr))
+        return
+    try:
+        view[:] = value
+    except OverflowError:
+        raise CallError(store_message(value))
+
+@builtin('copy', 'void', 'array [] T', 'array [] T')
+def copy(dst, src):
+    """Copia los elementos de 'src' en 'dst' (hasta el largo del mas corto)"""
+    size = min(len(dst), len(src))
+    vdst, vsrc = _view(dst), _view(src)
+    if vdst is None or vsrc is None:
+        _store(dst, [src[i] for i in range(size)])
+    else:
+        vdst[:size] = vsrc[:size]
+
+@builtin('sort', 'void', 'array [] T')
+def sort(arr):
+    """Ordena un array de menor a mayor"""
+    view = _view(arr)
+    if view is None:
+        _store(arr, sorted(arr))
+    else:
+        view.sort()
+
+def _extreme(name, arr, function):
+    if not len(arr):
+        raise CallError(f"{name}() no puede calcularse sobre un array vacio")
+    view = _view(arr)
+    if view is None:
+        return function(arr)
+    return getattr(view, function.__name__)().item()
+
+@builtin('min_array', 'T', 'array [] T')
+def min_array(arr):
+    """Menor elemento de un array"""
+    return _extreme('min_array', arr, min)
+
+@builtin('max_array', 'T', 'array [] T')
+def max_array(arr):
+    """Mayor elemento de un array"""
+    return _extreme('max_array', arr, max)
+
+@builtin('scale', 'void', 'array [] T', 'T')
+def scale(arr, factor):
+    """Multiplica cada elemento de un array por 'factor'"""
+    factor = _number(factor)
+    view = _view(arr)
+    if view is None or (_is_integer(view) and
+                        max(_magnitude(view), 1) * abs(factor) > _INT64_MAX):
+        _store(arr, [value * factor for value in arr])
+    else:
+        view *= factor
 
+# Funciones built-in por nombre
+builtins = {name: entry.function for name, entry in registry.items()}
@@ -1,129 +1,202 @@
 # checker.py
+import gc
+import importlib.util
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+
 from rich    import print
 from typing  import Union, List
 
-from errors  import error, errors_detected
+from errors  import default_collector, SEMANTIC
 from model   import *
 from symtab  import SymbolTable
-from typesys import check_binop, check_unaryop
+from typesys import (bin_op_ids, unary_op_ids, binop_result, unaryop_result,
+                     type_of_node, function_of, ArrayOf,
+                     integer_type, float_type, boolean_type, char_type, string_type,
+                     void_type, error_type)
+
+# Número mínimo de funciones para que valga la pena repartir
+# la verificación de cuerpos entre procesos
+PARALLEL_THRESHOLD = 200
+
+def load_builtins():
+    """
+    Módulo builtins.py de B-Minor. Su nombre choca con el módulo builtins
+    de Python, así que se carga desde su ruta y se registra como
+    'bminor_builtins' en sys.modules: el checker, los intérpretes y el
+    REPL comparten el mismo registro de firmas (y la misma CallError).
+    """
+    module = sys.modules.get('bminor_builtins')
+    if module is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'builtins.py')
+        spec = importlib.util.spec_from_file_location('bminor_builtins', path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['bminor_builtins'] = module
+        spec.loader.exec_module(module)
+    return module
+
+bminor_builtins = load_builtins()
+
+def _type_node(spec):
+    """Nodo de tipo de una firma de builtin: 'float', 'array [] integer'..."""
+    words = spec.split()
+    if words[0] == 'array':
+        return ArrayType(_type_node(' '.join(words[2:])))
+    return SimpleType(spec)
 
 class SemanticAnalyzer(Visitor):
+    def __init__(self, jobs: int = 1, errors=None):
+        self.jobs = jobs
+        self.errors = errors if errors is not None else default_collector
+        # Diagnósticos pendientes: (posición de la declaración, mensaje, línea)
+        self.diagnostics = []
+        self._position = None
+        # Posición de cada declaración global (por id), ver _lookup
+        self._declared_at = {}
+        # Marcos de activación abiertos: nombres de variables por slot
+        self._frames = []
+
     @classmethod
-    def checker(cls, program_node: Program):
-        analyzer = cls()
-        # Inicializar tabla de simbolos global
-        global_symbols = SymbolTable('global')
+    def checker(cls, program_node: Program, retain_scopes: bool = False, jobs: int = 1, errors=None):
+        analyzer = cls(jobs, errors)
+        # Inicializar tabla de simbolos global (retain_scopes conserva
+        # una copia de cada alcance para poder imprimirlo con --check)
+        global_symbols = SymbolTable('global', retain_scopes=retain_scopes)
         # Registrar funciones built-in
         analyzer._register_builtins(global_symbols)
         # Procesar todas las declaraciones del programa
         analyzer.visit(program_node, global_symbols)
         return global_symbols
+
+    def error(self, message, lineno=None):
+        """
+        Registra un diagnóstico asociado a la declaración de nivel
+        superior que se está verificando. Se pasan todos juntos al
+        colector de errores, en orden de código fuente, al terminar
+        el programa.
+        """
+        if self._position is None:
+            self.errors.error(message, lineno, SEMANTIC)
+        else:
+            self.diagnostics.append((self._position, message, lineno))
+
+    def _new_slot(self, name, env: SymbolTable):
+        """
+        Reserva el slot (nivel, índice) de una declaración. El nivel es
+        la cantidad de funciones que la contienen; el índice, su
+        posición en el marco de esa función. Las declaraciones globales
+        (y los builtins) no tienen slot: el intérprete las busca por nombre.
+        """
+        if not self._frames or (len(self._frames) == 1 and env.depth == 0):
+            return None
+        frame = self._frames[-1]
+        frame.append(name)
+        return (len(self._frames) - 1, len(frame) - 1)
+
+    def _flush_diagnostics(self):
+        # sort es estable: dentro de una declaración se conserva el orden de emisión
+        self.diagnostics.sort(key=lambda diagnostic: diagnostic[0])
+        for _, message, lineno in self.diagnostics:
+            self.errors.error(message, lineno, SEMANTIC)
+        self.diagnostics = []
     
     def _register_builtins(self, symbol_table: SymbolTable):
-        """Registra las funciones built-in en la tabla de simbolos"""
-        # read_integer: function integer () = {}
-        read_integer_decl = FuncDecl(
-            name='read_integer',
-            type=SimpleType('integer'),
-            params=[],
-            body=None
-        )
-        read_integer_decl.sym_type = 'integer'
-        symbol_table.symbols['read_integer'] = read_integer_decl
-        
-        # read_string: function string () = {}
-        read_string_decl = FuncDecl(
-            name='read_string',
-            type=SimpleType('string'),
-            params=[],
-            body=None
-        )
-        read_string_decl.sym_type = 'string'
-        symbol_table.symbols['read_string'] = read_string_decl
-        
-        # read_float: function float () = {}
-        read_float_decl = FuncDecl(
-            name='read_float',
-            type=SimpleType('float'),
-            params=[],
-            body=None
-        )
-        read_float_decl.sym_type = 'float'
-        symbol_table.symbols['read_float'] = read_float_decl
-        
-        # sqrt: function float (x: float) = {}
-        sqrt_decl = FuncDecl(
-            name='sqrt',
-            type=SimpleType('float'),
-            params=[Param('x', SimpleType('float'))],
-            body=None
-        )
-        sqrt_decl.sym_type = 'float'
-        symbol_table.symbols['sqrt'] = sqrt_decl
-        
-        # abs: function float (x: float) = {}
-        abs_decl = FuncDecl(
-            name='abs',
-            type=SimpleType('float'),
-            params=[Param('x', SimpleType('float'))],
-            body=None
-        )
-        abs_decl.sym_type = 'float'
-        symbol_table.symbols['abs'] = abs_decl
-        
-        # max: function float (a: float, b: float) = {}
-        max_decl = FuncDecl(
-            name='max',
-            type=SimpleType('float'),
-            params=[Param('a', SimpleType('float')), Param('b', SimpleType('float'))],
-            body=None
-        )
-        max_decl.sym_type = 'float'
-        symbol_table.symbols['max'] = max_decl
-        
-        # min: function float (a: float, b: float) = {}
-        min_decl = FuncDecl(
-            name='min',
-            type=SimpleType('float'),
-            params=[Param('a', SimpleType('float')), Param('b', SimpleType('float'))],
-            body=None
-        )
-        min_decl.sym_type = 'float'
-        symbol_table.symbols['min'] = min_decl
-        
-        # length: function integer (arr: array [] integer) = {}
-        # Nota: length acepta arrays o strings, pero para el checker usamos array como base
-        length_decl = FuncDecl(
-            name='length',
-            type=SimpleType('integer'),
-            params=[Param('arr', ArrayType(SimpleType('integer')))],
-            body=None
-        )
-        length_decl.sym_type = 'integer'
-        symbol_table.symbols['length'] = length_decl
-        
-        # array_length: function integer (arr: array [] integer) = {}
-        # Alias de length para arrays
-        array_length_decl = FuncDecl(
-            name='array_length',
-            type=SimpleType('integer'),
-            params=[Param('arr', ArrayType(SimpleType('integer')))],
-            body=None
-        )
-        array_length_decl.sym_type = 'integer'
-        symbol_table.symbols['array_length'] = array_length_decl
+        """
+        Declara las funciones built-in con las firmas de su registro
+        (builtins.registry). Las llamadas a ellas se anotan con el nombre
+        del builtin ('builtin') para que los motores las invoquen
+        directamente, sin buscarlas ni volver a validar los argumentos.
+        """
+        for builtin in bminor_builtins.registry.values():
+            decl = FuncDecl(
+                name=builtin.name,
+                type=SimpleType(builtin.result),
+                params=[Param(name, _type_node(spec))
+                        for name, spec in zip(builtin.param_names, builtin.params)],
+                body=None
+            )
+            decl.builtin = builtin.name
+            self._declare_function(decl, symbol_table)
 
     # =====================================================================
     # Procesamiento de Programa y Bloques
     # =====================================================================
     def visit(self, program_node: Program, symbol_table: SymbolTable):
-        for declaration in program_node.body:
-            declaration.accept(self, symbol_table)
+        # Fase 1: declaraciones globales y firmas de funciones, en orden
+        functions = []
+        self._frames = [[]]
+        self._declared_at = _declaration_order(program_node)
+        for position, declaration in enumerate(program_node.body):
+            self._position = position
+            if isinstance(declaration, FuncDecl):
+                if self._declare_function(declaration, symbol_table):
+                    functions.append(position)
+            else:
+                declaration.accept(self, symbol_table)
+
+        # Fase 2: cuerpos de funciones. Con las firmas registradas cada
+        # cuerpo es independiente, así que pueden verificarse en paralelo.
+        # Las copias de alcances (retain_scopes) solo existen en el proceso
+        # que las crea, por eso en ese caso se verifica secuencialmente.
+        if (self.jobs > 1 and len(functions) >= PARALLEL_THRESHOLD
+                and not symbol_table.retain_scopes):
+            self._check_bodies_parallel(program_node, symbol_table, functions)
+        else:
+            for position in functions:
+                self._position = position
+                self._check_function_body(program_node.body[position], symbol_table)
+
+        self._position = None
+        # Variables de bloques de nivel superior (marco global del display)
+        program_node.frame_names = self._frames.pop()
+        self._flush_diagnostics()
+
+    def _lookup(self, name, env: SymbolTable):
+        """
+        Declaración visible de 'name'. Todas las globales se registran
+        antes de verificar los cuerpos, pero un cuerpo solo ve las
+        declaradas antes que su función (o ella misma).
+        """
+        decl = env.get(name)
+        position = self._declared_at.get(id(decl))
+        if position is not None and self._position is not None and position > self._position:
+            return None
+        return decl
+
+    def _check_bodies_parallel(self, program_node, symbol_table, functions):
+        """
+        Reparte los cuerpos de funciones en bloques contiguos entre un
+        pool de procesos. Cada proceso devuelve las anotaciones que hizo
+        sobre cada función (en preorden) junto con sus diagnósticos; las
+        anotaciones se aplican sobre el AST original y los diagnósticos
+        se ordenan por posición al reportarlos.
+        """
+        chunk_size = -(-len(functions) // (self.jobs * 4))
+        chunks = [functions[i:i + chunk_size] for i in range(0, len(functions), chunk_size)]
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        # Congelar el heap antes de crear los procesos evita que el GC de
+        # cada trabajador toque (y copie) las páginas del AST heredado
+        gc.freeze()
+        try:
+            with ProcessPoolExecutor(max_workers=self.jobs, mp_context=context,
+                                     initializer=_init_worker,
+                                     initargs=(program_node, symbol_table)) as pool:
+                for results in pool.map(_check_chunk, chunks):
+                    for position, annotations, diagnostics in results:
+                        _apply_annotations(program_node.body[position], iter(annotations))
+                        self.diagnostics.extend(diagnostics)
+        finally:
+            gc.unfreeze()
 
     def visit(self, block_node: BlockStmt, symbol_table: SymbolTable):
-        local_symbols = SymbolTable('block', parent_table=symbol_table)
+        symbol_table.enter_scope('block')
         for statement in block_node.statements:
-            statement.accept(self, local_symbols)
+            statement.accept(self, symbol_table)
+        symbol_table.exit_scope()
 
     # =====================================================================
     # Declaraciones
@@ -131,44 +204,48 @@ class SemanticAnalyzer(Visitor):
     
     def visit(self, n: VarDecl, env: SymbolTable):
         # Asignar el tipo PRIMERO
-        n.sym_type = n.type.name
+        n.sym_type = type_of_node(n.type)
         
         if n.value:
             n.value.accept(self, env)
-            if n.sym_type != n.value.type:
-                error(f'Error de tipo en declaración. Se esperaba {n.sym_type} pero se obtuvo {n.value.type}', n.lineno)
+            if n.sym_type is not n.value.type:
+                self.error(f'Error de tipo en declaración. Se esperaba {n.sym_type} pero se obtuvo {n.value.type}', n.lineno)
 
+        n.slot = self._new_slot(n.name, env)
+        self._shadow_builtin(n.name, env)
         try:
             env.add(n.name, n)
         except SymbolTable.DuplicateSymbolError:
-            error(f"La Variable '{n.name}' ya ha sido definida en este alcance", n.lineno)
+            self.error(f"La Variable '{n.name}' ya ha sido definida en este alcance", n.lineno)
         except SymbolTable.TypeConflictError:
-            error(f"Conflicto de tipos: La Variable '{n.name}' ya existe con un tipo diferente", n.lineno)
+            self.error(f"Conflicto de tipos: La Variable '{n.name}' ya existe con un tipo diferente", n.lineno)
 
     def visit(self, n: ArrayDecl, env: SymbolTable):
-        # El tipo del array ya está en n.type (que es un ArrayType)
-        n.sym_type = n.type
+        # n.type es el nodo ArrayType del AST; sym_type es el tipo internado
+        n.sym_type = type_of_node(n.type)
 
         # Validar recursivamente todos los tamaños de arrays anidados
         self._check_array_sizes(n.type, env, n.lineno)
 
         if n.size:
             n.size.accept(self, env)
-            if n.size.type != 'integer':
-                error(f"El tamaño del array debe ser 'integer', no '{n.size.type}'", n.lineno)
+            if n.size.type is not integer_type:
+                self.error(f"El tamaño del array debe ser 'integer', no '{n.size.type}'", n.lineno)
 
         if n.value:
+            # El tipo del elemento puede ser primitivo u otro array
+            expected_type = n.sym_type.element
             for val in n.value:
                 val.accept(self, env)
-                # Obtener el tipo del elemento (puede ser SimpleType o ArrayType)
-                expected_type = self._get_element_type_name(n.type.element_type)
-                if expected_type != val.type:
-                    error(f'Error de tipo en inicializador de array. Se esperaba {expected_type} pero se obtuvo {val.type}', n.lineno)
+                if expected_type is not val.type:
+                    self.error(f'Error de tipo en inicializador de array. Se esperaba {expected_type} pero se obtuvo {val.type}', n.lineno)
 
+        n.slot = self._new_slot(n.name, env)
+        self._shadow_builtin(n.name, env)
         try:
             env.add(n.name, n)
         except SymbolTable.DuplicateSymbolError:
-            error(f"El Array '{n.name}' ya ha sido definido en este alcance", n.lineno)
+            self.error(f"El Array '{n.name}' ya ha sido definido en este alcance", n.lineno)
 
     def _check_array_sizes(self, array_type, env, lineno):
         """Valida recursivamente todos los tamaños de arrays anidados"""
@@ -178,56 +255,73 @@ class SemanticAnalyzer(Visitor):
         # Validar el tamaño de este nivel si existe
         if array_type.size:
             array_type.size.accept(self, env)
-            if array_type.size.type != 'integer':
-                error(f"El tamaño del array debe ser 'integer', no '{array_type.size.type}'", lineno)
+            if array_type.size.type is not integer_type:
+                self.error(f"El tamaño del array debe ser 'integer', no '{array_type.size.type}'", lineno)
         
         # Recursivamente validar el tipo de elemento si es otro array
         if isinstance(array_type.element_type, ArrayType):
             self._check_array_sizes(array_type.element_type, env, lineno)
-    
-    def _get_element_type_name(self, typ):
-        """Obtiene el nombre del tipo (maneja SimpleType y ArrayType)"""
-        if isinstance(typ, SimpleType):
-            return typ.name
-        elif isinstance(typ, ArrayType):
-            return typ
-        return str(typ)
 
     def visit(self, n: FuncDecl, env: SymbolTable):
-        # Asignar el tipo de retorno de la función
-        n.sym_type = n.type.name
-        
+        if self._declare_function(n, env):
+            self._check_function_body(n, env)
+
+    def _declare_function(self, n: FuncDecl, env: SymbolTable):
+        """Registra la firma de la función. Retorna False si ya existía."""
+        # Asignar el tipo de retorno de la función y su firma completa
+        n.sym_type = type_of_node(n.type)
+        n.func_type = function_of(n.sym_type, [type_of_node(p.type) for p in n.params])
+        n.slot = self._new_slot(n.name, env)
+        self._shadow_builtin(n.name, env)
         try:
             env.add(n.name, n)
-        except SymbolTable.DuplicateSymbolError:
-            error(f"La Función '{n.name}' ya ha sido definida", n.lineno)
-            return  # No continuar si hay error de redefinición
+        except (SymbolTable.DuplicateSymbolError, SymbolTable.TypeConflictError):
+            self.error(f"La Función '{n.name}' ya ha sido definida", n.lineno)
+            return False  # No continuar si hay error de redefinición
+        return True
 
-        # Crear entorno local para la función
-        func_env = SymbolTable(n.name, parent_table=env)
-        func_env.add('$func', n)
+    def _shadow_builtin(self, name, env: SymbolTable):
+        """
+        Una declaración global con el nombre de un builtin lo reemplaza
+        (p. ej. una función 'sum' del programa): sus llamadas ya no se
+        anotan como builtin y los motores usan la declaración.
+        """
+        try:
+            existing = env[name]
+        except KeyError:
+            return
+        if getattr(existing, 'builtin', None) is not None:
+            del env[name]
+
+    def _check_function_body(self, n: FuncDecl, env: SymbolTable):
+        # Abrir el alcance local de la función
+        env.enter_scope(n.name)
+        env.add('$func', n)
+        # Cada función tiene su propio marco: primero los parámetros
+        self._frames.append([])
         
         # Procesar parámetros
         for p in n.params:
-            p.accept(self, func_env)
+            p.accept(self, env)
         
         # Procesar cuerpo
         if n.body:
-            n.body.accept(self, func_env)
+            n.body.accept(self, env)
+        n.frame_names = self._frames.pop()
+        env.exit_scope()
 
     def visit(self, n: Param, env: SymbolTable):
         # Determinar el tipo del parámetro
-        if isinstance(n.type, SimpleType):
-            n.sym_type = n.type.name
-        elif isinstance(n.type, ArrayType):
-            n.sym_type = n.type
+        n.sym_type = type_of_node(n.type)
+        if isinstance(n.type, ArrayType):
             # Validar tamaños de arrays en parámetros
             self._check_array_sizes(n.type, env, n.lineno)
         
+        n.slot = self._new_slot(n.name, env)
         try:
             env.add(n.name, n)
         except SymbolTable.DuplicateSymbolError:
-            error(f"El Parámetro '{n.name}' ya está definido", n.lineno)
+            self.error(f"El Parámetro '{n.name}' ya está definido", n.lineno)
 
     # =====================================================================
     # Sentencias
@@ -238,66 +332,74 @@ class SemanticAnalyzer(Visitor):
             value.accept(self, env)
 
     def visit(self, n: ReturnStmt, env: SymbolTable):
+        # 'return f(...)' con f una función del usuario (los builtins no
+        # tienen cuerpo) es una llamada en posición de cola: los motores
+        # reutilizan el marco del llamador
+        callee = env.get(n.value.name) if isinstance(n.value, FuncCall) else None
+        n.tail_call = isinstance(callee, FuncDecl) and callee.body is not None
         func_decl = env.get('$func')
         if not func_decl:
-            error("'return' utilizado por fuera de una función", n.lineno)
+            self.error("'return' utilizado por fuera de una función", n.lineno)
             return
         
         expected_type = func_decl.sym_type
         
         if n.value:
             n.value.accept(self, env)
-            if expected_type == 'void':
-                error(f"La función '{func_decl.name}' no debería retornar un valor", n.lineno)
-            elif expected_type != n.value.type:
-                error(f"Error de tipo. Se esperaba un retorno de tipo '{expected_type}' pero se obtuvo '{n.value.type}'", n.lineno)
+            if expected_type is void_type:
+                self.error(f"La función '{func_decl.name}' no debería retornar un valor", n.lineno)
+            elif expected_type is not n.value.type:
+                self.error(f"Error de tipo. Se esperaba un retorno de tipo '{expected_type}' pero se obtuvo '{n.value.type}'", n.lineno)
         else:
-            if expected_type != 'void':
-                error(f"La función '{func_decl.name}' debe retornar un valor de tipo '{expected_type}'", n.lineno)
+            if expected_type is not void_type:
+                self.error(f"La función '{func_decl.name}' debe retornar un valor de tipo '{expected_type}'", n.lineno)
 
     def visit(self, n: IfStmt, env: SymbolTable):
         n.condition.accept(self, env)
-        if n.condition.type != 'boolean':
-            error(f"La condición en IF debe ser 'boolean', no '{n.condition.type}'", n.lineno)
+        if n.condition.type is not boolean_type:
+            self.error(f"La condición en IF debe ser 'boolean', no '{n.condition.type}'", n.lineno)
         
         n.true_body.accept(self, env)
         if n.false_body:
             n.false_body.accept(self, env)
 
     def visit(self, n: ForStmt, env: SymbolTable):
-        loop_env = SymbolTable('for_loop', parent_table=env)
-        loop_env.add('$loop', True)
+        env.enter_scope('for_loop')
+        env.add('$loop', True)
         
         if n.init: 
-            n.init.accept(self, loop_env)
+            n.init.accept(self, env)
         
         if n.condition:
-            n.condition.accept(self, loop_env)
-            if n.condition.type != 'boolean':
-                error(f"La condición en FOR debe ser 'boolean', no '{n.condition.type}'", n.lineno)
+            n.condition.accept(self, env)
+            if n.condition.type is not boolean_type:
+                self.error(f"La condición en FOR debe ser 'boolean', no '{n.condition.type}'", n.lineno)
         
         if n.update: 
-            n.update.accept(self, loop_env)
+            n.update.accept(self, env)
         
-        n.body.accept(self, loop_env)
+        n.body.accept(self, env)
+        env.exit_scope()
     
     def visit(self, n: WhileStmt, env: SymbolTable):
         n.condition.accept(self, env)
-        if n.condition.type != 'boolean':
-            error(f"La condición en WHILE debe ser 'boolean', no '{n.condition.type}'", n.lineno)
+        if n.condition.type is not boolean_type:
+            self.error(f"La condición en WHILE debe ser 'boolean', no '{n.condition.type}'", n.lineno)
         
-        loop_env = SymbolTable('while_loop', parent_table=env)
-        loop_env.add('$loop', True)
-        n.body.accept(self, loop_env)
+        env.enter_scope('while_loop')
+        env.add('$loop', True)
+        n.body.accept(self, env)
+        env.exit_scope()
 
     def visit(self, n: DoWhileStmt, env: SymbolTable):
-        loop_env = SymbolTable('dowhile_loop', parent_table=env)
-        loop_env.add('$loop', True)
-        n.body.accept(self, loop_env)
+        env.enter_scope('dowhile_loop')
+        env.add('$loop', True)
+        n.body.accept(self, env)
         
-        n.condition.accept(self, loop_env)
-        if n.condition.type != 'boolean':
-            error(f"La condición en DO-WHILE debe ser 'boolean', no '{n.condition.type}'", n.lineno)
+        n.condition.accept(self, env)
+        if n.condition.type is not boolean_type:
+            self.error(f"La condición en DO-WHILE debe ser 'boolean', no '{n.condition.type}'", n.lineno)
+        env.exit_scope()
 
     # =====================================================================
     # Expresiones
@@ -307,58 +409,63 @@ class SemanticAnalyzer(Visitor):
         n.location.accept(self, env)
         n.value.accept(self, env)
 
-        if n.location.type != n.value.type:
-            error(f'Error de tipo en asignación. No se puede asignar {n.value.type} a {n.location.type}', n.lineno)
+        if n.location.type is not n.value.type:
+            self.error(f'Error de tipo en asignación. No se puede asignar {n.value.type} a {n.location.type}', n.lineno)
         
         if not getattr(n.location, 'mutable', False):
-            error(f"El destino de la asignación no es modificable", n.lineno)
+            self.error(f"El destino de la asignación no es modificable", n.lineno)
 
     def visit(self, n: BinOper, env: SymbolTable):
         n.left.accept(self, env)
         n.right.accept(self, env)
         
-        n.type = check_binop(n.op, n.left.type, n.right.type) 
-        if not n.type:
-            error(f'Operación inválida: {n.left.type} {n.op} {n.right.type}', n.lineno)
-            n.type = 'error'
+        # El identificador del operador se resuelve una vez por nodo: los
+        # motores lo usan para indexar sus tablas (ver interp._fast_binops)
+        n.op_id = bin_op_ids.get(n.op)
+        n.type = None if n.op_id is None else binop_result(n.op_id, n.left.type, n.right.type)
+        if n.type is None:
+            self.error(f'Operación inválida: {n.left.type} {n.op} {n.right.type}', n.lineno)
+            n.type = error_type
 
     def visit(self, n: UnaryOper, env: SymbolTable):
         n.expr.accept(self, env)
         
         # Operadores unarios normales (-, !, +)
         if n.__class__ is UnaryOper:
-            n.type = check_unaryop(n.op, n.expr.type)
-            if not n.type:
-                error(f'Operación unaria inválida: {n.op} {n.expr.type}', n.lineno)
-                n.type = 'error'
+            n.op_id = unary_op_ids.get(n.op)
+            n.type = None if n.op_id is None else unaryop_result(n.op_id, n.expr.type)
+            if n.type is None:
+                self.error(f'Operación unaria inválida: {n.op} {n.expr.type}', n.lineno)
+                n.type = error_type
         # Operadores de incremento/decremento (++, --)
         else:
-            if n.expr.type not in ('integer', 'float'):
-                error(f"Operador '{n.op}' solo aplicable a 'integer' o 'float', no a '{n.expr.type}'", n.lineno)
+            if n.expr.type is not integer_type and n.expr.type is not float_type:
+                self.error(f"Operador '{n.op}' solo aplicable a 'integer' o 'float', no a '{n.expr.type}'", n.lineno)
             if not getattr(n.expr, 'mutable', False):
-                error(f"El operando de '{n.op}' debe ser una ubicación modificable", n.lineno)
+                self.error(f"El operando de '{n.op}' debe ser una ubicación modificable", n.lineno)
             n.type = n.expr.type
 
     def visit(self, n: Literal, env: SymbolTable):
         if isinstance(n, Integer): 
-            n.type = 'integer'
+            n.type = integer_type
         elif isinstance(n, Float): 
-            n.type = 'float'
+            n.type = float_type
         elif isinstance(n, Boolean): 
-            n.type = 'boolean'
+            n.type = boolean_type
         elif isinstance(n, Char): 
-            n.type = 'char'
+            n.type = char_type
         elif isinstance(n, String): 
-            n.type = 'string'
+            n.type = string_type
 
     def visit(self, n: VarLocation, env: SymbolTable):
-        decl = env.get(n.name)
+        decl = self._lookup(n.name, env)
         if not decl:
-            error(f"Nombre no definido '{n.name}'", n.lineno)
-            n.type = 'error'
+            self.error(f"Nombre no definido '{n.name}'", n.lineno)
+            n.type = error_type
             n.mutable = False
         else:
             n.type = decl.sym_type
+            n.slot = decl.slot
             # Las funciones no son mutables, las variables sí
             n.mutable = not isinstance(decl, FuncDecl)
     
@@ -367,65 +474,162 @@ class SemanticAnalyzer(Visitor):
         n.index.accept(self, env)
 
         # Verificar que location es un array
-        if not isinstance(n.location.type, ArrayType):
-            error("El operador de subíndice '[]' solo se puede usar en arrays", n.lineno)
-            n.type = 'error'
+        if not isinstance(n.location.type, ArrayOf):
+            self.error("El operador de subíndice '[]' solo se puede usar en arrays", n.lineno)
+            n.type = error_type
             n.mutable = False
             return
 
         # Verificar que el índice es entero
-        if n.index.type != 'integer':
-            error(f"El índice del array debe ser 'integer', no '{n.index.type}'", n.lineno)
+        if n.index.type is not integer_type:
+            self.error(f"El índice del array debe ser 'integer', no '{n.index.type}'", n.lineno)
         
         # El tipo del resultado es el tipo de elemento del array
-        # Puede ser SimpleType o ArrayType (para arrays anidados)
-        element_type = n.location.type.element_type
-        if isinstance(element_type, SimpleType):
-            n.type = element_type.name
-        elif isinstance(element_type, ArrayType):
-            n.type = element_type  # Array anidado
-        else:
-            n.type = element_type
+        # (primitivo u otro array, para arrays anidados)
+        n.type = n.location.type.element
         
         n.mutable = True
 
     def visit(self, n: FuncCall, env: SymbolTable):
-        func_decl = env.get(n.name)
+        n.builtin = None
+        func_decl = self._lookup(n.name, env)
         if not func_decl:
-            error(f"Función '{n.name}' no definida", n.lineno)
-            n.type = 'error'
+            self.error(f"Función '{n.name}' no definida", n.lineno)
+            n.type = error_type
             return
         
         if not isinstance(func_decl, FuncDecl):
-            error(f"'{n.name}' no es una función, no se puede llamar", n.lineno)
-            n.type = 'error'
+            self.error(f"'{n.name}' no es una función, no se puede llamar", n.lineno)
+            n.type = error_type
             return
 
         # Verificar número de argumentos
         if len(n.args) != len(func_decl.params):
-            error(f"La función '{n.name}' esperaba {len(func_decl.params)} argumentos, pero se recibieron {len(n.args)}", n.lineno)
+            self.error(f"La función '{n.name}' esperaba {len(func_decl.params)} argumentos, pero se recibieron {len(n.args)}", n.lineno)
         
-        # Verificar tipo de cada argumento
-        for i, (arg, param) in enumerate(zip(n.args, func_decl.params)):
+        # Verificar tipo de cada argumento contra la firma de la función
+        params, result = func_decl.func_type.params, func_decl.sym_type
+        builtin = bminor_builtins.registry.get(getattr(func_decl, 'builtin', None))
+        for i, arg in enumerate(n.args[:len(params)]):
             arg.accept(self, env)
-            
-            # Obtener el tipo esperado del parámetro
-            if isinstance(param.type, SimpleType):
-                expected_type = param.type.name
-            elif isinstance(param.type, ArrayType):
-                expected_type = param.type
-            
-            # Comparar tipos
-            if isinstance(expected_type, str):
+            if i == 0 and builtin is not None and builtin.generic:
+                params, result = self._instantiate(builtin, arg, n)
+            expected_type = params[i]
+            if arg.type is expected_type or expected_type is error_type:
+                continue
+
+            if not isinstance(expected_type, ArrayOf):
                 # Tipo simple
-                if arg.type != expected_type:
-                    error(f"Error de tipo en argumento {i+1} de '{n.name}'. Se esperaba '{expected_type}' pero se obtuvo '{arg.type}'", n.lineno)
-            elif isinstance(expected_type, ArrayType):
-                # Tipo array
-                if not isinstance(arg.type, ArrayType):
-                    error(f"Error de tipo en argumento {i+1} de '{n.name}'. Se esperaba un array pero se obtuvo '{arg.type}'", n.lineno)
-                elif arg.type.element_type.name != expected_type.element_type.name:
-                    error(f"Error de tipo en argumento {i+1} de '{n.name}'. Se esperaba array[{expected_type.element_type.name}] pero se obtuvo array[{arg.type.element_type.name}]", n.lineno)
+                self.error(f"Error de tipo en argumento {i+1} de '{n.name}'. Se esperaba '{expected_type}' pero se obtuvo '{arg.type}'", n.lineno)
+            elif not isinstance(arg.type, ArrayOf):
+                self.error(f"Error de tipo en argumento {i+1} de '{n.name}'. Se esperaba un array pero se obtuvo '{arg.type}'", n.lineno)
+            else:
+                self.error(f"Error de tipo en argumento {i+1} de '{n.name}'. Se esperaba array[{expected_type.element}] pero se obtuvo array[{arg.type.element}]", n.lineno)
 
         # El tipo de la expresión es el tipo de retorno de la función
-        n.type = func_decl.sym_type
\ No newline at end of file
+        n.type = result
+        n.slot = func_decl.slot
+        if len(n.args) == len(func_decl.params):
+            n.builtin = getattr(func_decl, 'builtin', None)
+
+    def _instantiate(self, builtin, arg, n: FuncCall):
+        """
+        Firma de un builtin genérico ('array [] T') para una llamada: T es
+        el tipo de elemento del primer argumento. Si no es un array de un
+        tipo admitido, todos los tipos quedan como error_type.
+        """
+        if isinstance(arg.type, ArrayOf) and str(arg.type.element) in builtin.element_types:
+            params, result = builtin.instantiate(str(arg.type.element))
+            return ([type_of_node(_type_node(spec)) for spec in params],
+                    type_of_node(_type_node(result)))
+        if arg.type is not error_type:
+            expected = ' o '.join(f"'array [] {t}'" for t in builtin.element_types)
+            self.error(f"Error de tipo en argumento 1 de '{n.name}'. Se esperaba {expected} pero se obtuvo '{arg.type}'", n.lineno)
+        return [error_type] * len(builtin.params), error_type
+
+
+# =====================================================================
+# Verificación de cuerpos en procesos trabajadores
+# =====================================================================
+
+# Atributos que el checker agrega a los nodos del AST
+_ANNOTATIONS = ('type', 'sym_type', 'func_type', 'mutable', 'slot', 'frame_names', 'tail_call', 'builtin',
+                'op_id')
+_node_layouts = {}
+
+def _node_layout(cls):
+    """Campos hijos y atributos de anotación de una clase de nodo."""
+    layout = _node_layouts.get(cls)
+    if layout is None:
+        children = tuple(f.name for f in fields(cls) if f.name != 'lineno')
+        annotations = tuple(name for name in _ANNOTATIONS if name not in children)
+        layout = _node_layouts[cls] = (children, annotations)
+    return layout
+
+def _collect_annotations(node, out):
+    """Agrega a 'out' las anotaciones del subárbol en preorden (None si falta)."""
+    children, annotations = _node_layout(type(node))
+    state = node.__dict__
+    for name in annotations:
+        out.append(state.get(name))
+    for name in children:
+        value = state[name]
+        if isinstance(value, Node):
+            _collect_annotations(value, out)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, Node):
+                    _collect_annotations(item, out)
+
+def _apply_annotations(node, annotations):
+    children, names = _node_layout(type(node))
+    state = node.__dict__
+    for name in names:
+        value = next(annotations)
+        if value is not None:
+            state[name] = value
+    for name in children:
+        value = state[name]
+        if isinstance(value, Node):
+            _apply_annotations(value, annotations)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, Node):
+                    _apply_annotations(item, annotations)
+
+def _declaration_order(program_node):
+    """
+    Posición en el programa de cada declaración global, por id. Un
+    prototipo y su definición comparten la posición del primero.
+    """
+    first = {}
+    order = {}
+    for position, declaration in enumerate(program_node.body):
+        name = getattr(declaration, 'name', None)
+        order[id(declaration)] = first.setdefault(name, position)
+    return order
+
+_worker_state = None
+
+def _init_worker(program_node, symbol_table):
+    global _worker_state
+    _worker_state = (program_node, symbol_table)
+    # Con 'spawn' el AST llega deserializado: también se congela para
+    # que el GC no lo recorra completo mientras se crean anotaciones
+    gc.freeze()
+
+def _check_chunk(positions):
+    program_node, symbol_table = _worker_state
+    analyzer = SemanticAnalyzer()
+    analyzer._frames = [[]]
+    analyzer._declared_at = _declaration_order(program_node)
+    results = []
+    for position in positions:
+        func = program_node.body[position]
+        analyzer._position = position
+        analyzer._check_function_body(func, symbol_table)
+        annotations = []
+        _collect_annotations(func, annotations)
+        results.append((position, annotations, analyzer.diagnostics))
+        analyzer.diagnostics = []
+    return results
@@ -0,0 +1,875 @@
+# closures.py
+'''
+Motor de ejecución por compilación a closures
+=============================================
+El intérprete tree-walking (interp.py) vuelve a despachar 'accept'
+sobre cada nodo cada vez que lo ejecuta, y visit(BinOper) recorre una
+cadena de if/elif sobre node.op en cada evaluación. Este motor recorre
+el AST ya verificado una sola vez y convierte cada nodo en una función
+de Python (closure) que recibe el entorno y ejecuta el nodo. Las
+operaciones se especializan con los tipos anotados por el checker: un
+'integer + integer' se convierte en una closure que solo suma.
+
+La semántica y los mensajes de error son los del intérprete
+tree-walking: los entornos siguen siendo ChainMap y, cuando una
+operación especializada no puede completarse (p. ej. una variable sin
+inicializar vale None, o un divisor vale 0), se delega en la
+implementación genérica de Interpreter, que reporta el mismo error.
+'''
+
+from model   import *
+from typesys import integer_type, float_type, boolean_type
+from interp  import Interpreter, ReturnException, CallError, _is_truthy
+from arrays  import (new_array, new_ndarray, dimensions, subscript_chain, locate,
+                     array_types, array_classes, store_message, values_message)
+
+
+class CompiledFunction:
+  '''
+  Función de usuario con el cuerpo ya compilado. Igual que
+  interp.Function, expone 'arity' y se invoca con el intérprete
+  como primer argumento.
+  '''
+  def __init__(self, node, body, env):
+    self.node = node
+    self.body = body
+    self.env = env
+    self.param_names = [param.name for param in node.params]
+
+  @property
+  def arity(self) -> int:
+    return len(self.param_names)
+
+  def __call__(self, interp, *args):
+    limits = interp.limits
+    if limits is not None:
+      limits.enter(self.node)
+    func = self
+    while True:
+      env = func.env.new_child(dict(zip(func.param_names, args)))
+      try:
+        func.body(env)
+        result = None
+      except TailCall as call:
+        # 'return g(...)': g se ejecuta en este mismo marco de Python
+        func, args = call.function, call.args
+        if limits is not None:
+          limits.step(func.node)
+        continue
+      except ReturnException as e:
+        result = e.value
+      except RecursionError as err:
+        # La llamada más interna registra dónde se agotó la pila
+        # (Interpreter.interpret la reporta)
+        if not hasattr(err, 'node'):
+          err.node = func.node
+        raise
+      if limits is not None:
+        limits.leave()
+      return result
+
+
+class TailCall(Exception):
+  '''
+  Lanzada por 'return g(...)' en posición de cola para que el
+  CompiledFunction que está en ejecución invoque a g sin anidar otra
+  llamada de Python.
+  '''
+  def __init__(self, function, args):
+    self.function = function
+    self.args = args
+
+
+def _assign(env, name, value):
+  # Actualiza el mapa más cercano donde existe la variable,
+  # o la crea en el mapa actual si no existe
+  for m in env.maps:
+    if name in m:
+      m[name] = value
+      return
+  env.maps[0][name] = value
+
+
+# =====================================================================
+# Operadores binarios especializados
+#
+# Cada fábrica recibe las closures de los operandos y 'slow', la
+# implementación genérica (Interpreter._binop) que valida y reporta
+# errores. La closure resultante intenta la operación directa y solo
+# recurre a 'slow' si algo falla.
+# =====================================================================
+
+def _add(left, right, slow):
+  def add(env):
+    a = left(env)
+    b = right(env)
+    try:
+      return a + b
+    except TypeError:
+      return slow(a, b)
+  return add
+
+def _sub(left, right, slow):
+  def sub(env):
+    a = left(env)
+    b = right(env)
+    try:
+      return a - b
+    except TypeError:
+      return slow(a, b)
+  return sub
+
+def _mul(left, right, slow):
+  def mul(env):
+    a = left(env)
+    b = right(env)
+    try:
+      return a * b
+    except TypeError:
+      return slow(a, b)
+  return mul
+
+def _int_div(left, right, slow):
+  def int_div(env):
+    a = left(env)
+    b = right(env)
+    if b:
+      try:
+        return a // b
+      except TypeError:
+        pass
+    return slow(a, b)
+  return int_div
+
+def _float_div(left, right, slow):
+  def float_div(env):
+    a = left(env)
+    b = right(env)
+    if b:
+      try:
+        return a / b
+      except TypeError:
+        pass
+    return slow(a, b)
+  return float_div
+
+def _mod(left, right, slow):
+  def mod(env):
+    a = left(env)
+    b = right(env)
+    if b:
+      try:
+        return a % b
+      except TypeError:
+        pass
+    return slow(a, b)
+  return mod
+
+def _pow(left, right, slow):
+  def pow_(env):
+    a = left(env)
+    b = right(env)
+    try:
+      return a ** b
+    except (TypeError, ZeroDivisionError):
+      return slow(a, b)
+  return pow_
+
+def _lt(left, right, slow):
+  def lt(env):
+    a = left(env)
+    b = right(env)
+    try:
+      return a < b
+    except TypeError:
+      return slow(a, b)
+  return lt
+
+def _le(left, right, slow):
+  def le(env):
+    a = left(env)
+    b = right(env)
+    try:
+      return a <= b
+    except TypeError:
+      return slow(a, b)
+  return le
+
+def _gt(left, right, slow):
+  def gt(env):
+    a = left(env)
+    b = right(env)
+    try:
+      return a > b
+    except TypeError:
+      return slow(a, b)
+  return gt
+
+def _ge(left, right, slow):
+  def ge(env):
+    a = left(env)
+    b = right(env)
+    try:
+      return a >= b
+    except TypeError:
+      return slow(a, b)
+  return ge
+
+def _eq(left, right, slow):
+  def eq(env):
+    return left(env) == right(env)
+  return eq
+
+def _ne(left, right, slow):
+  def ne(env):
+    return left(env) != right(env)
+  return ne
+
+# Operaciones especializadas por (tipo izquierdo, operador, tipo derecho)
+_numeric_ops = {
+  '+' : _add,
+  '-' : _sub,
+  '*' : _mul,
+  '%' : _mod,
+  '^' : _pow,
+  '<' : _lt,
+  '<=': _le,
+  '>' : _gt,
+  '>=': _ge,
+}
+
+_specialized_binops = {}
+for _type in (integer_type, float_type):
+  for _op, _make in _numeric_ops.items():
+    _specialized_binops[(_type, _op, _type)] = _make
+_specialized_binops[(integer_type, '/', integer_type)] = _int_div
+_specialized_binops[(float_type, '/', float_type)] = _float_div
+
+
+class ClosureCompiler(Visitor):
+  '''
+  Convierte un AST verificado en closures 'f(env)'. Las sentencias
+  devuelven None; las expresiones devuelven su valor.
+  '''
+  def __init__(self, interp):
+    self.interp = interp
+    self.debugger = interp.debugger if interp.debugger.enabled else None
+    self.profiler = interp.profiler if interp.profiler.enabled else None
+
+  def compile(self, node):
+    return node.accept(self)
+
+  def _traced(self, node, kind, closure, breakpoint=True):
+    '''
+    Envuelve una closure con los ganchos del depurador. Solo se
+    usa si el depurador está habilitado, así que sin --debug no
+    cuesta nada.
+    '''
+    if self.debugger is None:
+      return closure
+    debugger = self.debugger
+    lineno = node.lineno
+    def traced(env):
+      if breakpoint:
+        debugger.check_breakpoint(lineno, env)
+      debugger.trace_execution(lineno, kind, env)
+      return closure(env)
+    return traced
+
+  def _condition(self, node):
+    '''
+    Compila una condición a una closure que devuelve un valor cuya
+    veracidad en Python coincide con la de B-Minor.
+    '''
+    cond = node.accept(self)
+    if node.type is boolean_type:
+      # Un boolean vale True, False o None (sin inicializar): la
+      # veracidad de Python ya coincide con _is_truthy
+      return cond
+    def truthy(env):
+      return _is_truthy(cond(env))
+    return truthy
+
+  # Declarations
+  def visit(self, node: Program):
+    statements = [stmt.accept(self) for stmt in node.body]
+    def program(env):
+      for stmt in statements:
+        stmt(env)
+    return program
+
+  def visit(self, node: FuncDecl):
+    interp = self.interp
+    name = node.name
+    if node.body:
+      body = node.body.accept(self)
+    else:
+      def body(env):
+        interp.error(node, f"La función '{name}' no tiene cuerpo")
+    def func_decl(env):
+      env[name] = interp._memoized(node, CompiledFunction(node, body, env))
+    if self.debugger is not None:
+      return self._traced(node, 'FuncDecl', func_decl, breakpoint=False)
+    return func_decl
+
+  def visit(self, node: VarDecl):
+    name = node.name
+    if node.value:
+      value = node.value.accept(self)
+      def var_decl(env):
+        env[name] = value(env)
+    else:
+      def var_decl(env):
+        env[name] = None
+    return var_decl
+
+  def visit(self, node: ArrayDecl):
+    interp = self.interp
+    name = node.name
+    size_expr = node.size or getattr(node.type, 'size', None)
+    size = size_expr.accept(self) if size_expr else None
+    values = [value.accept(self) for value in node.value] if node.value else None
+    inner_sizes = [size_expr.accept(self) for size_expr in dimensions(node.type)]
+
+    element = node.sym_type.element
+    limits = interp.limits
+
+    def array_decl(env):
+      array_size = 0
+      if size is not None:
+        array_size = size(env)
+        if not isinstance(array_size, int):
+          interp.error(node, f"El tamaño del array debe ser un entero, se obtuvo {type(array_size).__name__}")
+      shape = [array_size]
+      for inner_size in inner_sizes:
+        shape.append(inner_size(env))
+        if not isinstance(shape[-1], int):
+          interp.error(node, f"El tamaño del array debe ser un entero, se obtuvo {type(shape[-1]).__name__}")
+      if limits is not None:
+        limits.allocate(node, shape)
+      items = [value(env) for value in values] if values is not None else None
+      try:
+        if inner_sizes:
+          env[name] = new_ndarray(element, shape, items)
+        else:
+          env[name] = new_array(element, array_size, items)
+      except (OverflowError, TypeError):
+        interp.error(node, values_message(items))
+    return array_decl
+
+  def visit(self, node: BlockStmt):
+    statements = [stmt.accept(self) for stmt in node.statements]
+    def block(env):
+      env = env.new_child()
+      for stmt in statements:
+        stmt(env)
+    return block
+
+  # Statements
+  def visit(self, node: PrintStmt):
+    values = [expr.accept(self) for expr in node.values]
+    emit = self.interp.output.emit
+    def print_stmt(env):
+      emit([expr(env) for expr in values])
+    return print_stmt
+
+  def _counted(self, node, body):
+    '''
+    Con límites de ejecución, el cuerpo de un ciclo cuenta un paso por
+    iteración; sin ellos se usa tal cual.
+    '''
+    limits = self.interp.limits
+    if limits is None:
+      return body
+    step = limits.step
+    def counted_body(env):
+      step(node)
+      body(env)
+    return counted_body
+
+  def visit(self, node: WhileStmt):
+    condition = self._condition(node.condition)
+    body = self._counted(node, node.body.accept(self))
+    def while_stmt(env):
+      while condition(env):
+        body(env)
+    return while_stmt
+
+  def visit(self, node: DoWhileStmt):
+    condition = self._condition(node.condition)
+    body = self._counted(node, node.body.accept(self))
+    def do_while_stmt(env):
+      body(env)
+      while condition(env):
+        body(env)
+    return do_while_stmt
+
+  def visit(self, node: ForStmt):
+    init = node.init.accept(self) if node.init else None
+    condition = self._condition(node.condition)
+    update = node.update.accept(self) if node.update else None
+    body = self._counted(node, node.body.accept(self))
+    def for_stmt(env):
+      if init is not None:
+        init(env)
+      while condition(env):
+        body(env)
+        if update is not None:
+          update(env)
+    return for_stmt
+
+  def visit(self, node: IfStmt):
+    condition = self._condition(node.condition)
+    true_body = node.true_body.accept(self)
+    if node.false_body:
+      false_body = node.false_body.accept(self)
+      def if_else_stmt(env):
+        if condition(env):
+          true_body(env)
+        else:
+          false_body(env)
+      return if_else_stmt
+    def if_stmt(env):
+      if condition(env):
+        true_body(env)
+    return if_stmt
+
+  def visit(self, node: ReturnStmt):
+    if not node.value:
+      def return_stmt(env):
+        raise ReturnException(None)
+      return return_stmt
+    if node.tail_call and self.profiler is None and self.debugger is None:
+      return self._tail_call(node.value)
+    value = node.value.accept(self)
+    def return_value_stmt(env):
+      raise ReturnException(value(env))
+    return return_value_stmt
+
+  # Expressions
+  def visit(self, node: BinOper):
+    interp = self.interp
+    left = node.left.accept(self)
+    right = node.right.accept(self)
+
+    if node.op in ('||', '&&'):
+      # Evaluación cortocircuitada. Un boolean vale True, False o None,
+      # así que su veracidad en Python coincide con _is_truthy
+      if node.left.type is not boolean_type:
+        return self._short_circuit_value(node.op, left, right)
+      if node.op == '||':
+        def logical_or(env):
+          value = left(env)
+          if value:
+            return value
+          return right(env)
+        return logical_or
+      def logical_and(env):
+        value = left(env)
+        if not value:
+          return value
+        return right(env)
+      return logical_and
+
+    def slow(a, b):
+      return interp._binop(node, a, b)
+
+    if node.op == '==':
+      return _eq(left, right, slow)
+    if node.op == '!=':
+      return _ne(left, right, slow)
+
+    make = _specialized_binops.get((node.left.type, node.op, node.right.type))
+    if make is None and node.op == '+' and node.left.type is node.right.type:
+      # Concatenación de strings
+      make = _add
+    if make is not None and not interp.paranoid:
+      return make(left, right, slow)
+
+    def binop(env):
+      return slow(left(env), right(env))
+    return binop
+
+  def _short_circuit_value(self, op, left, right):
+    if op == '||':
+      def logical_or(env):
+        value = left(env)
+        if _is_truthy(value):
+          return value
+        return right(env)
+      return logical_or
+    def logical_and(env):
+      value = left(env)
+      if not _is_truthy(value):
+        return value
+      return right(env)
+    return logical_and
+
+  def visit(self, node: UnaryOper):
+    interp = self.interp
+    expr = node.expr.accept(self)
+
+    if node.op == '!':
+      if node.expr.type is boolean_type:
+        def not_bool(env):
+          return not expr(env)
+        return not_bool
+      def not_value(env):
+        return not _is_truthy(expr(env))
+      return not_value
+
+    if node.op == '-':
+      def negate(env):
+        value = expr(env)
+        try:
+          return -value
+        except TypeError:
+          return interp._unaryop(node, value)
+      return negate
+
+    def unaryop(env):
+      return interp._unaryop(node, expr(env))
+    return unaryop
+
+  def _inc_dec(self, node, delta, return_original):
+    interp = self.interp
+    target = node.expr
+
+    if isinstance(target, VarLocation):
+      name = target.name
+      load = target.accept(self)
+      def inc_dec_var(env):
+        value = load(env)
+        interp._validate_numeric_operands(node, value)
+        new_value = value + delta
+        _assign(env, name, new_value)
+        return value if return_original else new_value
+      return inc_dec_var
+
+    if isinstance(target, ArraySubscript) and isinstance(target.location, VarLocation):
+      validator = interp.validator
+      load_array = self._array_loader(target)
+      index = target.index.accept(self)
+      def inc_dec_item(env):
+        arr = load_array(env)
+        idx = index(env)
+        validator.validate_array_index(target, arr, idx)
+        value = arr[idx]
+        interp._validate_numeric_operands(node, value)
+        new_value = value + delta
+        try:
+          arr[idx] = new_value
+        except (OverflowError, TypeError):
+          interp.error(node, store_message(new_value))
+        return value if return_original else new_value
+      return inc_dec_item
+
+    if subscript_chain(target):
+      element = self._element_locator(target)
+      def inc_dec_element(env):
+        container, idx = element(env)
+        value = container[idx]
+        interp._validate_numeric_operands(node, value)
+        new_value = value + delta
+        try:
+          container[idx] = new_value
+        except (OverflowError, TypeError):
+          interp.error(node, store_message(new_value))
+        return value if return_original else new_value
+      return inc_dec_element
+
+    if isinstance(target, ArraySubscript):
+      message = "Solo se soportan incrementos/decrementos en variables o arrays simples"
+    else:
+      message = "El operando de incremento/decremento debe ser un lvalue (variable o elemento de array)"
+    load = target.accept(self)
+    def inc_dec_invalid(env):
+      interp._validate_numeric_operands(node, load(env))
+      interp.error(node, message)
+    return inc_dec_invalid
+
+  def visit(self, node: PreInc):
+    return self._inc_dec(node, 1, return_original=False)
+
+  def visit(self, node: PreDec):
+    return self._inc_dec(node, -1, return_original=False)
+
+  def visit(self, node: PostInc):
+    return self._inc_dec(node, 1, return_original=True)
+
+  def visit(self, node: PostDec):
+    return self._inc_dec(node, -1, return_original=True)
+
+  def visit(self, node: Assignment):
+    interp = self.interp
+    value = node.value.accept(self)
+    location = node.location
+
+    if isinstance(location, VarLocation):
+      name = location.name
+      def assign_var(env):
+        result = value(env)
+        _assign(env, name, result)
+        return result
+      return self._traced(node, 'Assignment', assign_var)
+
+    if isinstance(location, ArraySubscript):
+      if not isinstance(location.location, VarLocation):
+        element = self._element_locator(location)
+        def assign_element(env):
+          result = value(env)
+          container, idx = element(env)
+          try:
+            container[idx] = result
+          except (OverflowError, TypeError):
+            interp.error(node, store_message(result))
+          return result
+        return self._traced(node, 'Assignment', assign_element)
+
+      arr_name = location.location.name
+      index = location.index.accept(self)
+      def assign_item(env):
+        result = value(env)
+        arr = env[arr_name]
+        idx = index(env)
+        if not isinstance(arr, array_types):
+          interp.error(node, f"'{arr_name}' no es un array")
+        if not isinstance(idx, int):
+          interp.error(node, f"El índice debe ser un entero")
+        if idx < 0 or idx >= len(arr):
+          interp.error(node, f"Índice fuera de rango: {idx}")
+        try:
+          arr[idx] = result
+        except (OverflowError, TypeError):
+          interp.error(node, store_message(result))
+        return result
+      return self._traced(node, 'Assignment', assign_item)
+
+    raise NotImplementedError(f"Tipo de asignación no soportado: {type(location)}")
+
+  def _callee(self, node):
+    '''
+    Closures que buscan la función de un FuncCall y verifican la
+    cantidad de argumentos.
+    '''
+    interp = self.interp
+    name = node.name
+    nargs = len(node.args)
+
+    def lookup(env):
+      try:
+        callee = env[name]
+      except KeyError:
+        interp.error(node, f"Funcion '{name}' no definida")
+      if not callable(callee):
+        interp.error(node, f'{name!r} no es invocable')
+      return callee
+
+    def check_arity(callee):
+      if callee.arity != -1 and nargs != callee.arity:
+        interp.error(node, f"Esperado {callee.arity} argumentos, se recibieron {nargs}")
+    return lookup, check_arity
+
+  def _builtin_call(self, node, args):
+    '''
+    Llamada a un builtin resuelto por el checker: la función se obtiene
+    al compilar y recibe sus argumentos (ya verificados) directamente.
+    '''
+    interp = self.interp
+    function = interp.builtin_functions[node.builtin]
+    if not args:
+      def call(env):
+        try:
+          return function()
+        except CallError as err:
+          interp.error(node, str(err))
+    elif len(args) == 1:
+      arg, = args
+      def call(env):
+        try:
+          return function(arg(env))
+        except CallError as err:
+          interp.error(node, str(err))
+    elif len(args) == 2:
+      first, second = args
+      def call(env):
+        try:
+          return function(first(env), second(env))
+        except CallError as err:
+          interp.error(node, str(err))
+    else:
+      def call(env):
+        try:
+          return function(*[arg(env) for arg in args])
+        except CallError as err:
+          interp.error(node, str(err))
+    return call
+
+  def _tail_call(self, node):
+    '''
+    'return g(...)': si g es una función del usuario compilada se lanza
+    TailCall en vez de invocarla; si no, se retorna su resultado.
+    '''
+    interp = self.interp
+    args = [arg.accept(self) for arg in node.args]
+    lookup, check_arity = self._callee(node)
+    def tail_call_stmt(env):
+      callee = lookup(env)
+      values = [arg(env) for arg in args]
+      if type(callee) is CompiledFunction:
+        check_arity(callee)
+        raise TailCall(callee, values)
+      try:
+        if hasattr(callee, 'arity'):
+          check_arity(callee)
+          raise ReturnException(callee(interp, *values))
+        raise ReturnException(callee(*values))
+      except CallError as err:
+        interp.error(node, str(err))
+    return tail_call_stmt
+
+  def visit(self, node: FuncCall):
+    interp = self.interp
+    name = node.name
+    args = [arg.accept(self) for arg in node.args]
+    if node.builtin is not None and self.profiler is None and self.debugger is None:
+      return self._builtin_call(node, args)
+    lookup, check_arity = self._callee(node)
+
+    if self.profiler is None and self.debugger is None:
+      def call(env):
+        callee = lookup(env)
+        values = [arg(env) for arg in args]
+        try:
+          if hasattr(callee, 'arity'):
+            check_arity(callee)
+            return callee(interp, *values)
+          return callee(*values)
+        except CallError as err:
+          interp.error(node, str(err))
+      return call
+
+    # Con --profile o --debug se reproducen los ganchos del intérprete
+    profiler, debugger = interp.profiler, interp.debugger
+    error_handler = interp.error_handler
+    def instrumented_call(env):
+      callee = lookup(env)
+      values = [arg(env) for arg in args]
+      user_function = hasattr(callee, 'arity')
+      if user_function:
+        check_arity(callee)
+
+      start = None
+      if profiler.enabled and user_function:
+        start = profiler.enter_function(name)
+        error_handler.push_context(name, node.lineno)
+      if debugger.enabled:
+        debugger.check_breakpoint(node.lineno, env)
+        debugger.trace_execution(node.lineno, 'FuncCall', env)
+
+      try:
+        result = callee(interp, *values) if user_function else callee(*values)
+        if profiler.enabled and user_function:
+          profiler.exit_function(name, start)
+          error_handler.pop_context()
+        return result
+      except CallError as err:
+        if profiler.enabled:
+          error_handler.pop_context()
+        interp.error(node, str(err))
+      except Exception:
+        if profiler.enabled:
+          profiler.exit_function(name, start)
+          error_handler.pop_context()
+        raise
+    return instrumented_call
+
+  def visit(self, node: VarLocation):
+    interp = self.interp
+    name = node.name
+    def load(env):
+      try:
+        return env[name]
+      except KeyError:
+        interp.error(node, f"Variable '{name}' no definida")
+    return load
+
+  def _array_loader(self, node: ArraySubscript):
+    if not isinstance(node.location, VarLocation):
+      return node.location.accept(self)
+    interp = self.interp
+    arr_name = node.location.name
+    def load_array(env):
+      try:
+        return env[arr_name]
+      except KeyError:
+        interp.error(node, f"Array '{arr_name}' no definido")
+    return load_array
+
+  def _element_locator(self, node: ArraySubscript):
+    '''
+    Closure que resuelve 'a[i][j]...' a (contenedor, índice); en un
+    array multidimensional es el buffer y la posición del elemento.
+    '''
+    _, levels = subscript_chain(node)
+    validate = self.interp.validator.validate_array_index
+    load_array = self._array_loader(levels[0])
+    indices = [level.index.accept(self) for level in levels]
+    if len(indices) == 2:
+      first, second = indices
+      def locate_2d(env):
+        arr = load_array(env)
+        return locate(levels, arr, (first(env), second(env)), validate)
+      return locate_2d
+    def locate_element(env):
+      arr = load_array(env)
+      return locate(levels, arr, [index(env) for index in indices], validate)
+    return locate_element
+
+  def visit(self, node: ArraySubscript):
+    validator = self.interp.validator
+    if subscript_chain(node) and self.debugger is None:
+      element = self._element_locator(node)
+      def subscript_element(env):
+        container, idx = element(env)
+        return container[idx]
+      return subscript_element
+    load_array = self._array_loader(node)
+    index = node.index.accept(self)
+    def subscript(env):
+      arr = load_array(env)
+      idx = index(env)
+      if type(arr) not in array_classes or type(idx) is not int or not 0 <= idx < len(arr):
+        # Validacion en tiempo de ejecucion (lanza el error apropiado)
+        validator.validate_array_index(node, arr, idx)
+      return arr[idx]
+    if self.debugger is not None:
+      debugger = self.debugger
+      lineno = node.lineno
+      def traced_subscript(env):
+        arr = load_array(env)
+        idx = index(env)
+        validator.validate_array_index(node, arr, idx)
+        debugger.check_breakpoint(lineno, env)
+        debugger.trace_execution(lineno, 'ArraySubscript', env)
+        return arr[idx]
+      return traced_subscript
+    return subscript
+
+  # Literales
+  def visit(self, node: Literal):
+    value = node.value
+    def literal(env):
+      return value
+    return literal
+
+
+class ClosureInterpreter(Interpreter):
+  '''
+  Intérprete que compila el programa a closures antes de ejecutarlo.
+  Comparte con Interpreter el entorno global, los builtins, el manejo
+  de errores, el depurador y el perfilador.
+  '''
+  def execute(self, node):
+    program = ClosureCompiler(self).compile(node)
+    program(self.env)
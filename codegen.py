@@ -1,6 +1,8 @@
 import llvmlite.ir as ir
 import llvmlite.binding as llvm
 from model import *
+from typesys import (ArrayOf, PrimitiveType, integer_type, float_type, boolean_type,
+                     char_type, string_type, void_type)
 
 class IRGenerator(Visitor):
     def __init__(self):
@@ -27,12 +29,12 @@ class IRGenerator(Visitor):
         
         # Mapeo de tipos B-Minor a LLVM
         self.mapeo_tipos = {
-            'integer': self.tipo_entero,
-            'float': self.tipo_flotante,
-            'boolean': self.tipo_booleano,
-            'char': self.tipo_caracter,
-            'void': self.tipo_void,
-            'string': ir.PointerType(self.tipo_caracter)
+            integer_type: self.tipo_entero,
+            float_type: self.tipo_flotante,
+            boolean_type: self.tipo_booleano,
+            char_type: self.tipo_caracter,
+            void_type: self.tipo_void,
+            string_type: ir.PointerType(self.tipo_caracter)
         }
 
         # Declarar funciones externas (runtime)
@@ -126,6 +128,27 @@ class IRGenerator(Visitor):
         self._llvm_pow = ir.Function(self.llvm_module, f_type, name="llvm.pow.f64")
         self._llvm_pow.attributes.add('readnone')
         
+        # void array_sort_integer(long long* arr, long long n)
+        f_type = ir.FunctionType(self.tipo_void, [ir.PointerType(self.tipo_entero), self.tipo_entero])
+        self._array_sort_integer = ir.Function(self.llvm_module, f_type, name="array_sort_integer")
+        
+        # void array_sort_float(double* arr, long long n)
+        f_type = ir.FunctionType(self.tipo_void, [ir.PointerType(self.tipo_flotante), self.tipo_entero])
+        self._array_sort_float = ir.Function(self.llvm_module, f_type, name="array_sort_float")
+        
+        # Builtins de arrays de enteros y flotantes (builtins.py): se generan
+        # como ciclos en línea, salvo sort que llama al runtime
+        self.array_builtins = {
+            'sum': self._array_sum,
+            'dot': self._array_dot,
+            'fill': self._array_fill,
+            'copy': self._array_copy,
+            'sort': self._array_sort,
+            'min_array': self._array_min,
+            'max_array': self._array_max,
+            'scale': self._array_scale,
+        }
+        
         # Mapeo de nombres B-Minor a funciones runtime
         self.builtin_functions = {
             'read_integer': self._read_integer,
@@ -140,10 +163,11 @@ class IRGenerator(Visitor):
 
     def _convertir_tipo_llvm(self, tipo_bminor):
         """Convierte un tipo B-Minor a su equivalente LLVM."""
-        if isinstance(tipo_bminor, str):
+        if isinstance(tipo_bminor, PrimitiveType):
             return self.mapeo_tipos.get(tipo_bminor, self.tipo_entero)
-        elif isinstance(tipo_bminor, ArrayType):
-            elem_type = self._convertir_tipo_llvm(tipo_bminor.element_type.name)
+        elif isinstance(tipo_bminor, ArrayOf):
+            # Arrays se pasan como punteros al primer elemento
+            elem_type = self._convertir_tipo_llvm(tipo_bminor.element)
             return ir.PointerType(elem_type)
         else:
             return self.tipo_entero  # Fallback
@@ -191,14 +215,8 @@ class IRGenerator(Visitor):
         return_type = self._convertir_tipo_llvm(n.sym_type)
         
         # Obtener tipos de parámetros
-        param_types = []
-        for param in n.params:
-            if isinstance(param.type, SimpleType):
-                param_types.append(self._convertir_tipo_llvm(param.type.name))
-            elif isinstance(param.type, ArrayType):
-                # Arrays como parámetros son punteros
-                elem_type = self._convertir_tipo_llvm(param.type.element_type.name)
-                param_types.append(elem_type.as_pointer())
+        # (los arrays como parámetros son punteros)
+        param_types = [self._convertir_tipo_llvm(t) for t in n.func_type.params]
         
         # Crear tipo de función
         func_type = ir.FunctionType(return_type, param_types)
@@ -239,23 +257,23 @@ class IRGenerator(Visitor):
                 init_val = ir.Constant(self.tipo_caracter, ord(n.value.value))
             else:
                 # Para expresiones más complejas, inicializar con 0 y luego asignar
-                if var_type_bminor == 'integer':
+                if var_type_bminor is integer_type:
                     init_val = ir.Constant(self.tipo_entero, 0)
-                elif var_type_bminor == 'float':
+                elif var_type_bminor is float_type:
                     init_val = ir.Constant(self.tipo_flotante, 0.0)
-                elif var_type_bminor == 'boolean':
+                elif var_type_bminor is boolean_type:
                     init_val = ir.Constant(self.tipo_booleano, 0)
                 else:
                     init_val = ir.Constant(var_type_llvm, 0)
         else:
             # Inicializar con valor por defecto
-            if var_type_bminor == 'integer':
+            if var_type_bminor is integer_type:
                 init_val = ir.Constant(self.tipo_entero, 0)
-            elif var_type_bminor == 'float':
+            elif var_type_bminor is float_type:
                 init_val = ir.Constant(self.tipo_flotante, 0.0)
-            elif var_type_bminor == 'boolean':
+            elif var_type_bminor is boolean_type:
                 init_val = ir.Constant(self.tipo_booleano, 0)
-            elif var_type_bminor == 'char':
+            elif var_type_bminor is char_type:
                 init_val = ir.Constant(self.tipo_caracter, 0)
             else:
                 init_val = ir.Constant(var_type_llvm, 0)
@@ -287,8 +305,8 @@ class IRGenerator(Visitor):
             array_size = 1  # Fallback
         
         # Obtener tipo del elemento
-        if isinstance(array_type.element_type, SimpleType):
-            elem_type = self.mapeo_tipos[array_type.element_type.name]
+        if isinstance(n.sym_type.element, PrimitiveType):
+            elem_type = self.mapeo_tipos[n.sym_type.element]
         else:
             elem_type = self.tipo_entero  # Fallback
         
@@ -348,13 +366,13 @@ class IRGenerator(Visitor):
             self.constructor_ir.store(init_val, var_ptr)
         else:
             # Inicializar con valor por defecto (0, 0.0, false)
-            if var_type_bminor == 'integer':
+            if var_type_bminor is integer_type:
                 default_val = ir.Constant(self.tipo_entero, 0)
-            elif var_type_bminor == 'float':
+            elif var_type_bminor is float_type:
                 default_val = ir.Constant(self.tipo_flotante, 0.0)
-            elif var_type_bminor == 'boolean':
+            elif var_type_bminor is boolean_type:
                 default_val = ir.Constant(self.tipo_booleano, 0)
-            elif var_type_bminor == 'char':
+            elif var_type_bminor is char_type:
                 default_val = ir.Constant(self.tipo_caracter, 0)
             else:
                 default_val = ir.Constant(var_type_llvm, 0)
@@ -370,7 +388,7 @@ class IRGenerator(Visitor):
         var_name = n.name
         
         # Obtener tipo de elemento
-        element_type_llvm = self._convertir_tipo_llvm(n.type.element_type.name)
+        element_type_llvm = self._convertir_tipo_llvm(n.sym_type.element)
         
         # Evaluar el tamaño (puede ser una expresión)
         if n.type.size:
@@ -394,11 +412,11 @@ class IRGenerator(Visitor):
             size_i32 = self.constructor_ir.trunc(size_val, ir.IntType(32), name="size_i32")
         
         # Llamar a array_new_integer/float/boolean según el tipo
-        if n.type.element_type.name == 'integer':
+        if n.sym_type.element is integer_type:
             array_ptr = self.constructor_ir.call(self._array_new_integer, [size_i32], name=f"{var_name}_new")
-        elif n.type.element_type.name == 'float':
+        elif n.sym_type.element is float_type:
             array_ptr = self.constructor_ir.call(self._array_new_float, [size_i32], name=f"{var_name}_new")
-        elif n.type.element_type.name == 'boolean':
+        elif n.sym_type.element is boolean_type:
             array_ptr = self.constructor_ir.call(self._array_new_boolean, [size_i32], name=f"{var_name}_new")
         else:
             # Por defecto, usar integer
@@ -440,13 +458,8 @@ class IRGenerator(Visitor):
         for i, param in enumerate(n.params):
             param_name = param.name
             
-            # Determinar tipo del parámetro
-            if isinstance(param.type, SimpleType):
-                param_type = self._convertir_tipo_llvm(param.type.name)
-            elif isinstance(param.type, ArrayType):
-                # Arrays como parámetros son punteros
-                elem_type = self._convertir_tipo_llvm(param.type.element_type.name)
-                param_type = elem_type.as_pointer()
+            # Determinar tipo del parámetro (los arrays son punteros)
+            param_type = self._convertir_tipo_llvm(n.func_type.params[i])
             
             # Crear alloca
             param_ptr = self.constructor_ir.alloca(param_type, name=param_name)
@@ -461,18 +474,18 @@ class IRGenerator(Visitor):
         
         # Asegurar que la función termina con return
         if not self.constructor_ir.block.is_terminated:
-            if n.sym_type == 'void':
+            if n.sym_type is void_type:
                 self.constructor_ir.ret_void()
             else:
                 # Retornar valor por defecto
                 return_type = self._convertir_tipo_llvm(n.sym_type)
-                if n.sym_type == 'integer':
+                if n.sym_type is integer_type:
                     self.constructor_ir.ret(ir.Constant(return_type, 0))
-                elif n.sym_type == 'float':
+                elif n.sym_type is float_type:
                     self.constructor_ir.ret(ir.Constant(return_type, 0.0))
-                elif n.sym_type == 'boolean':
+                elif n.sym_type is boolean_type:
                     self.constructor_ir.ret(ir.Constant(return_type, 0))
-                elif n.sym_type == 'char':
+                elif n.sym_type is char_type:
                     self.constructor_ir.ret(ir.Constant(return_type, 0))
         
         # Restaurar contexto
@@ -559,15 +572,15 @@ class IRGenerator(Visitor):
             node_type = value_node.type 
 
             # Llama a la función de runtime correcta
-            if node_type == 'integer':
+            if node_type is integer_type:
                 self.constructor_ir.call(self._print_integer, [value_llvm])
-            elif node_type == 'float':
+            elif node_type is float_type:
                 self.constructor_ir.call(self._print_float, [value_llvm])
-            elif node_type == 'boolean':
+            elif node_type is boolean_type:
                 self.constructor_ir.call(self._print_boolean, [value_llvm])
-            elif node_type == 'char':
+            elif node_type is char_type:
                 self.constructor_ir.call(self._print_char, [value_llvm])
-            elif node_type == 'string':
+            elif node_type is string_type:
                 self.constructor_ir.call(self._print_string, [value_llvm])
 
         # Imprimir nueva línea al final (comportamiento de B-Minor)
@@ -580,7 +593,10 @@ class IRGenerator(Visitor):
         '''
         if n.value:
             # Return con valor
-            return_val = self.visit(n.value)
+            if getattr(n, 'tail_call', False):
+                return_val = self._call_user_function(n.value, tail=True)
+            else:
+                return_val = self.visit(n.value)
             self.constructor_ir.ret(return_val)
         else:
             # Return void
@@ -830,10 +846,10 @@ class IRGenerator(Visitor):
             raise RuntimeError(f"Variable '{var_name}' no encontrada") 
         
         # El checker (checker.py) anotó el nodo con su tipo B-Minor.
-        # n.type será 'integer', 'float', o una instancia de ArrayType.
+        # n.type será integer_type, float_type, ... o una instancia de ArrayOf.
         
-        # Si el tipo del nodo es ArrayType, estamos pasándolo como argumento.
-        if isinstance(n.type, ArrayType):
+        # Si el tipo del nodo es ArrayOf, estamos pasándolo como argumento.
+        if isinstance(n.type, ArrayOf):
             if is_global:
                 # Variable global de tipo array: obtener puntero al primer elemento
                 zero = ir.Constant(self.tipo_entero, 0)
@@ -910,7 +926,7 @@ class IRGenerator(Visitor):
         # Pero necesitamos saber si es int o float para elegir la instrucción.
         # n.left.type y n.right.type tienen los tipos B-Minor.
         
-        is_float = (n.left.type == 'float' or n.right.type == 'float')
+        is_float = (n.left.type is float_type or n.right.type is float_type)
         
         if n.op == '+':
             if is_float:
@@ -973,7 +989,7 @@ class IRGenerator(Visitor):
         expr_val = self.visit(n.expr)
         
         if n.op == '-':
-            if n.expr.type == 'float':
+            if n.expr.type is float_type:
                 return self.constructor_ir.fneg(expr_val, name="negtmp")
             else:
                 return self.constructor_ir.neg(expr_val, name="negtmp")
@@ -1006,17 +1022,17 @@ class IRGenerator(Visitor):
         current_val = self.constructor_ir.load(var_ptr, name="current_val")
         
         # Crear constante 1 del tipo apropiado
-        if n.expr.type == 'float':
+        if n.expr.type is float_type:
             one = ir.Constant(self.tipo_flotante, 1.0)
         else:
             one = ir.Constant(self.tipo_entero, 1)
         
         # Calcular nuevo valor
         if n.op == '++':
-            new_val = self.constructor_ir.add(current_val, one, name="inc_val") if n.expr.type != 'float' else \
+            new_val = self.constructor_ir.add(current_val, one, name="inc_val") if n.expr.type is not float_type else \
                       self.constructor_ir.fadd(current_val, one, name="inc_val")
         else:  # '--'
-            new_val = self.constructor_ir.sub(current_val, one, name="dec_val") if n.expr.type != 'float' else \
+            new_val = self.constructor_ir.sub(current_val, one, name="dec_val") if n.expr.type is not float_type else \
                       self.constructor_ir.fsub(current_val, one, name="dec_val")
         
         # Guardar el nuevo valor
@@ -1037,6 +1053,11 @@ class IRGenerator(Visitor):
         '''
         func_name = n.name
         
+        # Builtins de arrays (el checker anota 'builtin' si no hay una
+        # función del programa con el mismo nombre)
+        if getattr(n, 'builtin', None) in self.array_builtins:
+            return self.array_builtins[n.builtin](n)
+        
         # Verificar si es una función built-in del runtime
         if func_name in self.builtin_functions:
             func = self.builtin_functions[func_name]
@@ -1128,6 +1149,176 @@ class IRGenerator(Visitor):
             return result
         
         # Función definida por el usuario
+        return self._call_user_function(n)
+
+    # =====================================================================
+    # Builtins de arrays
+    # =====================================================================
+
+    def _array_operand(self, node):
+        '''
+        Puntero al primer elemento y largo (i64) de un argumento array. Los
+        arrays globales tienen el largo en su tipo LLVM; los demás se crean
+        con array_new_* y el runtime guarda su largo.
+        '''
+        ptr = self.visit(node)
+        if isinstance(node, VarLocation) and node.name in self.global_variables:
+            storage = self.global_variables[node.name].type.pointee
+            if isinstance(storage, ir.ArrayType):
+                return ptr, ir.Constant(self.tipo_entero, storage.count)
+        if node.type.element is float_type:
+            length = self.constructor_ir.call(self._array_length_float, [ptr], name="array_len")
+        else:
+            length = self.constructor_ir.call(self._array_length_integer, [ptr], name="array_len")
+        return ptr, length
+
+    def _shorter(self, a, b):
+        '''
+        Menor de dos largos (dot y copy recorren hasta el largo del más corto).
+        '''
+        less = self.constructor_ir.icmp_signed('<', a, b, name="shorter")
+        return self.constructor_ir.select(less, a, b, name="len")
+
+    def _array_loop(self, name, length, body, initial=None, start=0):
+        '''
+        Genera un ciclo con i desde 'start' hasta 'length' - 1:
+
+            br cond
+        cond:
+            i = phi [start, entrada], [i + 1, cuerpo]
+            acc = phi [initial, entrada], [body(i, acc), cuerpo]
+            br i < length, body, end
+        body:
+            ...
+            br cond
+        end:
+
+        'body(i, acc)' genera el cuerpo y retorna el nuevo acumulado (se
+        ignora si 'initial' es None). Retorna el acumulado al salir.
+        '''
+        builder = self.constructor_ir
+        entry_block = builder.block
+        cond_block = self.funcion_actual.append_basic_block(f'{name}.cond')
+        body_block = self.funcion_actual.append_basic_block(f'{name}.body')
+        end_block = self.funcion_actual.append_basic_block(f'{name}.end')
+        builder.branch(cond_block)
+        
+        builder.position_at_end(cond_block)
+        index = builder.phi(self.tipo_entero, name=f'{name}.i')
+        index.add_incoming(ir.Constant(self.tipo_entero, start), entry_block)
+        acc = None
+        if initial is not None:
+            acc = builder.phi(initial.type, name=f'{name}.acc')
+            acc.add_incoming(initial, entry_block)
+        cond = builder.icmp_signed('<', index, length, name=f'{name}.cond')
+        builder.cbranch(cond, body_block, end_block)
+        
+        builder.position_at_end(body_block)
+        result = body(index, acc)
+        next_index = builder.add(index, ir.Constant(self.tipo_entero, 1), name=f'{name}.next')
+        index.add_incoming(next_index, builder.block)
+        if acc is not None:
+            acc.add_incoming(result, builder.block)
+        builder.branch(cond_block)
+        
+        builder.position_at_end(end_block)
+        return acc
+
+    def _element(self, ptr, index):
+        elem_ptr = self.constructor_ir.gep(ptr, [index], inbounds=True, name="elem_ptr")
+        return elem_ptr, self.constructor_ir.load(elem_ptr, name="elem_val")
+
+    def _zero(self, n: FuncCall):
+        if n.type is float_type:
+            return ir.Constant(self.tipo_flotante, 0.0)
+        return ir.Constant(self.tipo_entero, 0)
+
+    def _add(self, a, b):
+        if isinstance(a.type, ir.DoubleType):
+            return self.constructor_ir.fadd(a, b, name="addtmp")
+        return self.constructor_ir.add(a, b, name="addtmp")
+
+    def _mul(self, a, b):
+        if isinstance(a.type, ir.DoubleType):
+            return self.constructor_ir.fmul(a, b, name="multmp")
+        return self.constructor_ir.mul(a, b, name="multmp")
+
+    def _array_sum(self, n: FuncCall):
+        ptr, length = self._array_operand(n.args[0])
+        return self._array_loop('sum', length,
+                                lambda i, acc: self._add(acc, self._element(ptr, i)[1]),
+                                initial=self._zero(n))
+
+    def _array_dot(self, n: FuncCall):
+        a, len_a = self._array_operand(n.args[0])
+        b, len_b = self._array_operand(n.args[1])
+        def body(i, acc):
+            return self._add(acc, self._mul(self._element(a, i)[1], self._element(b, i)[1]))
+        return self._array_loop('dot', self._shorter(len_a, len_b), body, initial=self._zero(n))
+
+    def _array_fill(self, n: FuncCall):
+        ptr, length = self._array_operand(n.args[0])
+        value = self.visit(n.args[1])
+        def body(i, acc):
+            elem_ptr = self.constructor_ir.gep(ptr, [i], inbounds=True, name="elem_ptr")
+            self.constructor_ir.store(value, elem_ptr)
+        self._array_loop('fill', length, body)
+
+    def _array_copy(self, n: FuncCall):
+        dst, len_dst = self._array_operand(n.args[0])
+        src, len_src = self._array_operand(n.args[1])
+        def body(i, acc):
+            elem_ptr = self.constructor_ir.gep(dst, [i], inbounds=True, name="elem_ptr")
+            self.constructor_ir.store(self._element(src, i)[1], elem_ptr)
+        self._array_loop('copy', self._shorter(len_dst, len_src), body)
+
+    def _array_scale(self, n: FuncCall):
+        ptr, length = self._array_operand(n.args[0])
+        factor = self.visit(n.args[1])
+        def body(i, acc):
+            elem_ptr, value = self._element(ptr, i)
+            self.constructor_ir.store(self._mul(value, factor), elem_ptr)
+        self._array_loop('scale', length, body)
+
+    def _array_sort(self, n: FuncCall):
+        ptr, length = self._array_operand(n.args[0])
+        if n.args[0].type.element is float_type:
+            self.constructor_ir.call(self._array_sort_float, [ptr, length])
+        else:
+            self.constructor_ir.call(self._array_sort_integer, [ptr, length])
+
+    def _array_extreme(self, n: FuncCall, name, op):
+        '''
+        min_array/max_array: recorre desde el segundo elemento con el
+        primero como acumulado. Como en los subíndices, no se verifica el
+        largo: en un array vacío el resultado no está definido.
+        '''
+        ptr, length = self._array_operand(n.args[0])
+        first = self._element(ptr, ir.Constant(self.tipo_entero, 0))[1]
+        def body(i, acc):
+            value = self._element(ptr, i)[1]
+            if isinstance(value.type, ir.DoubleType):
+                better = self.constructor_ir.fcmp_ordered(op, value, acc, name="better")
+            else:
+                better = self.constructor_ir.icmp_signed(op, value, acc, name="better")
+            return self.constructor_ir.select(better, value, acc, name=name)
+        return self._array_loop(name, length, body, initial=first, start=1)
+
+    def _array_min(self, n: FuncCall):
+        return self._array_extreme(n, 'min_array', '<')
+
+    def _array_max(self, n: FuncCall):
+        return self._array_extreme(n, 'max_array', '>')
+
+    def _call_user_function(self, n: FuncCall, tail=False):
+        '''
+        Llamada a una función definida por el usuario. En posición de
+        cola ('return f(...)') se marca 'tail' para que LLVM la convierta
+        en un salto, o 'musttail' si f tiene la misma firma que la
+        función actual (p. ej. recursión directa). Solo se marca si no se
+        pasan punteros: un puntero podría apuntar a un alloca del llamador.
+        '''
+        func_name = n.name
         if func_name not in self.funciones_llvm:
             raise RuntimeError(f"Función '{func_name}' no encontrada")
         
@@ -1138,7 +1329,13 @@ class IRGenerator(Visitor):
         for arg in n.args:
             args_vals.append(self.visit(arg))
         
-        return self.constructor_ir.call(func, args_vals, name="calltmp")
+        marker = False
+        if tail and not any(isinstance(val.type, ir.PointerType) for val in args_vals):
+            if func.function_type == self.funcion_actual.function_type:
+                marker = 'musttail'
+            else:
+                marker = 'tail'
+        return self.constructor_ir.call(func, args_vals, name="calltmp", tail=marker)
 
 def generate_code(node):
     generator = IRGenerator()
@@ -10,6 +10,8 @@ from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 
+from arrays import array_types
+
 console = Console()
 
 class Debugger:
@@ -78,8 +80,8 @@ class Debugger:
         for name, value in interpreter_env.items():
             if not callable(value) and not name.startswith('_'):
                 value_str = str(value)
-                if isinstance(value, list):
-                    value_str = f"[{len(value)} elementos] {value[:5] if len(value) > 5 else value}"
+                if isinstance(value, array_types):
+                    value_str = f"[{len(value)} elementos] {list(value)[:5]}"
                 elif isinstance(value, str) and len(value_str) > 50:
                     value_str = value_str[:50] + "..."
                 table.add_row(name, type(value).__name__, value_str)
@@ -109,6 +111,8 @@ class Profiler:
         self.total_time = 0.0
         self.start_time = None
         self.call_stack: List[str] = []
+        # Funciones memorizadas (--memoize): nombre -> (aciertos, fallos)
+        self.memo_stats: Dict[str, tuple] = {}
         
     def start(self):
         """Inicia el perfilamiento"""
@@ -136,6 +140,11 @@ class Profiler:
             if self.call_stack and self.call_stack[-1] == func_name:
                 self.call_stack.pop()
     
+    def record_memo(self, func_name: str, hits: int, misses: int):
+        """Registra los aciertos y fallos del cache de una funcion memorizada"""
+        if self.enabled:
+            self.memo_stats[func_name] = (hits, misses)
+    
     def get_report(self) -> str:
         """Genera un reporte de perfilamiento"""
         if not self.enabled:
@@ -171,6 +180,19 @@ class Profiler:
         console.print("\n".join(report))
         console.print(table)
         
+        if self.memo_stats:
+            memo_table = Table(title="Memorizacion")
+            memo_table.add_column("Funcion", style="cyan")
+            memo_table.add_column("Aciertos", style="green")
+            memo_table.add_column("Fallos", style="yellow")
+            memo_table.add_column("Tasa de Aciertos", style="magenta")
+            for func_name in sorted(self.memo_stats):
+                hits, misses = self.memo_stats[func_name]
+                total = hits + misses
+                rate = hits / total if total > 0 else 0
+                memo_table.add_row(func_name, str(hits), str(misses), f"{rate:.1%}")
+            console.print(memo_table)
+        
         return ""
 
 
@@ -200,7 +222,7 @@ class RuntimeValidator:
         
         lineno = getattr(node, 'lineno', 0)
         
-        if not isinstance(array, list):
+        if not isinstance(array, array_types):
             error_info = {
                 'type': 'TipoInvalido',
                 'line': lineno,
@@ -0,0 +1,186 @@
+# embed.py
+'''
+Interfaz para usar el intérprete desde otro programa
+====================================================
+interpret_code() (bminor.py) lee, analiza, verifica y ejecuta un archivo
+cada vez, e imprime todo en la terminal. Para ejecutar muchas veces el
+mismo programa con entradas distintas (p. ej. en un servicio), el
+análisis se hace una sola vez:
+
+    program = compile_program(source)
+    result = program.run(stdin='5\n3\n', limits=Limits(timeout=1))
+    result.output        # lo que imprimió el programa
+    result.errors        # errores de ejecución [(línea, mensaje)]
+
+compile_program() hace el análisis léxico, sintáctico y semántico y la
+optimización del AST, y lanza CompileError si el programa tiene errores.
+CompiledProgram.run() crea un intérprete nuevo para cada ejecución y le
+indica que no vuelva a verificar el árbol; cada motor solo hace su propia
+traducción (closures, bytecode o Python, este último con caché).
+
+run() redirige sys.stdin y sys.stdout mientras se ejecuta, como
+contextlib.redirect_stdout, así que no deben ejecutarse dos programas a
+la vez en hilos del mismo proceso. Para muchas entradas, run_batch()
+reparte las ejecuciones entre procesos que heredan el árbol verificado.
+'''
+import contextlib
+import gc
+import io
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing      import Optional
+
+from errors    import ErrorCollector
+from parser    import parse
+from checker   import SemanticAnalyzer
+from optimizer import optimize
+from interp    import Context
+from output    import Output
+from bminor    import engines
+
+
+class CompileError(Exception):
+  '''
+  El programa tiene errores léxicos, sintácticos o semánticos; 'errors'
+  es el ErrorCollector y 'diagnostics' su lista de errors.Diagnostic.
+  '''
+  def __init__(self, errors):
+    self.errors = errors
+    self.diagnostics = diagnostics = errors.diagnostics
+    self.count = count = len(errors)
+    first = str(diagnostics[0]) if diagnostics else ''
+    super().__init__(f'{count} errores de compilación: {first}')
+
+
+@dataclass
+class RunResult:
+  '''
+  Resultado de CompiledProgram.run(). 'output' es None si la salida se
+  escribió en el stream dado en 'stdout'; 'diagnostics' es el texto de
+  los errores que el intérprete habría mostrado en la terminal.
+  '''
+  output      : Optional[str]
+  errors      : list = field(default_factory=list)
+  exceeded    : object = None
+  diagnostics : str = ''
+
+  @property
+  def ok(self):
+    return not self.errors
+
+  def as_dict(self):
+    return {
+      'ok':     self.ok,
+      'output': self.output,
+      'errors': [{'lineno': lineno, 'message': message} for lineno, message in self.errors],
+      'limit':  None if self.exceeded is None else self.exceeded.as_dict(),
+    }
+
+
+class CompiledProgram:
+  '''
+  Programa ya verificado y optimizado, listo para ejecutarse muchas veces.
+  '''
+  def __init__(self, program, engine='tree'):
+    if engine not in engines:
+      raise ValueError(f'Motor desconocido: {engine!r} (disponibles: {", ".join(sorted(engines))})')
+    self.program = program
+    self.engine = engine
+
+  def run(self, stdin=None, stdout=None, limits=None, memoize=False, paranoid=False,
+          output_buffer=None):
+    '''
+    Ejecuta el programa. 'stdin' es un str o un archivo con lo que leen
+    read_integer/read_float/read_string (None: sys.stdin); 'stdout' es
+    un objeto con write() donde se escribe lo que imprime el programa
+    (None: se captura en RunResult.output); 'limits' es un limits.Limits.
+    '''
+    if isinstance(stdin, str):
+      stdin = io.StringIO(stdin)
+    capture = io.StringIO() if stdout is None else None
+    output = Output(capture if stdout is None else stdout, buffer_size=output_buffer)
+    ctxt = Context()
+    interpreter = engines[self.engine](ctxt, paranoid=paranoid, memoize=memoize,
+                                       limits=limits, output=output)
+    diagnostics = io.StringIO()
+    saved_stdin = sys.stdin
+    try:
+      if stdin is not None:
+        sys.stdin = stdin
+      with contextlib.redirect_stdout(diagnostics):
+        interpreter.interpret(self.program, check=False)
+    finally:
+      sys.stdin = saved_stdin
+    return RunResult(
+      output      = None if capture is None else capture.getvalue(),
+      errors      = list(ctxt.errors),
+      exceeded    = None if interpreter.limits is None else interpreter.limits.exceeded,
+      diagnostics = diagnostics.getvalue(),
+    )
+
+  def run_batch(self, paths, jobs=1, **options):
+    '''
+    Ejecuta el programa una vez por cada archivo de 'paths', usando su
+    contenido como entrada, con 'jobs' procesos. Entrega en orden pares
+    (path, registro) donde el registro es RunResult.as_dict() más el
+    tiempo de ejecución; un error de Python en una ejecución (p. ej. una
+    recursión demasiado profunda) se reporta en ese registro y no detiene
+    el resto. 'options' son los argumentos de run() (limits, memoize...).
+    '''
+    paths = list(paths)
+    if jobs <= 1 or len(paths) <= 1:
+      _init_worker(self, options)
+      yield from zip(paths, map(_run_input, paths))
+      return
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    # Igual que el checker paralelo: congelar el heap evita que el GC de
+    # cada trabajador toque (y copie) las páginas del AST heredado
+    gc.freeze()
+    try:
+      with ProcessPoolExecutor(max_workers=jobs, mp_context=context,
+                               initializer=_init_worker,
+                               initargs=(self, options)) as pool:
+        chunk_size = max(1, len(paths) // (jobs * 8))
+        yield from zip(paths, pool.map(_run_input, paths, chunksize=chunk_size))
+    finally:
+      gc.unfreeze()
+
+
+_worker_state = None
+
+def _init_worker(program, options):
+  global _worker_state
+  _worker_state = (program, options)
+
+def _run_input(path):
+  program, options = _worker_state
+  start = time.perf_counter()
+  try:
+    with open(path, encoding='utf-8') as stdin:
+      record = program.run(stdin=stdin, **options).as_dict()
+  except Exception as err:
+    record = RunResult(None, [(0, f'{type(err).__name__}: {err}')]).as_dict()
+  record['time'] = round(time.perf_counter() - start, 6)
+  return record
+
+
+def compile_program(source, engine='tree', optimize_ast=True, jobs=1):
+  '''
+  Analiza y verifica 'source' (código B-Minor) una sola vez. Lanza
+  CompileError si hay errores.
+  '''
+  errors = ErrorCollector(source)
+  program = parse(source, errors)
+  if not errors:
+    SemanticAnalyzer.checker(program, jobs=jobs, errors=errors)
+  if errors:
+    raise CompileError(errors)
+  if optimize_ast:
+    program, _ = optimize(program, errors)
+    if errors:
+      raise CompileError(errors)
+  return CompiledProgram(program, engine)
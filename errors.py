@@ -8,26 +8,106 @@ centraliza las funciones básicas de gestión de errores.
 Permite reportar errores de manera consistente. Permite verificar
 si existen errores en el proceso de compilación.
 
-Puede extenderse en el futuro para ofrecer más funcionalidades.
+Los errores se acumulan en un ErrorCollector como diagnósticos
+estructurados (código, línea, columna, mensaje) en lugar de
+imprimirse uno por uno. El lexer, el parser y el checker reciben
+el colector que deben usar; al terminar una fase, el compilador
+muestra todos los diagnósticos de una sola vez con render().
+El colector guarda como máximo 'limit' diagnósticos, aunque
+cuenta todos, para que miles de errores no inunden la salida.
 
-Contador global que registra la cantidad de errores encontrados.
-El compilador utiliza este valor para determinar si debe abortar.
+Las funciones error(), errors_detected() y clear_errors() se
+conservan y operan sobre un colector por defecto del módulo.
 '''
-from rich import print
-
-_error_count = 0
-
-def error(error_message, line_number=None):
-	global _error_count
-	if line_number:
-		print(f'{line_number}: [red]{error_message}[/red]')
-	else:
-		print(f"[red]{error_message}[/red]")
-	_error_count += 1
-	
+from dataclasses import dataclass
+from typing      import Optional
+
+from rich        import print
+from rich.markup import escape
+
+# Códigos de diagnóstico según la fase que lo produce
+LEXICAL   = 'LEX'
+SYNTAX    = 'SYN'
+SEMANTIC  = 'SEM'
+
+@dataclass(frozen=True)
+class Diagnostic:
+	code    : str
+	lineno  : Optional[int]
+	column  : Optional[int]
+	message : str
+
+	def __str__(self):
+		if self.lineno and self.column:
+			return f'{self.lineno}:{self.column}: {self.message}'
+		if self.lineno:
+			return f'{self.lineno}: {self.message}'
+		return self.message
+
+
+class ErrorCollector:
+	'''
+	Acumula los diagnósticos de una compilación.
+	'''
+	def __init__(self, source=None, limit=100):
+		self.source = source
+		self.limit = limit
+		self.diagnostics = []
+		self.count = 0
+
+	def column_of(self, index):
+		'''
+		Convierte una posición absoluta en el código fuente (p. ej.
+		token.index) en un número de columna, empezando en 1.
+		'''
+		if self.source is None or index is None:
+			return None
+		return index - self.source.rfind('\n', 0, index)
+
+	def error(self, message, lineno=None, code=SEMANTIC, column=None, index=None):
+		self.count += 1
+		if len(self.diagnostics) < self.limit:
+			if column is None:
+				column = self.column_of(index)
+			self.diagnostics.append(Diagnostic(code, lineno, column, message))
+
+	def __len__(self):
+		return self.count
+
+	def __bool__(self):
+		return self.count > 0
+
+	def clear(self):
+		self.diagnostics = []
+		self.count = 0
+
+	def render(self):
+		'''
+		Muestra los diagnósticos acumulados en una sola escritura.
+		'''
+		if not self.count:
+			return
+		lines = []
+		for diagnostic in self.diagnostics:
+			if diagnostic.lineno:
+				position = f'{diagnostic.lineno}:{diagnostic.column}' if diagnostic.column else f'{diagnostic.lineno}'
+				lines.append(f'{position}: [red]{escape(diagnostic.message)}[/red]')
+			else:
+				lines.append(f'[red]{escape(diagnostic.message)}[/red]')
+		omitted = self.count - len(self.diagnostics)
+		if omitted > 0:
+			lines.append(f'[red]... y {omitted} errores más[/red]')
+		print('\n'.join(lines))
+
+
+# Colector por defecto para el código que no recibe uno explícito
+default_collector = ErrorCollector()
+
+def error(error_message, line_number=None, code=SEMANTIC):
+	default_collector.error(error_message, line_number, code)
+
 def errors_detected():
-	return _error_count
-	
+	return default_collector.count
+
 def clear_errors():
-	global _error_count
-	_error_count = 0
\ No newline at end of file
+	default_collector.clear()
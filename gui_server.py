@@ -18,6 +18,10 @@ CORS(app)  # Permitir CORS para desarrollo
 # Ruta base del proyecto
 BASE_DIR = Path(__file__).parent.resolve()
 
+# Limites del interprete (ver limits.py): igual que el ejecutable compilado,
+# un programa interpretado no puede correr mas de 10 segundos
+INTERP_LIMITS = ['--timeout', '10', '--max-array', '10000000']
+
 @app.route('/')
 def index():
     """Servir la aplicacion React"""
@@ -53,6 +57,7 @@ def run_command():
             cmd.append('--codegen')
         elif action == 'interp':
             cmd.append('--interp')
+            cmd.extend(INTERP_LIMITS)
         elif action == 'repl':
             cmd.append('--repl')
         else:
@@ -315,6 +320,7 @@ def run_with_content():
                 cmd.append('--codegen')
             elif action == 'interp':
                 cmd.append('--interp')
+                cmd.extend(INTERP_LIMITS)
             else:
                 return jsonify({'error': f'Accion desconocida: {action}'}), 400
             
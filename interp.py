@@ -4,12 +4,20 @@
 Tree-walking interpreter
 '''
 
-from collections import ChainMap
+import operator
+from collections import ChainMap, OrderedDict
 from rich import print
 
 from model import *
-from checker import SemanticAnalyzer
-from typesys import check_unaryop
+from checker import SemanticAnalyzer, load_builtins
+from typesys import (check_unaryop, integer_type, float_type, boolean_type,
+                     char_type, string_type, bin_operators, unary_operators,
+                     bin_op_ids, unary_op_ids, num_primitive_types)
+from arrays  import (new_array, new_ndarray, dimensions, subscript_chain, locate,
+                     array_types, store_message, values_message)
+from optimizer import pure_functions
+from output  import Output
+from snapshot import Snapshot
 
 # Importar sistemas de debugging y profiling
 try:
@@ -26,6 +34,7 @@ except ImportError:
         def end(self): pass
         def enter_function(self, *args): return None
         def exit_function(self, *args): pass
+        def record_memo(self, *args): pass
         def get_report(self): return ""
     class RuntimeValidator:
         def __init__(self, enabled=True): pass
@@ -38,22 +47,20 @@ except ImportError:
         def pop_context(self): pass
         def format_error(self, *args): return str(args[0])
 
-# Importar desde nuestro módulo builtins (usando importlib para evitar conflicto con builtins estándar)
-import importlib.util
-import os
-
-# Obtener la ruta del directorio actual
-current_dir = os.path.dirname(os.path.abspath(__file__))
-builtins_path = os.path.join(current_dir, "builtins.py")
-
-spec = importlib.util.spec_from_file_location("bminor_builtins", builtins_path)
-bminor_builtins = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(bminor_builtins)
+# Módulo builtins.py de B-Minor (ver checker.load_builtins)
+bminor_builtins = load_builtins()
 
 builtins = bminor_builtins.builtins
 consts = bminor_builtins.consts
 CallError = bminor_builtins.CallError
 
+def operand_message(op, side, type_name):
+  '''
+  Error de un operando no numérico de 'op' ('side' es 'izquierdo' o
+  'derecho'). pyexec lo usa para reportar igual los TypeError de Python.
+  '''
+  return f"Operando {side} en '{op}' debe ser numérico, se obtuvo {type_name}"
+
 # Veracidad en bminor
 
 def _is_truthy(value):
@@ -70,16 +77,73 @@ class ReturnException(Exception):
     self.value = value
 
 
-class BreakException(Exception):
-  pass
-
-
-class ContinueException(Exception):
+class BminorExit(BaseException):
   pass
 
 
-class BminorExit(BaseException):
-  pass
+# Señales de control de flujo. Las sentencias devuelven una señal en
+# lugar de lanzar una excepción; los bloques y ciclos la propagan o la
+# consumen. El valor de 'return' queda en Interpreter.return_value.
+class _Signal:
+  __slots__ = ('name',)
+
+  def __init__(self, name):
+    self.name = name
+
+  def __repr__(self):
+    return f'<{self.name}>'
+
+RETURN = _Signal('return')
+BREAK = _Signal('break')
+CONTINUE = _Signal('continue')
+
+
+# Operaciones sin validación, elegidas por el operador y los tipos que
+# anotó el checker. Son tablas densas con la forma de typesys.binop_table
+# y typesys.unary_table: _fast_binops[op_id][izq.index][der.index] y
+# _fast_unops[op_id][operando.index]. Si un operando no es el esperado
+# (p. ej. una variable sin inicializar) o se divide entre cero, la
+# función lanza TypeError/ZeroDivisionError y se recurre a
+# Interpreter._binop, que reporta el error.
+_fast_binops = [[[None] * num_primitive_types for _ in range(num_primitive_types)]
+                for _ in bin_operators]
+def _set_binop(left, op, right, func):
+  _fast_binops[bin_op_ids[op]][left.index][right.index] = func
+
+for _type in (integer_type, float_type):
+  for _op, _func in (('+', operator.add), ('-', operator.sub), ('*', operator.mul),
+                     ('%', operator.mod), ('^', operator.pow),
+                     ('<', operator.lt), ('<=', operator.le),
+                     ('>', operator.gt), ('>=', operator.ge)):
+    _set_binop(_type, _op, _type, _func)
+_set_binop(integer_type, '/', integer_type, operator.floordiv)
+_set_binop(float_type, '/', float_type, operator.truediv)
+_set_binop(string_type, '+', string_type, operator.add)
+for _type in (integer_type, float_type, boolean_type, char_type, string_type):
+  _set_binop(_type, '==', _type, operator.eq)
+  _set_binop(_type, '!=', _type, operator.ne)
+
+_fast_unops = [[None] * num_primitive_types for _ in unary_operators]
+_fast_unops[unary_op_ids['-']][integer_type.index] = operator.neg
+_fast_unops[unary_op_ids['-']][float_type.index] = operator.neg
+_fast_unops[unary_op_ids['!']][boolean_type.index] = operator.not_
+
+def _fast_op(table, node, *operands):
+  '''
+  Operación sin validación de 'table' para 'node', según el op_id y los
+  tipos de los operandos que anotó el checker, o None si no hay.
+  '''
+  op_id = getattr(node, 'op_id', None)
+  if op_id is None:
+    return None
+  row = table[op_id]
+  for operand in operands:
+    index = getattr(getattr(operand, 'type', None), 'index', None)
+    if index is None or index >= num_primitive_types:
+      # Sin anotar, o un array o una función
+      return None
+    row = row[index]
+  return row
 
 
 class AttributeError(Exception):
@@ -107,30 +171,113 @@ class Context:
     return getattr(node, 'name', str(node))
 
 
+class Memo:
+  '''
+  Función de usuario pura con una caché LRU acotada de sus resultados,
+  indexada por la tupla de argumentos (todos escalares). Envuelve a un
+  Function o a un closures.CompiledFunction.
+  '''
+  def __init__(self, function, size):
+    self.function = function
+    self.size = size
+    self.results = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+  @property
+  def arity(self) -> int:
+    return self.function.arity
+
+  def __call__(self, interp, *args):
+    results = self.results
+    if args in results:
+      self.hits += 1
+      results.move_to_end(args)
+      return results[args]
+    self.misses += 1
+    result = self.function(interp, *args)
+    results[args] = result
+    if len(results) > self.size:
+      results.popitem(last=False)
+    return result
+
+
+# Tipos cuyos valores sirven de clave de Memo y se pueden compartir
+_memo_types = (integer_type, float_type, boolean_type, char_type, string_type)
+
+def memoizable(node):
+  '''
+  True si los parámetros y el retorno de la función 'node' son escalares.
+  '''
+  return (getattr(node, 'sym_type', None) in _memo_types and
+          all(getattr(param, 'sym_type', None) in _memo_types for param in node.params))
+
+
 class Function:
+  '''
+  Función de usuario. Cada llamada crea un marco de tamaño fijo (una
+  lista indexada por los slots que asignó el checker) y lo instala en
+  el display del intérprete, en el nivel de anidamiento de la función.
+  Las llamadas en posición de cola no anidan otra llamada de Python:
+  ReturnStmt deja la función y los argumentos en interp.tail_call y
+  este ciclo la ejecuta al terminar el cuerpo actual.
+  '''
   def __init__(self, node, env):
     self.node = node
     self.env = env
+    self.level = node.slot[0] + 1 if node.slot else 1
+    self.frame_size = len(node.frame_names)
 
   @property
   def arity(self) -> int:
     return len(self.node.params)
 
   def __call__(self, interp, *args):
-    newenv = self.env.new_child()
-    for name, arg in zip(self.node.params, args):
-      newenv[name.name] = arg
-
-    oldenv = interp.env
-    interp.env = newenv
-    try:
-      self.node.body.accept(interp)
-      result = None
-    except ReturnException as e:
-      result = e.value
-    finally:
-      interp.env = oldenv
-    return result
+    display = interp.display
+    names = interp.display_names
+    limits = interp.limits
+    if limits is not None:
+      limits.enter(self.node)
+    func = self
+    while True:
+      frame = list(args)
+      frame.extend([None] * (func.frame_size - len(frame)))
+
+      level = func.level
+      if level < len(display):
+        saved = display[level], names[level]
+        display[level] = frame
+        names[level] = func.node.frame_names
+      else:
+        saved = None
+        display.append(frame)
+        names.append(func.node.frame_names)
+      try:
+        if func.node.body.accept(interp) is RETURN:
+          result = interp.return_value
+          interp.return_value = None
+        else:
+          result = None
+      except RecursionError as err:
+        # La llamada más interna registra dónde se agotó la pila
+        if not hasattr(err, 'node'):
+          err.node = func.node
+        raise
+      finally:
+        if saved is None:
+          display.pop()
+          names.pop()
+        else:
+          display[level], names[level] = saved
+      if interp.tail_call is None:
+        if limits is not None:
+          limits.leave()
+        return result
+      # 'return g(...)': g se ejecuta en este mismo marco de Python
+      func, args = interp.tail_call
+      interp.tail_call = None
+      if limits is not None:
+        limits.step(func.node)
 
   def bind(self, instance):
     env = self.env.new_child()
@@ -139,11 +286,40 @@ class Function:
 
 
 class Interpreter(Visitor):
-  def __init__(self, ctxt=None, debug=False, profile=False):
+  def __init__(self, ctxt=None, debug=False, profile=False, paranoid=False,
+               memoize=False, memo_size=4096, limits=None, output=None):
     self.ctxt = ctxt or Context()
+    # paranoid: validar los operandos de cada operación en tiempo de
+    # ejecución aunque el checker ya haya verificado sus tipos
+    self.paranoid = paranoid
+    # memoize: cachear los resultados de las funciones puras (ver
+    # optimizer.pure_functions); memos guarda el Memo de cada una
+    self.memoize = memoize
+    self.memo_size = memo_size
+    self.pure_functions = set()
+    self.memos = {}
+    # Llamada en posición de cola pendiente: (Function, argumentos).
+    # Con --debug/--profile se desactiva para no ocultar las llamadas
+    self.tail_calls = not (debug or profile)
+    self.tail_call = None
+    # Límites de ejecución (ver limits.py); None si no hay ninguno
+    self.limits = limits if limits else None
+    # Salida de 'print' (ver output.py). Con --debug sin buffer, para
+    # que se intercale con las trazas del debugger
+    self.output = output if output is not None else Output(buffer_size=0 if debug else None)
+    # Builtins por nombre; las llamadas anotadas por el checker
+    # (FuncCall.builtin) los invocan directamente
+    self.builtin_functions = {name: self._flushing(func) if name.startswith('read_') else func
+                              for name, func in builtins.items()}
     self.env = ChainMap()
     self.check_env = ChainMap()
     self.localmap = {}
+    # Display: un marco (lista de valores por slot) por nivel de
+    # anidamiento de funciones. El nivel 0 guarda las variables de los
+    # bloques de nivel superior; las globales se buscan por nombre en env.
+    self.display = [[]]
+    self.display_names = [[]]
+    self.return_value = None
     
     # Sistemas de debugging y profiling
     self.debugger = Debugger(enabled=debug)
@@ -153,18 +329,88 @@ class Interpreter(Visitor):
     
     if profile:
       self.profiler.start()
+    if debug or profile:
+      self._install_hooks()
+
+  # Instrumentación --------------------------------------------------
+  def _install_hooks(self):
+    '''
+    Reemplaza visit en esta instancia por un despachador que consulta
+    una tabla de manejadores instrumentados (debugger/profiler) antes
+    del multimétodo de la clase. Sin --debug ni --profile no se
+    instala nada, así que el camino normal no revisa ningún hook.
+    '''
+    hooks = {}
+    if self.debugger.enabled:
+      hooks[FuncDecl] = self._traced_declaration
+      hooks[Assignment] = self._traced_assignment
+      hooks[ArraySubscript] = self._traced_subscript
+    hooks[FuncCall] = self._traced_call
+    self._hooks = hooks
+    self._plain_visit = type(self).visit
+    self.visit = self._instrumented_visit
+
+  def _instrumented_visit(self, node, *args, **kwargs):
+    hook = self._hooks.get(type(node))
+    if hook is not None:
+      return hook(node)
+    return self._plain_visit(self, node, *args, **kwargs)
+
+  def _trace(self, node, kind, breakpoint=True):
+    if breakpoint:
+      self.debugger.check_breakpoint(node.lineno, self.variables())
+    self.debugger.trace_execution(node.lineno, kind, self.variables())
+
+  def _traced_declaration(self, node):
+    result = self._plain_visit(self, node)
+    self._trace(node, 'FuncDecl', breakpoint=False)
+    return result
+
+  def _traced_assignment(self, node):
+    self._trace(node, 'Assignment')
+    return self._plain_visit(self, node)
 
-  def _validate_numeric_operands(self, node, left, right=None):
+  def _traced_subscript(self, node):
+    result = self._plain_visit(self, node)
+    self._trace(node, 'ArraySubscript')
+    return result
+
+  def _traced_call(self, node):
+    callee, args = self._call_arguments(node)
+    # Profiling: solo las funciones de usuario (con 'arity')
+    profiled = self.profiler.enabled and hasattr(callee, 'arity')
+    if profiled:
+      start = self.profiler.enter_function(node.name)
+      self.error_handler.push_context(node.name, node.lineno)
+    if self.debugger.enabled:
+      self._trace(node, 'FuncCall')
+    try:
+      return self._invoke(node, callee, args)
+    finally:
+      if profiled:
+        self.profiler.exit_function(node.name, start)
+        self.error_handler.pop_context()
+
+  def _validate_numeric_operands(self, node, left, *right):
     """Valida que los operandos sean numéricos (int o float)."""
     if not isinstance(left, (int, float)):
-      self.error(node, f"Operando izquierdo en '{node.op}' debe ser numérico, se obtuvo {type(left).__name__}")
+      self.error(node, operand_message(node.op, 'izquierdo', type(left).__name__))
     
-    if right is not None and not isinstance(right, (int, float)):
-      self.error(node, f"Operando derecho en '{node.op}' debe ser numérico, se obtuvo {type(right).__name__}")
+    # Operador binario: el derecho también (None es una variable sin inicializar)
+    if right and not isinstance(right[0], (int, float)):
+      self.error(node, operand_message(node.op, 'derecho', type(right[0]).__name__))
     return True
 
   def _handle_inc_dec(self, node, delta, return_original=False):
     """Maneja la lógica común para incremento y decremento (++ y --)."""
+    if subscript_chain(node.expr):
+      # a[i][j]++: se resuelve la posición una sola vez
+      container, index = self._element(node.expr)
+      value = container[index]
+      self._validate_numeric_operands(node, value)
+      self._store_element(node, container, index, value + delta)
+      return value if return_original else value + delta
+
     value = node.expr.accept(self)
     self._validate_numeric_operands(node, value)
     
@@ -172,26 +418,26 @@ class Interpreter(Visitor):
     
     # Asignar el nuevo valor
     if isinstance(node.expr, VarLocation):
-      self.env[node.expr.name] = new_value
+      self._store(node.expr, new_value)
     elif isinstance(node.expr, ArraySubscript):
       # Obtener el array del entorno
       if isinstance(node.expr.location, VarLocation):
         arr_name = node.expr.location.name
-        arr = self.env[arr_name]
+        arr = self._load(node.expr.location, f"Array '{arr_name}' no definido")
         idx = node.expr.index.accept(self)
         
         # Validaciones extra para arrays
-        if not isinstance(arr, list):
+        if not isinstance(arr, array_types):
            self.error(node, f"'{arr_name}' no es un array")
         if not isinstance(idx, int):
            self.error(node, f"El índice debe ser un entero")
         if idx < 0 or idx >= len(arr):
            self.error(node, f"Índice fuera de rango: {idx}")
            
-        arr[idx] = new_value
-        # No es estrictamente necesario reasignar arr a self.env si es mutable (lista),
-        # pero es más seguro si la implementación cambia.
-        self.env[arr_name] = arr
+        try:
+          arr[idx] = new_value
+        except (OverflowError, TypeError):
+          self.error(node, store_message(new_value))
       else:
         self.error(node, "Solo se soportan incrementos/decrementos en variables o arrays simples")
     else:
@@ -199,31 +445,117 @@ class Interpreter(Visitor):
       
     return value if return_original else new_value
 
+  def _load(self, node, message):
+    '''
+    Valor de la variable referida por un VarLocation o FuncCall.
+    '''
+    slot = node.slot
+    if slot is not None:
+      return self.display[slot[0]][slot[1]]
+    try:
+      return self.env[node.name]
+    except KeyError:
+      self.error(node, message)
+
+  def _store(self, node, value):
+    '''
+    Asigna una variable ya declarada (node es el VarLocation).
+    '''
+    slot = node.slot
+    if slot is not None:
+      self.display[slot[0]][slot[1]] = value
+    else:
+      self._assign(node.name, value)
+
+  def _declare(self, node, value):
+    '''
+    Crea la variable de una declaración en su slot (o en el entorno
+    global si no tiene).
+    '''
+    slot = node.slot
+    if slot is None:
+      self.env[node.name] = value
+      return
+    frame = self.display[slot[0]]
+    if slot[1] >= len(frame):
+      # El marco global crece a medida que se declaran variables (REPL)
+      frame.extend([None] * (slot[1] + 1 - len(frame)))
+    frame[slot[1]] = value
+
+  def variables(self):
+    '''
+    Variables visibles (para el debugger): las globales del entorno
+    más las de los marcos del display.
+    '''
+    scope = dict(self.env)
+    for names, frame in zip(self.display_names, self.display):
+      scope.update(zip(names, frame))
+    return scope
+
+  def snapshot(self):
+    '''
+    Snapshot de las variables globales (ver snapshot.py), para tomarlo
+    entre sentencias de nivel superior o al terminar. Las funciones y
+    los builtins no se guardan.
+    '''
+    values = {name: value for name, value in self.env.items()
+              if name not in builtins and name not in consts and not callable(value)}
+    return Snapshot(globals=values)
+
+  def restore(self, snapshot):
+    '''
+    Asigna a las globales los valores de 'snapshot'. Las funciones
+    deben estar ya declaradas.
+    '''
+    for name, value in snapshot.globals.items():
+      self._assign(name, value)
+
+  def _assign(self, var_name, value):
+    # ChainMap busca automáticamente en los padres, pero para actualizar
+    # necesitamos actualizar el mapa más cercano donde existe la variable
+    # o crear la variable en el mapa actual si no existe
+    for m in self.env.maps:
+      if var_name in m:
+        m[var_name] = value
+        return
+    self.env.maps[0][var_name] = value
+
   def error(self, position, message):
     """Manejo mejorado de errores con stack trace"""
     error_msg = self.error_handler.format_error(
       Exception(message), 
       position
     )
+    # Lo que el programa ya imprimió va antes del error
+    self.output.flush()
     self.ctxt.error(position, message)
     print(error_msg)
     raise BminorExit()
 
   # Punto de entrada alto-nivel
-  def interpret(self, node):
+  def interpret(self, node, check=True):
+    '''
+    Ejecuta el programa 'node'. Con check=False no se vuelve a verificar:
+    el árbol ya debe tener las anotaciones del checker (ver embed.py).
+    '''
     for name, cval in consts.items():
       self.check_env[name] = cval
       self.env[name] = cval
 
-    for name, func in builtins.items():
+    for name, func in self.builtin_functions.items():
       self.check_env[name] = func
       self.env[name] = func
 
+    if self.limits is not None:
+      self.limits.start(self)
     try:
-      SemanticAnalyzer.checker(node)
+      if check:
+        SemanticAnalyzer.checker(node)
       if not self.ctxt.have_errors:
+        if self.memoize:
+          self.pure_functions = pure_functions(node)
         # Ejecutar todas las declaraciones
-        node.accept(self)
+        self.execute(node)
         # Buscar y ejecutar main si existe
         if 'main' in self.env:
           main_func = self.env['main']
@@ -244,27 +576,76 @@ class Interpreter(Visitor):
         # Finalizar profiling
         if self.profiler.enabled:
           self.profiler.end()
+          for name, memo in self.memos.items():
+            self.profiler.record_memo(name, memo.hits, memo.misses)
+          self.output.flush()
           self.profiler.get_report()
     except BminorExit as e:
       if self.profiler.enabled:
         self.profiler.end()
       pass
+    except RecursionError as err:
+      # Ya fuera de la pila agotada: se reporta como error de B-Minor
+      try:
+        depth = self.limits.depth if self.limits is not None else None
+        self.recursion_error(getattr(err, 'node', node), depth)
+      except BminorExit:
+        pass
+    finally:
+      self.output.flush()
+
+  def recursion_error(self, position, depth):
+    '''
+    Reporta que la pila de Python se agotó (RecursionError) a 'depth'
+    llamadas anidadas, antes que la profundidad máxima del motor. Con
+    limits.max_depth es ese límite, superado a la profundidad alcanzada;
+    si no, un error de ejecución.
+    '''
+    limits = self.limits
+    if limits is not None and limits.max_depth is not None:
+      limits.fail('depth', position, min(depth, limits.max_depth))
+    else:
+      self.error(position, "Recursión demasiado profunda")
+
+  def _flushing(self, read):
+    '''
+    Builtin de lectura que primero vacía la salida, para que un mensaje
+    impreso antes de leer se vea antes de esperar la entrada.
+    '''
+    output = self.output
+    def read_builtin(*args):
+      output.flush()
+      return read(*args)
+    return read_builtin
+
+  def execute(self, node):
+    '''
+    Ejecuta las declaraciones del programa en el entorno global.
+    Otros motores de ejecución (ver closures.py) la redefinen.
+    '''
+    node.accept(self)
 
   # Declarations
   def visit(self, node: FuncDecl):
-    func = Function(node, self.env)
-    self.env[node.name] = func
-    
-    # Debugging
-    if self.debugger.enabled:
-      self.debugger.trace_execution(node.lineno, 'FuncDecl', self.env)
+    func = self._memoized(node, Function(node, self.env))
+    self._declare(node, func)
+
+  def _memoized(self, node, func):
+    '''
+    Envuelve 'func' en un Memo si es una función global pura y
+    memorizable (--memoize); si no, la retorna tal cual.
+    '''
+    if node.slot is not None or node.name not in self.pure_functions or not memoizable(node):
+      return func
+    memo = self.memos[node.name] = Memo(func, self.memo_size)
+    return memo
 
   def visit(self, node: VarDecl):
     if node.value:
       expr = node.value.accept(self)
     else:
       expr = None
-    self.env[node.name] = expr
+    self._declare(node, expr)
 
   def visit(self, node: ArrayDecl):
     # Evaluar el tamaño del array si existe
@@ -282,117 +663,145 @@ class Interpreter(Visitor):
         self.error(node, f"El tamaño del array debe ser un entero, se obtuvo {type(array_size).__name__}")
         array_size = 0
     
-    # Si hay valores iniciales, usarlos
-    if node.value:
-      values = [val.accept(self) for val in node.value]
-      # Asegurar que el array tenga el tamaño correcto
-      if len(values) < array_size:
-        # Rellenar con valores por defecto
-        default_value = 0
-        if node.type.element_type.name == 'float':
-          default_value = 0.0
-        elif node.type.element_type.name == 'boolean':
-          default_value = False
-        values.extend([default_value] * (array_size - len(values)))
-      elif len(values) > array_size:
-        # Truncar si hay más valores que tamaño
-        values = values[:array_size]
-    else:
-      # Crear array del tamaño especificado con valores por defecto
-      default_value = 0
-      if node.type.element_type.name == 'float':
-        default_value = 0.0
-      elif node.type.element_type.name == 'boolean':
-        default_value = False
-      values = [default_value] * array_size
+    # Dimensiones internas de un array multidimensional
+    shape = [array_size]
+    for size_expr in dimensions(node.type):
+      size = size_expr.accept(self)
+      if not isinstance(size, int):
+        self.error(node, f"El tamaño del array debe ser un entero, se obtuvo {type(size).__name__}")
+      shape.append(size)
+
+    if self.limits is not None:
+      self.limits.allocate(node, shape)
+    values = [val.accept(self) for val in node.value] if node.value else None
+    # integer/float/boolean/char se guardan en un buffer tipado (ver arrays.py)
+    try:
+      if len(shape) > 1:
+        values = new_ndarray(node.sym_type.element, shape, values)
+      else:
+        values = new_array(node.sym_type.element, array_size, values)
+    except (OverflowError, TypeError):
+      self.error(node, values_message(values))
     
-    self.env[node.name] = values
+    self._declare(node, values)
 
   def visit(self, node: Program):
+    self.display_names[0] = node.frame_names
     for stmt in node.body:
       stmt.accept(self)
 
   def visit(self, node: BlockStmt):
-    # Crear un nuevo entorno hijo que hereda del actual
-    newenv = self.env.new_child()
-    oldenv = self.env
-    self.env = newenv
-    try:
-      for stmt in node.statements:
-        stmt.accept(self)
-    finally:
-      # Restaurar el entorno anterior
-      # Las variables del bloque se mantienen en newenv que es hijo de oldenv
-      self.env = oldenv
+    # Las variables del bloque ya tienen su slot en el marco actual:
+    # no hace falta crear un entorno por bloque
+    for stmt in node.statements:
+      signal = stmt.accept(self)
+      if type(signal) is _Signal:
+        return signal
 
   # Statements
   def visit(self, node: PrintStmt):
-    output_parts = []
-    for expr in node.values:
-      value = expr.accept(self)
-      if isinstance(value, str):
-        value = value.replace('\\n', '\n')
-        value = value.replace('\\t', '\t')
-      output_parts.append(str(value))
-    
-    # Imprimir todos los valores juntos en una sola línea
-    output = ''.join(output_parts)
-    # Si el último carácter es \n, no agregar otro salto de línea
-    if output.endswith('\n'):
-      print(output, end='')
-    else:
-      print(output)
+    # Todos los valores juntos en una sola línea (ver output.render)
+    self.output.emit([expr.accept(self) for expr in node.values])
 
   def visit(self, node: WhileStmt):
+    limits = self.limits
     while _is_truthy(node.condition.accept(self)):
-      try:
-        node.body.accept(self)
-      except BreakException:
-        break
-      except ContinueException:
-        continue
+      if limits is not None:
+        limits.step(node)
+      signal = node.body.accept(self)
+      if type(signal) is _Signal:
+        if signal is BREAK:
+          break
+        if signal is RETURN:
+          return signal
 
   def visit(self, node: DoWhileStmt):
+    limits = self.limits
     while True:
-      try:
-        node.body.accept(self)
-      except BreakException:
-        break
-      except ContinueException:
-        pass
+      if limits is not None:
+        limits.step(node)
+      signal = node.body.accept(self)
+      if type(signal) is _Signal:
+        if signal is BREAK:
+          break
+        if signal is RETURN:
+          return signal
       if not _is_truthy(node.condition.accept(self)):
         break
 
   def visit(self, node: ForStmt):
     if node.init:
       node.init.accept(self)
+    limits = self.limits
     while _is_truthy(node.condition.accept(self)):
-      try:
-        node.body.accept(self)
-      except BreakException:
-        break
-      except ContinueException:
-        pass
+      if limits is not None:
+        limits.step(node)
+      signal = node.body.accept(self)
+      if type(signal) is _Signal:
+        if signal is BREAK:
+          break
+        if signal is RETURN:
+          return signal
       if node.update:
         node.update.accept(self)
 
   def visit(self, node: IfStmt):
+    # Se devuelve la señal de la rama ejecutada (si la hay)
     expr = node.condition.accept(self)
     if _is_truthy(expr):
-      node.true_body.accept(self)
+      return node.true_body.accept(self)
     elif node.false_body:
-      node.false_body.accept(self)
+      return node.false_body.accept(self)
 
   def visit(self, node: ReturnStmt):
+    if node.tail_call and self.tail_calls:
+      callee, args = self._call_arguments(node.value)
+      if type(callee) is Function and len(args) == callee.arity:
+        self.tail_call = (callee, args)
+        self.return_value = None
+      else:
+        self.return_value = self._invoke(node.value, callee, args)
+      return RETURN
     # Ojo: node.value es opcional
-    value = None if not node.value else node.value.accept(self)
-    raise ReturnException(value)
+    self.return_value = None if not node.value else node.value.accept(self)
+    return RETURN
 
   # Expressions
   def visit(self, node: BinOper):
     left = node.left.accept(self)
+
+    # Evaluación cortocircuitada: el operando derecho solo se evalúa
+    # si hace falta (y una única vez)
+    if node.op == '||':
+      if _is_truthy(left):
+        return left
+      return node.right.accept(self)
+
+    elif node.op == '&&':
+      if not _is_truthy(left):
+        return left
+      return node.right.accept(self)
+
     right = node.right.accept(self)
+    if self.paranoid:
+      return self._binop(node, left, right)
+
+    # La operación se elige una sola vez por nodo (None si no hay)
+    fast = getattr(node, 'fast_op', False)
+    if fast is False:
+      fast = node.fast_op = _fast_op(_fast_binops, node, node.left, node.right)
+    if fast is not None:
+      try:
+        return fast(left, right)
+      except (TypeError, ZeroDivisionError):
+        pass
+    return self._binop(node, left, right)
 
+  def _binop(self, node, left, right):
+    '''
+    Aplica un operador binario (no cortocircuitado) a operandos ya
+    evaluados, validándolos en tiempo de ejecución.
+    '''
     if node.op == '+':
       if isinstance(left, str) and isinstance(right, str):
         return left + right
@@ -423,6 +832,9 @@ class Interpreter(Visitor):
 
     elif node.op == '^':
       self._validate_numeric_operands(node, left, right)
+      if right < 0:
+        # 0 ^ n con n negativo divide entre cero
+        self.validator.validate_division_by_zero(node, left)
       return left ** right
 
     elif node.op == '==':
@@ -447,25 +859,26 @@ class Interpreter(Visitor):
       self._validate_numeric_operands(node, left, right)
       return left >= right
 
-    elif node.op == '||':
-      # Evaluación cortocircuitada: si left es verdadero, retorna left, sino evalúa right
-      if _is_truthy(left):
-        return left
-      return node.right.accept(self)
-
-    elif node.op == '&&':
-      # Evaluación cortocircuitada: si left es falso, retorna left, sino evalúa right
-      if not _is_truthy(left):
-        return left
-      return node.right.accept(self)
-
     else:
       raise NotImplementedError(f"Mal operador {node.op}")
 
 
   def visit(self, node: UnaryOper):
-    expr_value = node.expr.accept(self)
-    
+    value = node.expr.accept(self)
+    if self.paranoid:
+      return self._unaryop(node, value)
+
+    fast = getattr(node, 'fast_op', False)
+    if fast is False:
+      fast = node.fast_op = _fast_op(_fast_unops, node, node.expr)
+    if fast is not None:
+      try:
+        return fast(value)
+      except TypeError:
+        pass
+    return self._unaryop(node, value)
+
+  def _unaryop(self, node, expr_value):
     if node.op == '-':
       self._validate_numeric_operands(node, expr_value)
       return -expr_value
@@ -494,27 +907,11 @@ class Interpreter(Visitor):
     return self._handle_inc_dec(node, -1, return_original=True)
 
   def visit(self, node: Assignment):
-    # Debugging
-    if self.debugger.enabled:
-      self.debugger.check_breakpoint(node.lineno, self.env)
-      self.debugger.trace_execution(node.lineno, 'Assignment', self.env)
     value = node.value.accept(self)
     
     # Asignar a variable
     if isinstance(node.location, VarLocation):
-      var_name = node.location.name
-      # ChainMap busca automáticamente en los padres, pero para actualizar
-      # necesitamos actualizar el mapa más cercano donde existe la variable
-      # o crear la variable en el mapa actual si no existe
-      if var_name in self.env:
-        # Actualizar en el mapa más cercano donde existe
-        for m in self.env.maps:
-          if var_name in m:
-            m[var_name] = value
-            break
-      else:
-        # Crear en el mapa actual (el primero de la cadena)
-        self.env.maps[0][var_name] = value
+      self._store(node.location, value)
       return value
     
     # Asignar a elemento de array
@@ -522,87 +919,94 @@ class Interpreter(Visitor):
       # Obtener el array del entorno
       if isinstance(node.location.location, VarLocation):
         arr_name = node.location.location.name
-        arr = self.env[arr_name]
+        arr = self._load(node.location.location, f"Array '{arr_name}' no definido")
         idx = node.location.index.accept(self)
-        if not isinstance(arr, list):
+        if not isinstance(arr, array_types):
           self.error(node, f"'{arr_name}' no es un array")
         if not isinstance(idx, int):
           self.error(node, f"El índice debe ser un entero")
         if idx < 0 or idx >= len(arr):
           self.error(node, f"Índice fuera de rango: {idx}")
-        arr[idx] = value
-        self.env[arr_name] = arr
+        try:
+          arr[idx] = value
+        except (OverflowError, TypeError):
+          self.error(node, store_message(value))
         return value
       else:
-        self.error(node, f"Asignación a array anidado no soportada")
+        container, index = self._element(node.location)
+        self._store_element(node, container, index, value)
+        return value
     
     else:
       raise NotImplementedError(f"Tipo de asignación no soportado: {type(node.location)}")
 
   def visit(self, node: FuncCall):
-    # Buscar la funcion en el entorno
-    if node.name not in self.env:
-      self.error(node, f"Funcion '{node.name}' no definida")
-    
-    callee = self.env[node.name]
-    
+    if node.builtin is not None:
+      # Builtin resuelto por el checker: argumentos ya verificados
+      args = [arg.accept(self) for arg in node.args]
+      try:
+        return self.builtin_functions[node.builtin](*args)
+      except CallError as err:
+        self.error(node, str(err))
+    callee, args = self._call_arguments(node)
+    return self._invoke(node, callee, args)
+
+  def _call_arguments(self, node):
+    '''
+    Busca la función (en su slot o en el entorno) y evalúa los argumentos.
+    '''
+    callee = self._load(node, f"Funcion '{node.name}' no definida")
     if not callable(callee):
       self.error(node, f'{node.name!r} no es invocable')
+    return callee, [arg.accept(self) for arg in node.args]
 
-    args = [arg.accept(self) for arg in node.args]
-
-    if hasattr(callee, 'arity') and callee.arity != -1 and len(args) != callee.arity:
-      self.error(node, f"Esperado {callee.arity} argumentos, se recibieron {len(args)}")
-
-    # Profiling: registrar llamada a funcion
-    func_start_time = None
-    if self.profiler.enabled and hasattr(callee, 'arity'):
-      func_start_time = self.profiler.enter_function(node.name)
-      self.error_handler.push_context(node.name, node.lineno)
-    
-    # Debugging
-    if self.debugger.enabled:
-      self.debugger.check_breakpoint(node.lineno, self.env)
-      self.debugger.trace_execution(node.lineno, 'FuncCall', self.env)
-
+  def _invoke(self, node, callee, args):
+    # Las funciones de usuario (y algunos builtins) reciben el intérprete
+    arity = getattr(callee, 'arity', None)
     try:
-      if hasattr(callee, '__call__') and hasattr(callee, 'arity'):
-        result = callee(self, *args)
-      else:
-        result = callee(*args)
-      
-      # Profiling: registrar salida
-      if self.profiler.enabled and hasattr(callee, 'arity'):
-        self.profiler.exit_function(node.name, func_start_time)
-        self.error_handler.pop_context()
-      
-      return result
+      if arity is None:
+        return callee(*args)
+      if arity != -1 and len(args) != arity:
+        self.error(node, f"Esperado {arity} argumentos, se recibieron {len(args)}")
+      return callee(self, *args)
     except CallError as err:
-      if self.profiler.enabled:
-        self.error_handler.pop_context()
       self.error(node, str(err))
-    except Exception as e:
-      if self.profiler.enabled:
-        self.profiler.exit_function(node.name, func_start_time)
-        self.error_handler.pop_context()
-      raise
 
   def visit(self, node: VarLocation):
-    # Buscar la variable en el entorno de forma segura
+    slot = node.slot
+    if slot is not None:
+      return self.display[slot[0]][slot[1]]
+    # Variable global: buscar por nombre
     try:
-      # Intentar obtener el valor directamente
       return self.env[node.name]
     except KeyError:
       self.error(node, f"Variable '{node.name}' no definida")
       return None
 
+  def _element(self, node):
+    '''
+    Resuelve 'a[i][j]...' a (contenedor, índice); en un array
+    multidimensional es el buffer y la posición del elemento.
+    '''
+    base, levels = subscript_chain(node)
+    arr = self._load(base, f"Array '{base.name}' no definido")
+    indices = [level.index.accept(self) for level in levels]
+    return locate(levels, arr, indices, self.validator.validate_array_index)
+
+  def _store_element(self, node, container, index, value):
+    try:
+      container[index] = value
+    except (OverflowError, TypeError):
+      self.error(node, store_message(value))
+
   def visit(self, node: ArraySubscript):
+    if isinstance(node.location, ArraySubscript):
+      container, index = self._element(node)
+      return container[index]
+
     # Obtener el array del entorno
     if isinstance(node.location, VarLocation):
-      arr_name = node.location.name
-      if arr_name not in self.env:
-        self.error(node, f"Array '{arr_name}' no definido")
-      arr = self.env[arr_name]
+      arr = self._load(node.location, f"Array '{node.location.name}' no definido")
     else:
       arr = node.location.accept(self)
     
@@ -610,12 +1014,6 @@ class Interpreter(Visitor):
     
     # Validacion en tiempo de ejecucion
     self.validator.validate_array_index(node, arr, idx)
-    
-    # Debugging
-    if self.debugger.enabled:
-      self.debugger.check_breakpoint(node.lineno, self.env)
-      self.debugger.trace_execution(node.lineno, 'ArraySubscript', self.env)
-    
     return arr[idx]
 
   # Literales
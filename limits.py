@@ -0,0 +1,143 @@
+# limits.py
+'''
+Límites de ejecución de los motores
+===================================
+Un programa B-Minor puede ejecutarse con un presupuesto de pasos, una
+profundidad máxima de llamadas, un tamaño máximo de array y un tiempo
+máximo de ejecución, de modo que un ciclo infinito o una recursión
+descontrolada terminan con un error en vez de ocupar el proceso.
+
+Un paso es una iteración de un ciclo o una llamada a una función del
+usuario: los motores llaman a step() en cada salto hacia atrás de un
+ciclo y a enter()/leave() en cada llamada. step() solo decrementa un
+contador; el total de pasos y el reloj se revisan cada CHECK_INTERVAL
+pasos. Sin límites (Interpreter.limits es None) los motores no hacen
+ninguna de estas llamadas.
+
+Al superar un límite se guarda un LimitExceeded en Limits.exceeded y se
+reporta como error de ejecución en la línea del nodo.
+'''
+import time
+
+
+class LimitExceeded:
+  '''
+  Límite superado: 'kind' es 'steps', 'depth', 'array' o 'timeout';
+  'limit' es el valor configurado y 'lineno' la línea donde se detectó.
+  '''
+  __slots__ = ('kind', 'limit', 'lineno')
+
+  messages = {
+    'steps':   'Se superó el límite de {limit} pasos de ejecución',
+    'depth':   'Se superó la profundidad máxima de {limit} llamadas anidadas',
+    'array':   'Se superó el tamaño máximo de {limit} elementos por array',
+    'timeout': 'Se superó el tiempo máximo de ejecución ({limit} s)',
+  }
+
+  def __init__(self, kind, limit, lineno):
+    self.kind = kind
+    self.limit = limit
+    self.lineno = lineno
+
+  @property
+  def message(self):
+    return self.messages[self.kind].format(limit=self.limit)
+
+  def as_dict(self):
+    return {'kind': self.kind, 'limit': self.limit, 'lineno': self.lineno,
+            'message': self.message}
+
+  def __repr__(self):
+    return f'LimitExceeded({self.kind!r}, {self.limit!r}, lineno={self.lineno})'
+
+
+class Limits:
+  '''
+  Presupuestos de una ejecución. Un valor None desactiva ese límite.
+  '''
+  CHECK_INTERVAL = 1024
+
+  def __init__(self, max_steps=None, max_depth=None, max_array=None, timeout=None):
+    self.max_steps = max_steps
+    self.max_depth = max_depth
+    self.max_array = max_array
+    self.timeout = timeout
+    self.interp = None
+    self.start()
+
+  def __bool__(self):
+    return any(limit is not None for limit in
+               (self.max_steps, self.max_depth, self.max_array, self.timeout))
+
+  def start(self, interp=None):
+    '''
+    Reinicia los contadores al comenzar una ejecución de 'interp'.
+    '''
+    if interp is not None:
+      self.interp = interp
+    self.steps = 0
+    self.depth = 0
+    self.exceeded = None
+    self.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+    self.countdown = self._interval()
+
+  @property
+  def used_steps(self):
+    '''
+    Pasos ejecutados hasta ahora (incluido el intervalo en curso).
+    '''
+    return self.steps + self._interval() - self.countdown
+
+  def _interval(self):
+    if self.max_steps is None:
+      return self.CHECK_INTERVAL
+    return max(1, min(self.CHECK_INTERVAL, self.max_steps - self.steps))
+
+  def fail(self, kind, node, limit=None):
+    '''
+    Registra y reporta el límite 'kind'. 'limit' reemplaza al valor
+    configurado cuando el límite efectivo fue menor (p. ej. la pila de
+    Python se agotó antes de llegar a max_depth).
+    '''
+    if limit is None:
+      limit = {'steps': self.max_steps, 'depth': self.max_depth,
+               'array': self.max_array, 'timeout': self.timeout}[kind]
+    self.exceeded = LimitExceeded(kind, limit, getattr(node, 'lineno', 0) or 0)
+    self.interp.error(node, self.exceeded.message)
+
+  # Ganchos de los motores --------------------------------------------
+  def step(self, node):
+    self.countdown -= 1
+    if self.countdown <= 0:
+      self._check(node)
+
+  def _check(self, node):
+    # Se contabilizan los pasos del intervalo que acaba de terminar
+    self.steps += self._interval() - self.countdown
+    if self.max_steps is not None and self.steps > self.max_steps:
+      self.fail('steps', node)
+    if self.deadline is not None and time.monotonic() > self.deadline:
+      self.fail('timeout', node)
+    self.countdown = self._interval()
+
+  def enter(self, node):
+    self.depth += 1
+    if self.max_depth is not None and self.depth > self.max_depth:
+      self.depth -= 1
+      self.fail('depth', node)
+    self.step(node)
+
+  def leave(self):
+    self.depth -= 1
+
+  def allocate(self, node, shape):
+    '''
+    Verifica el tamaño de un array con dimensiones 'shape' antes de crearlo.
+    '''
+    if self.max_array is None:
+      return
+    total = 1
+    for dim in shape:
+      total *= max(dim, 0) if type(dim) is int else 0
+    if total > self.max_array:
+      self.fail('array', node)
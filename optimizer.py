@@ -0,0 +1,539 @@
+# optimizer.py
+'''
+Optimización del AST verificado
+===============================
+Pasada entre SemanticAnalyzer y los back ends (intérprete y codegen)
+que trabaja sobre el AST ya anotado con tipos:
+
+  * Plegado de constantes: operaciones aritméticas, comparaciones y
+    lógica booleana entre literales se reemplazan por su resultado
+    (2 * 3 + x  ->  6 + x).
+  * Simplificación algebraica: x*1, 1*x, x+0, x-0, x/1, +x, --x y !!b
+    se reemplazan por x; true && b, b || false, etc. por b.
+  * Poda de IfStmt con condición constante.
+  * Movimiento de código invariante (LICM): las subexpresiones de un
+    ciclo que no dependen de variables modificadas en él se calculan
+    una sola vez en una variable temporal declarada antes del ciclo.
+
+Además pure_functions() identifica las funciones puras del programa,
+cuyos resultados el intérprete puede memorizar (--memoize).
+
+Solo se pliega lo que ambos back ends calculan igual: los enteros deben
+caber en 64 bits (codegen usa i64), '/' y '%' enteros solo con operandos
+no negativos (interp redondea hacia abajo y codegen trunca), y nunca una
+división entre cero, que debe seguir siendo un error en ejecución.
+Por la misma razón solo se sacan de un ciclo expresiones que no pueden
+fallar, ni leen variables que aún pueden no tener valor: un error se
+reportaría antes (o aunque el ciclo no se ejecute).
+'''
+import math
+from dataclasses import fields
+
+from checker import SemanticAnalyzer
+from model   import *
+from typesys import (check_binop, integer_type, float_type, boolean_type, char_type,
+                     string_type, ArrayOf)
+
+
+_MIN_INTEGER = -2 ** 63
+_MAX_INTEGER = 2 ** 63 - 1
+
+_literal_classes = {
+    integer_type: Integer,
+    float_type:   Float,
+    boolean_type: Boolean,
+    char_type:    Char,
+}
+
+def _fold_binop(op, left, right):
+    '''
+    Resultado de 'left op right' entre valores de literales, o None si
+    la operación no se puede plegar sin cambiar la semántica.
+    '''
+    if op == '+':
+        return left + right
+    if op == '-':
+        return left - right
+    if op == '*':
+        return left * right
+    if op == '/':
+        if type(left) is float:
+            return left / right if right else None
+        return left // right if left >= 0 and right > 0 else None
+    if op == '%':
+        if type(left) is float:
+            return None
+        return left % right if left >= 0 and right > 0 else None
+    if op == '^':
+        if type(left) is float or right < 0:
+            return None
+        return left ** right
+    if op == '<':
+        return left < right
+    if op == '<=':
+        return left <= right
+    if op == '>':
+        return left > right
+    if op == '>=':
+        return left >= right
+    if op == '==':
+        return left == right
+    if op == '!=':
+        return left != right
+    if op == '&&':
+        return left and right
+    if op == '||':
+        return left or right
+    return None
+
+def _is_constant(node, value=None):
+    '''
+    True si 'node' es un literal plegable (con valor 'value', si se da).
+    '''
+    if not isinstance(node, (Integer, Float, Boolean, Char)):
+        return False
+    return value is None or (node.value == value and type(node.value) is type(value))
+
+def _children(node):
+    '''
+    Pares (campo, valor) de los hijos de 'node' en el AST.
+    '''
+    for field in fields(node):
+        value = getattr(node, field.name)
+        if isinstance(value, (Node, list)):
+            yield field.name, value
+
+def _walk(node):
+    '''
+    Recorre en preorden todos los nodos del subárbol de 'node'.
+    '''
+    yield node
+    for _, value in _children(node):
+        for child in (value if isinstance(value, list) else [value]):
+            if isinstance(child, Node):
+                yield from _walk(child)
+
+def _rewrite_children(node, rewrite):
+    '''
+    Reemplaza cada hijo de 'node' por rewrite(hijo). Un hijo de una
+    lista que se reescribe a None se elimina; una sentencia única
+    eliminada (p. ej. el cuerpo de un while) pasa a ser un bloque vacío.
+    '''
+    for name, value in _children(node):
+        if isinstance(value, Node):
+            child = rewrite(value)
+            setattr(node, name, BlockStmt([]) if child is None else child)
+        else:
+            items = [rewrite(item) if isinstance(item, Node) else item for item in value]
+            setattr(node, name, [item for item in items if item is not None])
+    return node
+
+def _is_pure(node):
+    '''
+    True si evaluar 'node' no tiene efectos ni puede fallar.
+    '''
+    return isinstance(node, (Literal, VarLocation))
+
+
+class ConstantFolder(Visitor):
+    '''
+    Reescribe el AST: cada visit retorna el nodo que reemplaza al
+    visitado (el mismo, uno nuevo, o None para eliminar una sentencia).
+    '''
+    def __init__(self, program):
+        self.folded = 0
+        self.initialized = _initialized_names(program)
+        self._ready = set()
+
+    @classmethod
+    def optimize(cls, program):
+        folder = cls(program)
+        return program.accept(folder), folder.folded
+
+    def _literal(self, node, value, result_type):
+        '''
+        Literal que reemplaza a 'node', o 'node' si el valor no es
+        representable.
+        '''
+        if result_type is integer_type and not _MIN_INTEGER <= value <= _MAX_INTEGER:
+            return node
+        # Un desbordamiento (inf) o nan se deja para la ejecución
+        if result_type is float_type and not math.isfinite(value):
+            return node
+        literal = _literal_classes[result_type](value, lineno=node.lineno)
+        literal.type = result_type
+        self.folded += 1
+        return literal
+
+    def _simplified(self, node):
+        self.folded += 1
+        return node
+
+    def _has_value(self, node):
+        '''
+        True si 'node' nunca vale None. Una variable sin inicializar vale
+        None, y el operador que la simplificación eliminaría es el que
+        reporta el error en ejecución.
+        '''
+        if isinstance(node, (Literal, BinOper, UnaryOper)):
+            return True
+        return isinstance(node, VarLocation) and node.name in self._ready
+
+    def _rewrite(self, node):
+        '''
+        Reescribe los hijos de 'node' sabiendo qué variables tienen valor
+        al llegar a él (ver _initialized_names).
+        '''
+        saved = self._ready
+        self._ready = self.initialized.get(id(node), saved)
+        _rewrite_children(node, lambda child: child.accept(self))
+        self._ready = saved
+        return node
+
+    def visit(self, node: Node):
+        return self._rewrite(node)
+
+    def visit(self, node: IfStmt):
+        self._rewrite(node)
+        if not _is_constant(node.condition):
+            return node
+
+        body = node.true_body if node.condition.value else node.false_body
+        self.folded += 1
+        if body is None or isinstance(body, BlockStmt):
+            return body
+        # Un cuerpo sin llaves conserva su propio alcance
+        return BlockStmt([body], lineno=body.lineno)
+
+    def visit(self, node: BinOper):
+        left = node.left = node.left.accept(self)
+        right = node.right = node.right.accept(self)
+        op = node.op
+        result_type = getattr(node, 'type', None)
+
+        if _is_constant(left) and _is_constant(right):
+            if check_binop(op, left.type, right.type) is not result_type:
+                return node
+            value = _fold_binop(op, left.value, right.value)
+            if value is None:
+                return node
+            return self._literal(node, value, result_type)
+
+        # Identidades algebraicas (el otro operando se evalúa igual)
+        if result_type in (integer_type, float_type) and not (
+                self._has_value(left) and self._has_value(right)):
+            return node
+        if result_type is integer_type:
+            if op in ('+', '-', '/') and _is_constant(right, 1 if op == '/' else 0):
+                return self._simplified(left)
+            if op == '+' and _is_constant(left, 0):
+                return self._simplified(right)
+            if op == '*' and _is_constant(right, 1):
+                return self._simplified(left)
+            if op == '*' and _is_constant(left, 1):
+                return self._simplified(right)
+        elif result_type is float_type:
+            # x + 0.0 no es x cuando x es -0.0
+            if op in ('*', '/') and _is_constant(right, 1.0):
+                return self._simplified(left)
+            if op == '-' and _is_constant(right, 0.0):
+                return self._simplified(left)
+            if op == '*' and _is_constant(left, 1.0):
+                return self._simplified(right)
+        elif op in ('&&', '||'):
+            # El operando derecho solo se evalúa si el izquierdo no decide
+            neutral = op == '&&'
+            if _is_constant(left, neutral):
+                return self._simplified(right)
+            if _is_constant(left, not neutral):
+                return self._simplified(left)
+            if _is_constant(right, neutral):
+                return self._simplified(left)
+            if _is_constant(right, not neutral) and _is_pure(left):
+                return self._simplified(right)
+        return node
+
+    def visit(self, node: UnaryOper):
+        expr = node.expr = node.expr.accept(self)
+        # ++ y -- (subclases de UnaryOper) modifican su operando
+        if type(node) is not UnaryOper:
+            return node
+
+        expr_type = getattr(expr, 'type', None)
+        if node.op == '+' and expr_type in (integer_type, float_type) and self._has_value(expr):
+            return self._simplified(expr)
+        if node.op == '-' and _is_constant(expr) and expr_type in (integer_type, float_type):
+            return self._literal(node, -expr.value, expr_type)
+        if node.op == '!' and _is_constant(expr) and expr_type is boolean_type:
+            return self._literal(node, not expr.value, boolean_type)
+        # --x y !!b
+        if (type(expr) is UnaryOper and expr.op == node.op and node.op in ('-', '!')
+                and self._has_value(expr.expr)):
+            return self._simplified(expr.expr)
+        return node
+
+
+# Builtins sin efectos que no pueden fallar con argumentos ya verificados.
+# sqrt queda fuera: falla con un número negativo.
+_pure_builtins = {'length', 'array_length', 'abs', 'max', 'min'}
+
+# Tipos que puede tener una variable temporal
+_scalar_types = {str(t): t for t in (integer_type, float_type, boolean_type, char_type, string_type)}
+
+def _modified_names(loop):
+    '''
+    Nombres que se asignan, incrementan o declaran dentro de 'loop'
+    (incluida la inicialización de un for).
+    '''
+    names = set()
+    for node in _walk(loop):
+        if isinstance(node, Assignment) and isinstance(node.location, VarLocation):
+            names.add(node.location.name)
+        elif isinstance(node, UnaryOper) and type(node) is not UnaryOper:
+            if isinstance(node.expr, VarLocation):
+                names.add(node.expr.name)
+        elif isinstance(node, Declaration):
+            names.add(node.name)
+    return names
+
+def _initialized_names(program):
+    '''
+    Para cada sentencia de 'program' (por id), los nombres que con
+    seguridad tienen valor al llegar a ella: parámetros, variables
+    declaradas con valor inicial, arrays y variables asignadas antes en
+    todo camino. Una variable declarada sin valor es None hasta su
+    primera asignación, y un cálculo con ella falla en ejecución.
+    '''
+    states = {}
+    initialized = {node.name for node in program.body
+                   if isinstance(node, ArrayDecl) or (isinstance(node, VarDecl) and node.value is not None)}
+
+    def statement(node, ready):
+        '''Nombres inicializados después de ejecutar 'node'.'''
+        states[id(node)] = ready
+        if isinstance(node, BlockStmt):
+            declared = {stmt.name for stmt in node.statements if isinstance(stmt, Declaration)}
+            inner = ready
+            for stmt in node.statements:
+                inner = statement(stmt, inner)
+            # Al salir del bloque sus declaraciones dejan de ocultar las externas
+            return (inner - declared) | (ready & declared)
+        if isinstance(node, VarDecl):
+            return ready | {node.name} if node.value is not None else ready - {node.name}
+        if isinstance(node, ArrayDecl):
+            return ready | {node.name}
+        if isinstance(node, FuncDecl):
+            if node.body is not None:
+                statement(node.body, initialized | {param.name for param in node.params})
+            return ready
+        if isinstance(node, Assignment) and isinstance(node.location, VarLocation):
+            return ready | {node.location.name}
+        if isinstance(node, IfStmt):
+            after = statement(node.true_body, ready)
+            if node.false_body is not None:
+                return after & statement(node.false_body, ready)
+            return ready
+        if isinstance(node, (WhileStmt, ForStmt)):
+            # Las temporales se declaran antes del ciclo (y del init de un for)
+            body = statement(node.init, ready) if getattr(node, 'init', None) is not None else ready
+            statement(node.body, body)
+            return body
+        if isinstance(node, DoWhileStmt):
+            return statement(node.body, ready)
+        return ready
+
+    for node in program.body:
+        statement(node, initialized)
+    return states
+
+
+class LoopInvariantMotion(Visitor):
+    '''
+    Saca de los ciclos las subexpresiones invariantes. Cada visit
+    retorna el nodo que reemplaza al visitado; un ciclo del que se sacó
+    algo se reemplaza por un bloque con las temporales y el ciclo.
+    '''
+    def __init__(self, program):
+        self.functions = {node.name for node in _walk(program) if isinstance(node, FuncDecl)}
+        self.names = {getattr(node, 'name', None) for node in _walk(program)}
+        self.initialized = _initialized_names(program)
+        self.hoisted = 0
+        self.temporaries = set()
+        self._counter = 0
+
+    @classmethod
+    def optimize(cls, program):
+        motion = cls(program)
+        return program.accept(motion), motion.hoisted
+
+    def visit(self, node: Node):
+        return _rewrite_children(node, lambda child: child.accept(self))
+
+    def visit(self, node: WhileStmt):
+        return self._loop(node)
+
+    def visit(self, node: DoWhileStmt):
+        return self._loop(node)
+
+    def visit(self, node: ForStmt):
+        return self._loop(node)
+
+    def _loop(self, loop):
+        temporaries = []
+        # Una llamada a una función del programa puede modificar
+        # cualquier variable global: el ciclo se deja como está
+        calls = {node.name for node in _walk(loop) if isinstance(node, FuncCall)}
+        if not calls & self.functions:
+            modified = _modified_names(loop)
+            # Las temporales de un ciclo externo ya tienen valor
+            ready = self.initialized.get(id(loop), set()) | self.temporaries
+            for name in ('condition', 'update', 'body'):
+                value = getattr(loop, name, None)
+                if value is not None:
+                    setattr(loop, name, self._hoist(value, modified, ready, temporaries))
+        # Después, los ciclos internos (lo invariante en el externo ya salió)
+        _rewrite_children(loop, lambda child: child.accept(self))
+        if not temporaries:
+            return loop
+        return BlockStmt(temporaries + [loop], lineno=loop.lineno)
+
+    def _hoist(self, node, modified, ready, temporaries):
+        '''
+        Reemplaza en 'node' las subexpresiones invariantes máximas por
+        temporales, agregando sus declaraciones a 'temporaries'.
+        '''
+        if isinstance(node, (BinOper, UnaryOper, FuncCall)) and self._invariant(node, modified, ready):
+            if str(getattr(node, 'type', None)) in _scalar_types:
+                return self._temporary(node, temporaries)
+        if isinstance(node, UnaryOper) and type(node) is not UnaryOper:
+            return node
+        if isinstance(node, Assignment) and isinstance(node.location, VarLocation):
+            node.value = self._hoist(node.value, modified, ready, temporaries)
+            return node
+        return _rewrite_children(node, lambda child: self._hoist(child, modified, ready, temporaries))
+
+    def _invariant(self, node, modified, ready):
+        '''
+        True si 'node' da el mismo valor en cada iteración, no tiene
+        efectos y no puede fallar aunque el ciclo no se ejecute: las
+        variables que lee no se modifican en el ciclo y ya tienen valor
+        al llegar a él ('ready').
+        '''
+        if isinstance(node, Literal):
+            return True
+        if isinstance(node, VarLocation):
+            return node.name not in modified and node.name in ready
+        if isinstance(node, BinOper):
+            if node.op in ('/', '%') and not (_is_constant(node.right) and node.right.value):
+                return False
+            # Una potencia de flotantes puede desbordar (OverflowError)
+            if node.op == '^' and not (_is_constant(node.right) and node.right.value >= 0
+                                       and node.type is integer_type):
+                return False
+            return self._invariant(node.left, modified, ready) and self._invariant(node.right, modified, ready)
+        if type(node) is UnaryOper:
+            return self._invariant(node.expr, modified, ready)
+        if isinstance(node, FuncCall):
+            return (node.name in _pure_builtins and node.name not in self.functions
+                    and all(self._invariant(arg, modified, ready) for arg in node.args))
+        return False
+
+    def _temporary(self, node, temporaries):
+        while f'licm_{self._counter}' in self.names:
+            self._counter += 1
+        name = f'licm_{self._counter}'
+        self.names.add(name)
+        self.temporaries.add(name)
+
+        decl = VarDecl(name, SimpleType(str(node.type), lineno=node.lineno), node, lineno=node.lineno)
+        decl.sym_type = node.type
+        temporaries.append(decl)
+        location = VarLocation(name, lineno=node.lineno)
+        location.type = node.type
+        self.hoisted += 1
+        return location
+
+
+# Builtins sin efectos cuyo resultado depende solo de sus argumentos
+_deterministic_builtins = _pure_builtins | {'sqrt'}
+
+def _function_calls(func):
+    '''
+    Nombres que llama 'func', o None si su cuerpo tiene efectos o
+    depende de algo más que sus argumentos: lee o escribe variables que
+    no son locales (según los slots del checker), escribe elementos de
+    un array recibido como parámetro, asigna arrays completos (alias),
+    imprime o declara funciones anidadas.
+    '''
+    if func.body is None:
+        return None
+    level = func.slot[0] + 1 if func.slot else 1
+    nparams = len(func.params)
+    calls = set()
+    for node in _walk(func.body):
+        if isinstance(node, (PrintStmt, FuncDecl)):
+            return None
+        if isinstance(node, FuncCall):
+            calls.add(node.name)
+        elif isinstance(node, VarLocation):
+            slot = getattr(node, 'slot', None)
+            if slot is None or slot[0] < level:
+                return None
+        elif isinstance(node, (Assignment, UnaryOper)) and type(node) is not UnaryOper:
+            target = node.location if isinstance(node, Assignment) else node.expr
+            if isinstance(getattr(target, 'type', None), ArrayOf):
+                # Asignar un array completo crea un alias
+                return None
+            if isinstance(target, ArraySubscript):
+                while isinstance(target, ArraySubscript):
+                    target = target.location
+                # Escritura en un elemento: el array no puede ser un parámetro
+                slot = getattr(target, 'slot', None)
+                if slot is None or slot[1] < nparams:
+                    return None
+    return calls
+
+def pure_functions(program):
+    '''
+    Nombres de las funciones globales de 'program' (ya verificado) que
+    son puras: sin efectos, y que solo llaman builtins deterministas u
+    otras funciones puras. Las llamadas recursivas se resuelven con un
+    punto fijo: se parte de todas las candidatas y se descartan las que
+    llaman a una función que no lo es.
+    '''
+    functions = {node.name for node in program.body if isinstance(node, FuncDecl)}
+    candidates = {}
+    for node in program.body:
+        if isinstance(node, FuncDecl):
+            calls = _function_calls(node)
+            if calls is not None:
+                candidates[node.name] = calls
+    changed = True
+    while changed:
+        changed = False
+        for name, calls in list(candidates.items()):
+            for callee in calls:
+                if callee in functions:
+                    pure = callee in candidates
+                else:
+                    pure = callee in _deterministic_builtins
+                if not pure:
+                    del candidates[name]
+                    changed = True
+                    break
+    return set(candidates)
+
+
+def optimize(program, errors=None):
+    '''
+    Optimiza 'program' (ya verificado) y lo retorna junto con el número
+    de expresiones y sentencias simplificadas. Si se sacaron expresiones
+    de los ciclos, el árbol se vuelve a verificar: las temporales nuevas
+    necesitan sus slots para que los motores las encuentren. 'errors' es
+    el ErrorCollector de esa verificación (el mismo de la primera).
+    '''
+    program, folded = ConstantFolder.optimize(program)
+    program, hoisted = LoopInvariantMotion.optimize(program)
+    if hoisted:
+        SemanticAnalyzer.checker(program, errors=errors)
+    return program, folded + hoisted
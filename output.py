@@ -0,0 +1,82 @@
+# output.py
+'''
+Salida de los programas B-Minor
+===============================
+Los motores escriben lo que imprime 'print' en un Output y no con
+rich.print, que interpreta '[...]' como markup, parte las líneas largas
+y procesa cada línea por separado. Los diagnósticos (errores, reportes
+del profiler) siguen usando rich; el intérprete vacía el buffer antes
+de mostrarlos para que aparezcan en orden.
+
+El destino puede ser sys.stdout (el vigente al escribir, así funciona
+con contextlib.redirect_stdout) o cualquier objeto con write(), p. ej.
+un io.StringIO para capturar la salida de un programa embebido.
+'''
+import sys
+
+
+def render(values):
+  '''
+  Texto de 'print v1, v2, ...': los valores juntos, con las secuencias
+  \\n y \\t de los strings expandidas, y un salto de línea al final si
+  el texto no termina en uno.
+  '''
+  parts = []
+  for value in values:
+    if isinstance(value, str):
+      value = value.replace('\\n', '\n')
+      value = value.replace('\\t', '\t')
+    parts.append(str(value))
+  text = ''.join(parts)
+  return text if text.endswith('\n') else text + '\n'
+
+
+class Output:
+  '''
+  Escritor con buffer. 'buffer_size' es la cantidad de caracteres que se
+  acumulan antes de escribir en 'stream'; con 0 cada print se escribe de
+  inmediato. Por defecto (None) no se usa buffer si el destino es una
+  terminal y se usan 64 KiB si no.
+  '''
+  DEFAULT_BUFFER = 65536
+
+  def __init__(self, stream=None, buffer_size=None):
+    self.stream = stream
+    self.buffer_size = buffer_size
+    self.parts = []
+    self.size = 0
+
+  @property
+  def target(self):
+    return sys.stdout if self.stream is None else self.stream
+
+  def _limit(self):
+    if self.buffer_size is None:
+      isatty = getattr(self.target, 'isatty', None)
+      self.buffer_size = 0 if isatty is not None and isatty() else self.DEFAULT_BUFFER
+    return self.buffer_size
+
+  def write(self, text):
+    self.parts.append(text)
+    self.size += len(text)
+    if self.size >= self._limit():
+      self.flush()
+
+  def emit(self, values):
+    self.write(render(values))
+
+  def flush(self):
+    if self.parts:
+      target = self.target
+      target.write(''.join(self.parts))
+      self.parts = []
+      self.size = 0
+      if hasattr(target, 'flush'):
+        target.flush()
+
+  def getvalue(self):
+    '''
+    Todo lo escrito, si el destino es un io.StringIO.
+    '''
+    self.flush()
+    return self.target.getvalue()
@@ -4,7 +4,7 @@ import sly
 from rich import print
 
 from bminor_lexer import Lexer
-from errors import error, errors_detected
+from errors import default_collector, LEXICAL, SYNTAX
 from model import *
 
 def _L(node, lineno):
@@ -259,13 +259,29 @@ class Parser(sly.Parser):
     @_("")
     def empty(self, p): pass
 
+    def __init__(self, errors=None):
+        self.errors = errors if errors is not None else default_collector
+
     def error(self, p):
         if p:
-            error(f"Error de sintaxis en '{p.value}'", p.lineno)
+            self.errors.error(f"Error de sintaxis en '{p.value}'", p.lineno, SYNTAX, index=p.index)
+        else:
+            self.errors.error("Error de sintaxis al final del archivo (EOF)", code=SYNTAX)
+
+def _report_lexical_errors(tokens, errors):
+    """Registra los tokens ERROR del lexer y los retira del flujo."""
+    for tok in tokens:
+        if tok.type == 'ERROR':
+            errors.error(tok.value, tok.lineno, LEXICAL, index=tok.index)
         else:
-            error("Error de sintaxis al final del archivo (EOF)")
+            yield tok
 
-def parse(txt):
+def parse(txt, errors=None):
+    if errors is None:
+        errors = default_collector
+        errors.source = txt
+    elif errors.source is None:
+        errors.source = txt
     l = Lexer()
-    p = Parser()
-    return p.parse(l.tokenize(txt))
\ No newline at end of file
+    p = Parser(errors)
+    return p.parse(_report_lexical_errors(l.tokenize(txt), errors))
\ No newline at end of file
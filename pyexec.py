@@ -0,0 +1,796 @@
+# pyexec.py
+'''
+Motor de ejecución por traducción a Python
+==========================================
+El AST ya verificado se traduce a código fuente Python (funciones a
+'def', ciclos a 'while', arrays a los de arrays.py, '/' entre enteros
+a '//'),
+que se compila con compile() y se ejecuta con exec(), dejando el
+trabajo al intérprete de bytecode de CPython.
+
+Cada identificador de B-Minor se traduce a un nombre 'b_<nombre>'
+(con un sufijo si una declaración interna oculta a otra) y las
+asignaciones a variables de un alcance exterior se declaran 'global'
+o 'nonlocal'. Las operaciones que pueden fallar en tiempo de
+ejecución (división entre cero, índices de arrays, builtins) pasan
+por funciones auxiliares que reportan los mismos errores que
+interp.Interpreter; las excepciones de Python que quedan (p. ej. un
+operador con una variable sin inicializar) se reportan con la línea de
+B-Minor y, si vienen de un operador, con el mismo mensaje.
+
+Los objetos código se guardan en una caché indexada por el hash del
+AST, de modo que ejecutar de nuevo el mismo programa no vuelve a
+generar ni a compilar el código.
+'''
+import dataclasses
+import hashlib
+import math
+import re
+import sys
+
+from model   import *
+from typesys import integer_type, float_type
+from interp  import Interpreter, CallError, operand_message
+from arrays  import (new_array, new_ndarray, dimensions, subscript_chain, locate,
+                     array_types, array_classes, overflow_message,
+                     store_message, values_message)
+
+# Caché de objetos código: hash del AST -> (código, mapa de líneas)
+_code_cache = {}
+_cache_limit = 64
+
+_FILENAME = '<bminor>'
+
+
+def ast_hash(node):
+  '''
+  Hash estructural del AST (los nodos son dataclasses, su repr
+  incluye todos los campos y los números de línea).
+  '''
+  return hashlib.sha256(repr(node).encode('utf-8')).hexdigest()
+
+
+def number_nodes(node, out=None):
+  '''
+  Lista de nodos del AST en preorden. El código generado se refiere
+  a los nodos por su posición en esta lista (_nodes[k]), así un
+  objeto código en caché sirve para otro AST idéntico.
+  '''
+  if out is None:
+    out = []
+  out.append(node)
+  for f in dataclasses.fields(node):
+    value = getattr(node, f.name)
+    children = value if isinstance(value, list) else [value]
+    for child in children:
+      if isinstance(child, Node):
+        number_nodes(child, out)
+  return out
+
+
+def _is_simple(node):
+  '''
+  Expresión sin efectos secundarios que se puede evaluar dos veces.
+  '''
+  return isinstance(node, (VarLocation, Literal))
+
+
+def _direct_returns(node):
+  '''
+  ReturnStmt de un cuerpo que no están dentro de un ciclo.
+  '''
+  if isinstance(node, ReturnStmt):
+    yield node
+  elif isinstance(node, BlockStmt):
+    for stmt in node.statements:
+      yield from _direct_returns(stmt)
+  elif isinstance(node, IfStmt):
+    yield from _direct_returns(node.true_body)
+    if node.false_body:
+      yield from _direct_returns(node.false_body)
+
+
+class _Scope:
+  '''
+  Alcance de traducción: una función (o el programa) con su pila de
+  bloques léxicos (nombre B-Minor -> nombre Python). 'tail' es
+  (nombre Python, parámetros) si la función se traduce como un ciclo
+  por tener llamadas recursivas en posición de cola; 'loops' cuenta los
+  ciclos abiertos, dentro de los cuales no se usa 'continue'.
+  '''
+  def __init__(self, parent=None):
+    self.parent = parent
+    self.blocks = [{}]
+    self.pynames = set()
+    self.globals = set()
+    self.nonlocals = set()
+    self.tail = None
+    self.loops = 0
+
+  def visible(self, pyname):
+    scope = self
+    while scope:
+      if pyname in scope.pynames:
+        return True
+      scope = scope.parent
+    return False
+
+  def declare(self, name):
+    pyname = f'b_{name}'
+    suffix = 1
+    while self.visible(pyname):
+      suffix += 1
+      pyname = f'b_{name}_{suffix}'
+    self.pynames.add(pyname)
+    self.blocks[-1][name] = pyname
+    return pyname
+
+  def resolve(self, name):
+    '''
+    Devuelve (nombre Python, alcance dueño) o (None, None).
+    '''
+    scope = self
+    while scope:
+      for block in reversed(scope.blocks):
+        if name in block:
+          return block[name], scope
+      scope = scope.parent
+    return None, None
+
+
+class Translator(Visitor):
+  '''
+  Genera el código fuente Python del programa. Las sentencias
+  agregan líneas; las expresiones devuelven una cadena.
+  '''
+  def __init__(self, program, builtin_names, paranoid=False, limits=False):
+    self.paranoid = paranoid
+    # limits: contar pasos y profundidad de llamadas (ver limits.py)
+    self.limits = limits
+    self.ids = {id(node): k for k, node in enumerate(number_nodes(program))}
+    self.builtin_names = set(builtin_names)
+    self.lines = []
+    self.linemap = []
+    self.indent = 0
+    self.lineno = 0
+    self.temps = 0
+    self.module = _Scope()
+    self.scope = self.module
+    self.functions = {}
+
+  def translate(self, program: Program):
+    # Las declaraciones globales se reservan primero: una función
+    # puede usar una global declarada después de ella.
+    for name in self.builtin_names:
+      self.module.blocks[0][name] = f'b_{name}'
+      self.module.pynames.add(f'b_{name}')
+    for stmt in program.body:
+      if isinstance(stmt, (VarDecl, ArrayDecl, FuncDecl)) and stmt.name not in self.module.blocks[0]:
+        self.module.declare(stmt.name)
+    for stmt in program.body:
+      self.statement(stmt)
+    self.emit('pass')
+    return '\n'.join(self.lines) + '\n'
+
+  # Emisión -----------------------------------------------------------
+  def emit(self, line):
+    self.lines.append('    ' * self.indent + line)
+    self.linemap.append(self.lineno)
+
+  def node(self, node):
+    return f'_nodes[{self.ids[id(node)]}]'
+
+  def temp(self):
+    self.temps += 1
+    return f'_t{self.temps}'
+
+  def block(self, node):
+    '''
+    Cuerpo indentado de una sentencia compuesta.
+    '''
+    self.indent += 1
+    start = len(self.lines)
+    self.statement(node)
+    if len(self.lines) == start:
+      self.emit('pass')
+    self.indent -= 1
+
+  # Nombres -----------------------------------------------------------
+  def declare(self, name):
+    if self.scope is self.module and len(self.scope.blocks) == 1:
+      return self.module.blocks[0][name]
+    return self.scope.declare(name)
+
+  def load(self, name):
+    pyname, owner = self.scope.resolve(name)
+    return pyname or f'b_{name}'
+
+  def store(self, name):
+    pyname, owner = self.scope.resolve(name)
+    if pyname is None:
+      pyname, owner = f'b_{name}', self.module
+    if owner is not self.scope:
+      if owner is self.module:
+        self.scope.globals.add(pyname)
+      else:
+        # Las funciones intermedias también deben dejar pasar el nombre
+        scope = self.scope
+        while scope is not owner:
+          scope.nonlocals.add(pyname)
+          scope = scope.parent
+    return pyname
+
+  def statement(self, node):
+    self.lineno = node.lineno or self.lineno
+    if isinstance(node, Assignment):
+      self.assignment_statement(node)
+    elif isinstance(node, (PreInc, PostInc, PreDec, PostDec)) and isinstance(node.expr, VarLocation):
+      delta = '+' if isinstance(node, (PreInc, PostInc)) else '-'
+      pyname = self.store(node.expr.name)
+      self.emit(f'{pyname} = {self._numeric(node, pyname)} {delta} 1')
+    elif isinstance(node, Expression):
+      self.emit(node.accept(self))
+    else:
+      node.accept(self)
+
+  # Declarations
+  def visit(self, node: VarDecl):
+    value = node.value.accept(self) if node.value else 'None'
+    self.emit(f'{self.declare(node.name)} = {value}')
+
+  def visit(self, node: ArrayDecl):
+    size_expr = node.size or getattr(node.type, 'size', None)
+    size = size_expr.accept(self) if size_expr else '0'
+    values = '[' + ', '.join(value.accept(self) for value in node.value) + ']' if node.value else 'None'
+    inner_sizes = ''.join(f'{size_expr.accept(self)}, ' for size_expr in dimensions(node.type))
+    shape = f', ({inner_sizes})' if inner_sizes else ''
+    self.emit(f'{self.declare(node.name)} = _array({size}, {values}, {self.node(node)}{shape})')
+
+  def visit(self, node: FuncDecl):
+    pyname = self.declare(node.name)
+    enclosing = self.scope
+    self.scope = _Scope(enclosing)
+    params = [self.scope.declare(param.name) for param in node.params]
+
+    self.emit(f"def {pyname}({', '.join(params)}):")
+    self.indent += 1
+    header = len(self.lines)
+    if self.limits:
+      # La profundidad se descuenta al salir, también por un error
+      self.emit(f'_enter({self.node(node)})')
+      self.emit('try:')
+      self.indent += 1
+    if node.body and any(stmt.tail_call and stmt.value.name == node.name
+                         for stmt in _direct_returns(node.body)):
+      # 'return f(...)' recursivo: se reasignan los parámetros y se
+      # repite el cuerpo en vez de anidar una llamada de Python
+      self.scope.tail = (pyname, params)
+      self.emit('while True:')
+      self.indent += 1
+      self.statement(node.body)
+      self.emit('return None')
+      self.indent -= 1
+    elif node.body:
+      self.statement(node.body)
+    else:
+      self.emit(f"_fail({self.node(node)}, {f'La función {node.name!r} no tiene cuerpo'!r})")
+    if self.limits:
+      self.emit('pass')
+      self.indent -= 1
+      self.emit('finally:')
+      self.emit('    _leave()')
+    if self.scope.globals:
+      self.lines.insert(header, '    ' * self.indent + 'global ' + ', '.join(sorted(self.scope.globals)))
+      self.linemap.insert(header, node.lineno)
+    if self.scope.nonlocals:
+      self.lines.insert(header, '    ' * self.indent + 'nonlocal ' + ', '.join(sorted(self.scope.nonlocals)))
+      self.linemap.insert(header, node.lineno)
+    if len(self.lines) == header:
+      self.emit('pass')
+    self.indent -= 1
+    self.scope = enclosing
+    self.functions[node.name] = len(node.params)
+
+  def visit(self, node: BlockStmt):
+    self.scope.blocks.append({})
+    for stmt in node.statements:
+      self.statement(stmt)
+    self.scope.blocks.pop()
+
+  # Statements
+  def visit(self, node: PrintStmt):
+    self.emit(f"_print({', '.join(value.accept(self) for value in node.values)})")
+
+  def visit(self, node: IfStmt):
+    self.emit(f'if {node.condition.accept(self)}:')
+    self.block(node.true_body)
+    if node.false_body:
+      self.emit('else:')
+      self.block(node.false_body)
+
+  def loop_body(self, loop, body):
+    self.scope.loops += 1
+    if self.limits:
+      self.indent += 1
+      self.emit(f'_step({self.node(loop)})')
+      self.indent -= 1
+    self.block(body)
+    self.scope.loops -= 1
+
+  def visit(self, node: WhileStmt):
+    self.emit(f'while {node.condition.accept(self)}:')
+    self.loop_body(node, node.body)
+
+  def visit(self, node: DoWhileStmt):
+    self.emit('while True:')
+    self.loop_body(node, node.body)
+    self.indent += 1
+    self.emit(f'if not {node.condition.accept(self)}:')
+    self.emit('    break')
+    self.indent -= 1
+
+  def visit(self, node: ForStmt):
+    if node.init:
+      self.statement(node.init)
+    condition = node.condition.accept(self) if node.condition else 'True'
+    self.emit(f'while {condition}:')
+    self.loop_body(node, node.body)
+    if node.update:
+      self.indent += 1
+      self.statement(node.update)
+      self.indent -= 1
+
+  def visit(self, node: ReturnStmt):
+    tail = self.scope.tail
+    if (tail and node.tail_call and not self.scope.loops and
+        self.scope.resolve(node.value.name)[0] == tail[0]):
+      pyname, params = tail
+      args = [arg.accept(self) for arg in node.value.args]
+      if params:
+        self.emit(f"{', '.join(params)} = {', '.join(args)}")
+      if self.limits:
+        self.emit(f'_step({self.node(node)})')
+      self.emit('continue')
+      return
+    value = node.value.accept(self) if node.value else 'None'
+    if self.scope is self.module:
+      self.emit(f"_fail({self.node(node)}, 'return fuera de una función')")
+    else:
+      self.emit(f'return {value}')
+
+  # Expressions
+  def visit(self, node: BinOper):
+    left = node.left.accept(self)
+    right = node.right.accept(self)
+    op = node.op
+    if op == '&&':
+      return f'({left} and {right})'
+    if op == '||':
+      return f'({left} or {right})'
+    if self.paranoid and op not in ('==', '!='):
+      return f'_binop({self.node(node)}, {left}, {right})'
+    if op in ('/', '%'):
+      if node.left.type is integer_type and node.right.type is integer_type:
+        pyop = '//' if op == '/' else '%'
+      elif node.left.type is float_type and node.right.type is float_type:
+        pyop = op
+      else:
+        return f'_binop({self.node(node)}, {left}, {right})'
+      if isinstance(node.right, Literal) and node.right.value:
+        return f'({left} {pyop} {right})'
+      if _is_simple(node.right) and _is_simple(node.left):
+        return f'({left} {pyop} {right} if {right} else _binop({self.node(node)}, {left}, {right}))'
+      return f"_{'div' if op == '/' else 'mod'}({self.node(node)}, {left}, {right})"
+    pyop = '**' if op == '^' else op
+    return f'({left} {pyop} {right})'
+
+  def visit(self, node: UnaryOper):
+    expr = node.expr.accept(self)
+    if node.op == '!':
+      return f'(not {expr})'
+    if node.op == '-' and not self.paranoid:
+      return f'(-{expr})'
+    return f'_unaryop({self.node(node)}, {expr})'
+
+  def _numeric(self, node, pyname):
+    # Una variable sin inicializar vale None: se reporta como en interp
+    return f'({pyname} if {pyname} is not None else _numeric({self.node(node)}, {pyname}))'
+
+  def _inc_dec(self, node, delta, post):
+    target = node.expr
+    if isinstance(target, VarLocation):
+      pyname = self.store(target.name)
+      if not post:
+        return f'({pyname} := {self._numeric(node, pyname)} {delta:+d})'
+      temp = self.temp()
+      return f'({temp} := {self._numeric(node, pyname)}, {pyname} := {temp} {delta:+d})[0]'
+    if isinstance(target, ArraySubscript) and isinstance(target.location, VarLocation):
+      array = target.location.accept(self)
+      index = target.index.accept(self)
+      return f'_incdec({self.node(node)}, {self.node(target)}, {array}, {index}, {delta}, {post})'
+    if subscript_chain(target):
+      return f'_incdec_element({self.node(node)}, {self._element(target)}, {delta}, {post})'
+    if isinstance(target, ArraySubscript):
+      message = "Solo se soportan incrementos/decrementos en variables o arrays simples"
+    else:
+      message = "El operando de incremento/decremento debe ser un lvalue (variable o elemento de array)"
+    return f'_fail({self.node(node)}, {message!r})'
+
+  def visit(self, node: PreInc):
+    return self._inc_dec(node, 1, False)
+
+  def visit(self, node: PreDec):
+    return self._inc_dec(node, -1, False)
+
+  def visit(self, node: PostInc):
+    return self._inc_dec(node, 1, True)
+
+  def visit(self, node: PostDec):
+    return self._inc_dec(node, -1, True)
+
+  def _checked_index(self, node, array, index_node, store=False):
+    index = index_node.accept(self)
+    # Una asignación reporta la posición inválida como _store
+    if _is_simple(index_node):
+      bad = '_store_index' if store else '_bad_index'
+      return f'{index} if 0 <= {index} < len({array}) else {bad}({self.node(node)}, {array}, {index})'
+    return f"{'_store_index' if store else '_index'}({self.node(node)}, {array}, {index})"
+
+  def assignment_statement(self, node):
+    location = node.location
+    value = node.value.accept(self)
+    if isinstance(location, VarLocation):
+      self.emit(f'{self.store(location.name)} = {value}')
+    elif isinstance(location, ArraySubscript) and isinstance(location.location, VarLocation):
+      # Python evalúa primero el valor, luego el array y el índice. Un
+      # valor que no cabe en el buffer tipado (p. ej. una variable sin
+      # inicializar) se reporta igual que en los otros motores
+      array = location.location.accept(self)
+      temp = self.temp()
+      self.emit(f'{temp} = {value}')
+      self.emit('try:')
+      self.emit(f'    {array}[{self._checked_index(node, array, location.index, store=True)}] = {temp}')
+      self.emit('except (OverflowError, TypeError):')
+      self.emit(f'    _store_failed({self.node(node)}, {temp})')
+    else:
+      self.emit(node.accept(self))
+
+  def visit(self, node: Assignment):
+    location = node.location
+    value = node.value.accept(self)
+    if isinstance(location, VarLocation):
+      return f'({self.store(location.name)} := {value})'
+    if isinstance(location, ArraySubscript) and isinstance(location.location, VarLocation):
+      array = location.location.accept(self)
+      return f'_store({self.node(node)}, {value}, {array}, {location.index.accept(self)})'
+    if subscript_chain(location):
+      return f'_store_element({self.node(node)}, {value}, {self._element(location)})'
+    if isinstance(location, ArraySubscript):
+      return f"_fail({self.node(node)}, 'Asignación a array anidado no soportada')"
+    raise NotImplementedError(f"Tipo de asignación no soportado: {type(location)}")
+
+  def visit(self, node: FuncCall):
+    pyname, owner = self.scope.resolve(node.name)
+    args = [arg.accept(self) for arg in node.args]
+    if node.builtin is not None:
+      # Builtin resuelto por el checker: llamada directa; su CallError
+      # se reporta en la línea de la llamada (ver PyExecInterpreter.run)
+      return f"{pyname}({', '.join(args)})"
+    if owner is self.module and node.name in self.builtin_names:
+      return f"_call({self.node(node)}, {pyname}{''.join(', ' + arg for arg in args)})"
+    return f"{pyname or 'b_' + node.name}({', '.join(args)})"
+
+  def visit(self, node: VarLocation):
+    return self.load(node.name)
+
+  def _element(self, node):
+    '''
+    Argumentos de los auxiliares de 'a[i][j]...': nodos de cada nivel,
+    array base e índices (ver arrays.locate).
+    '''
+    base, levels = subscript_chain(node)
+    nodes = ''.join(f'{self.node(level)}, ' for level in levels)
+    indices = ''.join(f'{level.index.accept(self)}, ' for level in levels)
+    return f'({nodes}), {base.accept(self)}, ({indices})'
+
+  def visit(self, node: ArraySubscript):
+    if subscript_chain(node):
+      return f'_load_element({self._element(node)})'
+    array = node.location.accept(self)
+    if not isinstance(node.location, VarLocation):
+      array_temp = self.temp()
+      return f'({array_temp} := {array})[{self._checked_index(node, array_temp, node.index)}]'
+    return f'{array}[{self._checked_index(node, array, node.index)}]'
+
+  # Literales
+  def visit(self, node: Literal):
+    if type(node.value) is float and not math.isfinite(node.value):
+      # repr() daría 'inf' o 'nan', que no son nombres de Python
+      return f'float({repr(node.value)!r})'
+    return repr(node.value)
+
+
+def translate(program, builtin_names=(), paranoid=False, limits=False):
+  '''
+  Devuelve (fuente Python, mapa línea Python -> línea B-Minor, aridades).
+  '''
+  translator = Translator(program, builtin_names, paranoid, limits)
+  source = translator.translate(program)
+  return source, translator.linemap, translator.functions
+
+
+def _runtime(interp, nodes):
+  '''
+  Funciones auxiliares del código generado, ligadas al intérprete.
+  '''
+  validator = interp.validator
+  error = interp.error
+  limits = interp.limits
+
+  emit = interp.output.emit
+
+  def _print(*values):
+    emit(values)
+
+  def _div(node, left, right):
+    if right:
+      try:
+        return left // right if type(left) is int and type(right) is int else left / right
+      except TypeError:
+        pass
+    return interp._binop(node, left, right)
+
+  def _mod(node, left, right):
+    if right:
+      try:
+        return left % right
+      except TypeError:
+        pass
+    return interp._binop(node, left, right)
+
+  def _index(node, array, index):
+    if type(array) not in array_classes or type(index) is not int or not 0 <= index < len(array):
+      validator.validate_array_index(node, array, index)
+    return index
+
+  def _bad_index(node, array, index):
+    validator.validate_array_index(node, array, index)
+    return index
+
+  def _store_index(node, array, index):
+    # Posición de una asignación a un elemento: los mismos errores que
+    # Interpreter reporta al guardar (las lecturas usan el validador)
+    if not isinstance(array, array_types):
+      error(node, f"'{node.location.location.name}' no es un array")
+    if not isinstance(index, int):
+      error(node, f"El índice debe ser un entero")
+    if index < 0 or index >= len(array):
+      error(node, f"Índice fuera de rango: {index}")
+    return index
+
+  def _store(node, value, array, index):
+    _store_index(node, array, index)
+    try:
+      array[index] = value
+    except (OverflowError, TypeError):
+      error(node, store_message(value))
+    return value
+
+  def _store_failed(node, value):
+    error(node, store_message(value))
+
+  def _incdec(node, target, array, index, delta, post):
+    validator.validate_array_index(target, array, index)
+    value = array[index]
+    interp._validate_numeric_operands(node, value)
+    try:
+      array[index] = value + delta
+    except (OverflowError, TypeError):
+      error(node, store_message(value + delta))
+    return value if post else value + delta
+
+  def _array(size, values, node, inner_sizes=()):
+    for dim in (size, *inner_sizes):
+      if not isinstance(dim, int):
+        error(node, f"El tamaño del array debe ser un entero, se obtuvo {type(dim).__name__}")
+    if limits is not None:
+      limits.allocate(node, (size, *inner_sizes))
+    try:
+      if inner_sizes:
+        return new_ndarray(node.sym_type.element, (size, *inner_sizes), values)
+      return new_array(node.sym_type.element, size, values)
+    except (OverflowError, TypeError):
+      error(node, values_message(values))
+
+  def _load_element(levels, array, indices):
+    container, index = locate(levels, array, indices, validator.validate_array_index)
+    return container[index]
+
+  def _store_element(node, value, levels, array, indices):
+    container, index = locate(levels, array, indices, validator.validate_array_index)
+    try:
+      container[index] = value
+    except (OverflowError, TypeError):
+      error(node, store_message(value))
+    return value
+
+  def _incdec_element(node, levels, array, indices, delta, post):
+    container, index = locate(levels, array, indices, validator.validate_array_index)
+    value = container[index]
+    interp._validate_numeric_operands(node, value)
+    try:
+      container[index] = value + delta
+    except (OverflowError, TypeError):
+      error(node, store_message(value + delta))
+    return value if post else value + delta
+
+  def _call(node, callee, *args):
+    try:
+      if hasattr(callee, 'arity'):
+        if callee.arity != -1 and len(args) != callee.arity:
+          error(node, f"Esperado {callee.arity} argumentos, se recibieron {len(args)}")
+        return callee(interp, *args)
+      return callee(*args)
+    except CallError as err:
+      error(node, str(err))
+
+  def _numeric(node, value):
+    interp._validate_numeric_operands(node, value)
+    return value
+
+  def _fail(node, message):
+    error(node, message)
+
+  return {
+    '_nodes': nodes,
+    '_print': _print,
+    '_div': _div,
+    '_mod': _mod,
+    '_index': _index,
+    '_bad_index': _bad_index,
+    '_store_index': _store_index,
+    '_store': _store,
+    '_store_failed': _store_failed,
+    '_incdec': _incdec,
+    '_array': _array,
+    '_load_element': _load_element,
+    '_store_element': _store_element,
+    '_incdec_element': _incdec_element,
+    '_call': _call,
+    '_numeric': _numeric,
+    '_fail': _fail,
+    '_binop': interp._binop,
+    '_unaryop': interp._unaryop,
+    '_step': limits.step if limits is not None else None,
+    '_enter': limits.enter if limits is not None else None,
+    '_leave': limits.leave if limits is not None else None,
+  }
+
+
+# TypeError de CPython en un operador del código generado, con el
+# operador y los nombres de los tipos de sus operandos
+_operator_errors = [
+  re.compile(r"unsupported operand type\(s\) for (?P<op>[^:\s]+)(?: or pow\(\))?: "
+             r"'(?P<left>\w+)' and '(?P<right>\w+)'"),
+  re.compile(r"'(?P<op>[^']+)' not supported between instances of '(?P<left>\w+)' and '(?P<right>\w+)'"),
+  re.compile(r"bad operand type for unary (?P<op>\S+): '(?P<left>\w+)'"),
+  re.compile(r'can only concatenate (?P<left>\w+) \(not "(?P<right>\w+)"\) to \w+'),
+]
+_python_operators = {'**': '^', '//': '/'}
+_numeric_names = {'int', 'float', 'bool'}
+
+def operator_message(err):
+  '''
+  Mensaje que reporta interp.Interpreter para el TypeError 'err' de un
+  operador del código generado (p. ej. con una variable sin
+  inicializar), o None si 'err' no viene de un operador.
+  '''
+  for pattern in _operator_errors:
+    match = pattern.fullmatch(str(err))
+    if match:
+      op = match.groupdict().get('op') or '+'
+      op = _python_operators.get(op, op)
+      if match['left'] not in _numeric_names:
+        return operand_message(op, 'izquierdo', match['left'])
+      return operand_message(op, 'derecho', match['right'])
+  return None
+
+
+class _Position:
+  '''
+  Posición mínima (solo lineno) para reportar errores de Python.
+  '''
+  def __init__(self, lineno):
+    self.lineno = lineno
+
+
+class PyFunction:
+  '''
+  Función traducida a Python. Como interp.Function, expone 'arity' y
+  se invoca con el intérprete como primer argumento.
+  '''
+  def __init__(self, function, arity, engine):
+    self.function = function
+    self.arity = arity
+    self.engine = engine
+
+  def __call__(self, interp, *args):
+    # main() puede declarar parámetros que nadie le pasa
+    args = args + (None,) * (self.arity - len(args))
+    return self.engine.run(self.function, *args)
+
+
+class PyExecInterpreter(Interpreter):
+  '''
+  Intérprete que traduce el programa a Python y lo ejecuta con exec().
+  '''
+  def execute(self, node):
+    limits = self.limits is not None
+    key = (ast_hash(node), self.paranoid, limits)
+    names = list(self.env.keys())
+    cached = _code_cache.get(key)
+    if cached is None or cached[3] != names:
+      source, linemap, functions = translate(node, names, self.paranoid, limits)
+      code = compile(source, _FILENAME, 'exec')
+      if len(_code_cache) >= _cache_limit:
+        _code_cache.pop(next(iter(_code_cache)))
+      cached = _code_cache[key] = (code, linemap, functions, names)
+    code, self.linemap, functions, _ = cached
+
+    self.namespace = _runtime(self, number_nodes(node))
+    for name, value in self.env.items():
+      self.namespace[f'b_{name}'] = value
+    self.run(exec, code, self.namespace)
+
+    # Publicar las globales en el entorno (interpret() busca 'main' allí)
+    for stmt in node.body:
+      if isinstance(stmt, (VarDecl, ArrayDecl, FuncDecl)) and f'b_{stmt.name}' in self.namespace:
+        value = self.namespace[f'b_{stmt.name}']
+        if stmt.name in functions and callable(value):
+          value = PyFunction(value, functions[stmt.name], self)
+        self.env[stmt.name] = value
+
+  def run(self, function, *args):
+    '''
+    Ejecuta código generado y reporta las excepciones de Python como
+    errores de B-Minor en la línea correspondiente.
+    '''
+    try:
+      return function(*args)
+    except CallError as err:
+      self.error(self._position(), str(err))
+    except RecursionError:
+      self.recursion_error(self._position(), self._depth())
+    except OverflowError:
+      # Asignación directa a un array de enteros (ver arrays.py)
+      self.error(self._position(), overflow_message())
+    except TypeError as err:
+      message = operator_message(err)
+      self.error(self._position(), message or f"{type(err).__name__}: {err}")
+    except ZeroDivisionError as err:
+      # 0 ^ n con n negativo ('/' y '%' pasan por _div y _mod)
+      position = self._position()
+      self.validator.validate_division_by_zero(position, 0)
+      self.error(position, f"{type(err).__name__}: {err}")
+    except (NameError, IndexError, UnboundLocalError) as err:
+      self.error(self._position(), f"{type(err).__name__}: {err}")
+
+  def _depth(self):
+    '''
+    Llamadas anidadas de funciones generadas en la excepción en curso.
+    '''
+    tb = sys.exc_info()[2]
+    depth = 0
+    while tb:
+      depth += tb.tb_frame.f_code.co_filename == _FILENAME
+      tb = tb.tb_next
+    return depth
+
+  def _position(self):
+    tb = sys.exc_info()[2]
+    lineno = 0
+    while tb:
+      if tb.tb_frame.f_code.co_filename == _FILENAME:
+        lineno = self.linemap[tb.tb_lineno - 1]
+      tb = tb.tb_next
+    return _Position(lineno)
@@ -1,4 +1,5 @@
 #include <stdio.h>
+#include <stdlib.h>
 #include <stdbool.h>
 
 // Funciones de runtime para print
@@ -21,3 +22,26 @@ void _print_char(char x) {
 void _print_string(const char* x) {
     printf("%s", x);
 }
+
+// Funciones de runtime para los builtins de arrays
+static int _compare_integer(const void* a, const void* b) {
+    long long x = *(const long long*)a, y = *(const long long*)b;
+    return (x > y) - (x < y);
+}
+
+static int _compare_float(const void* a, const void* b) {
+    double x = *(const double*)a, y = *(const double*)b;
+    return (x > y) - (x < y);
+}
+
+void array_sort_integer(long long* arr, long long n) {
+    if (arr && n > 1) {
+        qsort(arr, (size_t)n, sizeof(long long), _compare_integer);
+    }
+}
+
+void array_sort_float(double* arr, long long n) {
+    if (arr && n > 1) {
+        qsort(arr, (size_t)n, sizeof(double), _compare_float);
+    }
+}
@@ -203,4 +203,32 @@ extern "C" {
         int* raw = (int*)arr - 1;
         return (long long)(raw[0]);
     }
+
+    // ==================================================
+    // BUILTINS DE ARRAYS
+    // ==================================================
+    // sort(a) ordena el array en su lugar (el resto de los builtins de
+    // arrays se generan como ciclos en el código LLVM)
+
+    static int comparar_enteros(const void* a, const void* b) {
+        long long x = *(const long long*)a, y = *(const long long*)b;
+        return (x > y) - (x < y);
+    }
+
+    static int comparar_flotantes(const void* a, const void* b) {
+        double x = *(const double*)a, y = *(const double*)b;
+        return (x > y) - (x < y);
+    }
+
+    void array_sort_integer(long long* arr, long long n) {
+        if (arr && n > 1) {
+            qsort(arr, (size_t)n, sizeof(long long), comparar_enteros);
+        }
+    }
+
+    void array_sort_float(double* arr, long long n) {
+        if (arr && n > 1) {
+            qsort(arr, (size_t)n, sizeof(double), comparar_flotantes);
+        }
+    }
 }
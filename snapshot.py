@@ -0,0 +1,109 @@
+# snapshot.py
+'''
+Snapshots del estado de una ejecución
+=====================================
+Un Snapshot guarda las variables globales de un programa (escalares,
+strings y arrays, incluidos los buffers tipados de arrays.py) y, para
+la VM (vm.py), la pila de marcos de llamada y la pila de operandos, de
+modo que una ejecución larga puede guardarse cada cierto número de
+pasos y continuarse después desde el último punto guardado.
+
+Las funciones no se guardan: se vuelven a crear al compilar el mismo
+programa. Los objetos que no pueden serializarse (funciones de la VM,
+builtins) se guardan como referencias: el motor entrega pares (clave,
+objeto) al guardar y al cargar, y pickle los reemplaza por la clave.
+'program' es el hash del AST, para no continuar un snapshot con otro
+programa.
+
+El archivo es un encabezado seguido del pickle comprimido con zlib.
+Cargar un snapshot ejecuta pickle: solo deben cargarse archivos propios.
+'''
+import io
+import os
+import pickle
+import zlib
+from dataclasses import dataclass, field
+from typing      import Optional
+
+MAGIC = b'BMINOR-SNAPSHOT 1\n'
+
+
+class SnapshotError(Exception):
+  '''
+  Archivo que no es un snapshot o que corresponde a otro programa.
+  '''
+  pass
+
+
+@dataclass
+class Snapshot:
+  '''
+  'globals': nombre -> valor. 'frames': marcos de la VM del más externo
+  al actual, como (índice del Code, variables locales, pc); None si el
+  snapshot se tomó entre sentencias. 'declarations': código fuente de
+  las declaraciones de una sesión del REPL.
+  '''
+  program      : Optional[str] = None
+  globals      : dict = field(default_factory=dict)
+  frames       : Optional[list] = None
+  stack        : list = field(default_factory=list)
+  declarations : list = field(default_factory=list)
+
+
+class Checkpoint:
+  '''
+  Guardado periódico de una ejecución de la VM en 'path' cada 'every'
+  pasos (iteraciones de ciclos).
+  '''
+  def __init__(self, path, every=1000000):
+    self.path = path
+    self.every = every
+    self.countdown = every
+    self.saved = 0
+
+
+class _Pickler(pickle.Pickler):
+  def __init__(self, file, references):
+    super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+    self.keys = {id(obj): key for key, obj in references}
+
+  def persistent_id(self, obj):
+    return self.keys.get(id(obj))
+
+
+class _Unpickler(pickle.Unpickler):
+  def __init__(self, file, references):
+    super().__init__(file)
+    self.objects = dict(references)
+
+  def persistent_load(self, key):
+    try:
+      return self.objects[key]
+    except KeyError:
+      raise SnapshotError(f'El snapshot se refiere a {key!r}, que no existe en este programa')
+
+
+def save_snapshot(path, snapshot, references=()):
+  '''
+  Escribe 'snapshot' en 'path'. Se escribe primero un archivo temporal
+  para que una interrupción no deje un snapshot a medias.
+  '''
+  data = io.BytesIO()
+  _Pickler(data, references).dump(snapshot)
+  temporary = f'{path}.tmp'
+  with open(temporary, 'wb') as file:
+    file.write(MAGIC)
+    file.write(zlib.compress(data.getvalue()))
+  os.replace(temporary, path)
+
+
+def load_snapshot(path, references=()):
+  with open(path, 'rb') as file:
+    data = file.read()
+  if not data.startswith(MAGIC):
+    raise SnapshotError(f"'{path}' no es un snapshot de B-Minor")
+  try:
+    payload = zlib.decompress(data[len(MAGIC):])
+  except zlib.error as err:
+    raise SnapshotError(f"'{path}' está dañado: {err}")
+  return _Unpickler(io.BytesIO(payload), references).load()
@@ -8,12 +8,17 @@ from model        import Node
 class SymbolTable:
 	'''
 	Estructura de datos para gestionar símbolos del compilador.
-	Implementa un diccionario que mapea nombres de símbolos a sus
-	correspondientes nodos AST (declaraciones o definiciones).
-	Cada contexto de código (función, bloque, etc.) posee su propia
-	tabla de símbolos. Las tablas pueden anidarse para reflejar
-	la estructura del código, y las búsquedas se propagan hacia
-	arriba a través de la jerarquía para implementar el alcance léxico.
+	Implementa una tabla plana con alcances: cada nombre se asocia
+	a una pila de enlaces (profundidad, valor) y cada alcance guarda
+	un registro de deshacer con los nombres que introdujo. Entrar
+	y salir de un alcance, insertar y buscar son operaciones O(1)
+	(salir de un alcance cuesta lo que el número de símbolos que
+	declaró), sin crear un objeto nuevo por cada bloque o función.
+
+	Las búsquedas siempre devuelven el enlace más interno, lo que
+	implementa el alcance léxico. Si se construye con
+	retain_scopes=True, al cerrar cada alcance se guarda una copia
+	de sus símbolos para poder imprimirla después (p. ej. --check).
 	'''
 	class DuplicateSymbolError(Exception):
 		'''
@@ -23,77 +28,171 @@ class SymbolTable:
 		declarado.
 		'''
 		pass
-		
+
 	class TypeConflictError(Exception):
 		'''
 		Excepción lanzada cuando se intenta agregar un símbolo
 		con un nombre existente pero con un tipo diferente.
 		'''
 		pass
-		
-	def __init__(self, table_name, parent_table=None):
+
+	class _Scope:
+		'''
+		Registro de un alcance abierto: nombre, lista de nombres
+		declarados en él (registro de deshacer) y, si se conservan
+		los alcances, la posición de su copia en la lista de copias.
 		'''
-		Inicializa una tabla de símbolos vacía, opcionalmente
-		vinculada a una tabla padre.
+		__slots__ = ('name', 'undo', 'snapshot')
+
+		def __init__(self, name, snapshot=None):
+			self.name = name
+			self.undo = []
+			self.snapshot = snapshot
+
+	def __init__(self, table_name='global', retain_scopes=False):
+		'''
+		Inicializa una tabla de símbolos vacía con un único alcance
+		abierto (el global).
 		'''
 		self.name = table_name
-		self.symbols = {}
-		self.parent = parent_table
-		if self.parent:
-			self.parent.children.append(self)
-		self.children = []
+		self.retain_scopes = retain_scopes
+		self._bindings = {}
+		self._scopes = [SymbolTable._Scope(table_name)]
+		self._snapshots = []
+
+	@property
+	def depth(self):
+		'''
+		Profundidad del alcance actual (0 es el alcance global).
+		'''
+		return len(self._scopes) - 1
+
+	@property
+	def scope_name(self):
+		return self._scopes[-1].name
+
+	def _local(self, symbol_name):
+		'''
+		Devuelve la pila de enlaces del símbolo si su enlace más
+		interno pertenece al alcance actual, o None.
+		'''
+		stack = self._bindings.get(symbol_name)
+		if stack and stack[-1][0] == len(self._scopes) - 1:
+			return stack
+		return None
 
 	def __getitem__(self, symbol_name):
-		return self.symbols[symbol_name]
+		stack = self._local(symbol_name)
+		if stack is None:
+			raise KeyError(symbol_name)
+		return stack[-1][1]
 
 	def __setitem__(self, symbol_name, symbol_value):
-		self.symbols[symbol_name] = symbol_value
+		stack = self._local(symbol_name)
+		if stack is not None:
+			stack[-1] = (stack[-1][0], symbol_value)
+		else:
+			self._bind(symbol_name, symbol_value)
 
 	def __delitem__(self, symbol_name):
-		del self.symbols[symbol_name]
+		stack = self._local(symbol_name)
+		if stack is None:
+			raise KeyError(symbol_name)
+		stack.pop()
+		if not stack:
+			del self._bindings[symbol_name]
+		self._scopes[-1].undo.remove(symbol_name)
 
 	def __contains__(self, symbol_name):
-		if symbol_name in self.symbols:
-			return self.symbols[symbol_name]
+		stack = self._local(symbol_name)
+		if stack is not None:
+			return stack[-1][1]
 		return False
 
+	def _bind(self, symbol_name, symbol_value):
+		binding = (len(self._scopes) - 1, symbol_value)
+		stack = self._bindings.get(symbol_name)
+		if stack is None:
+			self._bindings[symbol_name] = [binding]
+		else:
+			stack.append(binding)
+		self._scopes[-1].undo.append(symbol_name)
+
 	def add(self, symbol_name, symbol_value):
 		'''
-		Inserta un símbolo en la tabla con el valor especificado.
-		El valor normalmente es un nodo AST que representa una
-		declaración o definición (variable, función, etc.)
+		Inserta un símbolo en el alcance actual con el valor
+		especificado. El valor normalmente es un nodo AST que
+		representa una declaración o definición (variable, función, etc.)
 		'''
-		if symbol_name in self.symbols:
+		stack = self._local(symbol_name)
+		if stack is not None:
+			existing = stack[-1][1]
 			# Comparar sym_type si existe, sino comparar type
-			existing_type = getattr(self.symbols[symbol_name], 'sym_type', getattr(self.symbols[symbol_name], 'type', None))
+			existing_type = getattr(existing, 'sym_type', getattr(existing, 'type', None))
 			new_type = getattr(symbol_value, 'sym_type', getattr(symbol_value, 'type', None))
 			if existing_type != new_type:
 				raise SymbolTable.TypeConflictError()
 			else:
 				raise SymbolTable.DuplicateSymbolError()
-		self.symbols[symbol_name] = symbol_value
-		
+		self._bind(symbol_name, symbol_value)
+
 	def get(self, symbol_name):
 		'''
-		Busca un símbolo por nombre en esta tabla y en las tablas
-		padre si no se encuentra localmente, implementando el
-		alcance léxico.
+		Busca un símbolo por nombre devolviendo su enlace más
+		interno, implementando el alcance léxico.
 		'''
-		if symbol_name in self.symbols:
-			return self.symbols[symbol_name]
-		elif self.parent:
-			return self.parent.get(symbol_name)
+		stack = self._bindings.get(symbol_name)
+		if stack:
+			return stack[-1][1]
 		return None
-		
-	def print(self):
-		display_table = Table(title = f"Symbol Table: '{self.name}'")
+
+	def enter_scope(self, scope_name):
+		'''
+		Abre un alcance anidado (función, bloque, bucle, ...).
+		'''
+		snapshot = None
+		if self.retain_scopes:
+			snapshot = len(self._snapshots)
+			self._snapshots.append((scope_name, None))
+		self._scopes.append(SymbolTable._Scope(scope_name, snapshot))
+
+	def exit_scope(self):
+		'''
+		Cierra el alcance actual deshaciendo los enlaces que introdujo.
+		'''
+		scope = self._scopes.pop()
+		bindings = self._bindings
+		if scope.snapshot is not None:
+			symbols = { name: bindings[name][-1][1] for name in scope.undo }
+			self._snapshots[scope.snapshot] = (scope.name, symbols)
+		for symbol_name in scope.undo:
+			stack = bindings[symbol_name]
+			stack.pop()
+			if not stack:
+				del bindings[symbol_name]
+
+	def symbols(self):
+		'''
+		Devuelve un diccionario con los símbolos del alcance actual.
+		'''
+		bindings = self._bindings
+		return { name: bindings[name][-1][1] for name in self._scopes[-1].undo }
+
+	def _print_table(self, table_name, symbols):
+		display_table = Table(title = f"Symbol Table: '{table_name}'")
 		display_table.add_column('key', style='cyan')
 		display_table.add_column('value', style='bright_green')
-		
-		for key, val in self.symbols.items():
+
+		for key, val in symbols.items():
 			display_value = f"{val.__class__.__name__}({val.name})" if isinstance(val, Node) else f"{val}"
 			display_table.add_row(key, display_value)
 		print(display_table, '\n')
-		
-		for child_table in self.children:
-			child_table.print()
+
+	def print(self):
+		bindings = self._bindings
+		global_symbols = { name: bindings[name][0][1] for name in self._scopes[0].undo }
+		self._print_table(self.name, global_symbols)
+
+		for scope_name, symbols in self._snapshots:
+			if symbols is not None:
+				self._print_table(scope_name, symbols)
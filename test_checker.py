@@ -0,0 +1,122 @@
+# test_checker.py
+"""
+Pruebas de regresión del verificador semántico.
+
+Cada caso se analiza y se verifica (SemanticAnalyzer.checker) con los
+'jobs' indicados; los diagnósticos, como pares (línea, mensaje), deben
+ser los esperados.
+
+    python test_checker.py            # todos los casos
+    python test_checker.py order      # los casos cuyo nombre contiene 'order'
+"""
+
+import sys
+from dataclasses import fields
+
+from rich import print
+
+from checker import SemanticAnalyzer, PARALLEL_THRESHOLD
+from errors  import ErrorCollector
+from model   import Node, BinOper, UnaryOper
+from parser  import parse
+
+
+class CheckerCase:
+    """Programa con los diagnósticos esperados del checker."""
+
+    def __init__(self, name, source, errors=(), jobs=1, annotated=None):
+        self.name = name
+        self.source = source
+        self.errors = list(errors)
+        self.jobs = jobs
+        # Predicado sobre el programa verificado (p. ej. sus anotaciones)
+        self.annotated = annotated
+
+
+def nodes(node):
+    """Nodos del subárbol de 'node' en preorden."""
+    yield node
+    for field in fields(node):
+        value = getattr(node, field.name)
+        for child in (value if isinstance(value, list) else [value]):
+            if isinstance(child, Node):
+                yield from nodes(child)
+
+def operators_resolved(program):
+    """True si cada operador tiene el op_id que usan los motores."""
+    return all(getattr(node, 'op_id', None) is not None for node in nodes(program)
+               if isinstance(node, BinOper) or type(node) is UnaryOper)
+
+
+def many_functions(first_body, count=PARALLEL_THRESHOLD):
+    """
+    Programa con 'count' funciones, para que con jobs > 1 los cuerpos se
+    verifiquen en paralelo; la primera tiene el cuerpo 'first_body'.
+    """
+    lines = [f'f0: function integer (n: integer) = {{\n    {first_body}\n}}']
+    for i in range(1, count):
+        lines.append(f'f{i}: function integer (n: integer) = {{ return f{i - 1}(n) * 2 + 1; }}')
+    return '\n'.join(lines)
+
+CASES = [
+    # Un cuerpo de función solo ve las globales declaradas antes que ella,
+    # aunque todas las firmas se registren antes de verificar los cuerpos
+    CheckerCase('order_later_global', '''f: function integer () = {
+    print g;
+    return 1;
+}
+a: integer = f();
+g: integer = 5;''', errors=[(2, "Nombre no definido 'g'")]),
+
+    CheckerCase('order_later_function', '''f: function void () = {
+    h();
+}
+h: function void () = {
+    print 1;
+}''', errors=[(2, "Función 'h' no definida")]),
+
+    CheckerCase('order_later_global_parallel', many_functions('return n + g;') + '''
+g: integer = 5;''', errors=[(2, "Nombre no definido 'g'"),
+                              (2, "Operación inválida: integer + error"),
+                              (2, "Error de tipo. Se esperaba un retorno de tipo 'integer' pero se obtuvo 'error'")],
+                jobs=4),
+
+    # Las anotaciones de los cuerpos verificados en otros procesos
+    # incluyen el op_id de cada operador
+    CheckerCase('annotations_parallel', many_functions('return -n + 1;'),
+                jobs=4, annotated=operators_resolved),
+
+    CheckerCase('order_prototype', '''h: function integer ();
+f: function integer () = {
+    return h() + f();
+}''', errors=[]),
+]
+
+
+def check_case(case):
+    """Verifica 'case'; retorna (diagnósticos, programa anotado)."""
+    errors = ErrorCollector(case.source)
+    program = parse(case.source, errors)
+    if not errors:
+        SemanticAnalyzer.checker(program, jobs=case.jobs, errors=errors)
+    return [(diagnostic.lineno, diagnostic.message) for diagnostic in errors.diagnostics], program
+
+
+def main():
+    selected = [case for case in CASES if all(word in case.name for word in sys.argv[1:])]
+    failed = 0
+    for case in selected:
+        actual, program = check_case(case)
+        if actual == case.errors and (case.annotated is None or case.annotated(program)):
+            print(f"[green]OK[/green]    {case.name}")
+            continue
+        failed += 1
+        print(f"[red]FALLA[/red] {case.name}: se esperaba {case.errors!r}")
+        print(f"        se obtuvo {actual!r}")
+        if case.annotated is not None:
+            print(f"        {case.annotated.__name__}: {case.annotated(program)}")
+    print(f"\n{len(selected) - failed} de {len(selected)} casos correctos")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# test_engines.py
+"""
+Pruebas de regresión de los motores de ejecución.
+
+Cada caso se compila una vez (embed.compile_program) y se ejecuta en
+todos los motores (bminor.engines); la salida y los errores de ejecución,
+como pares (línea, mensaje), deben ser los esperados en cada motor.
+
+    python test_engines.py            # todos los casos
+    python test_engines.py store      # los casos cuyo nombre contiene 'store'
+"""
+
+import sys
+
+from rich import print
+
+from bminor import engines
+from embed  import compile_program
+from limits import Limits
+
+
+class EngineCase:
+    """
+    Programa con la salida y los errores esperados en todos los motores.
+    Con errors=None los mensajes no se comparan (cada motor tiene los
+    suyos); 'exceeded' es el tipo de límite superado ('depth', ...).
+    """
+
+    def __init__(self, name, source, output='', errors=(), options=None, exceeded=None):
+        self.name = name
+        self.source = source
+        self.output = output
+        self.errors = None if errors is None else list(errors)
+        self.options = options or {}
+        self.exceeded = exceeded
+
+
+DEEP_RECURSION = '''f: function integer (n: integer) = {
+    if (n == 0) { return 0; }
+    return 1 + f(n - 1);
+}
+main: function void () = {
+    print f(100000);
+}'''
+
+CASES = [
+    # Guardar en un buffer tipado un escalar declarado sin inicializar
+    EngineCase('store_uninitialized', '''x: integer;
+a: array [3] integer;
+main: function void () = {
+    print 1;
+    a[1] = x;
+    print 2;
+}''', output='1\n', errors=[(5, 'Valor inválido para un array tipado, se obtuvo NoneType')]),
+
+    EngineCase('store_uninitialized_expression', '''x: integer;
+a: array [3] integer;
+main: function void () = {
+    print (a[1] = x);
+}''', errors=[(4, 'Valor inválido para un array tipado, se obtuvo NoneType')]),
+
+    EngineCase('init_uninitialized', '''x: integer;
+main: function void () = {
+    a: array [2] integer = {x, 1};
+    print a[1];
+}''', errors=[(3, 'Valor inválido para un array tipado, se obtuvo NoneType')]),
+
+    EngineCase('fill_uninitialized', '''x: float;
+main: function void () = {
+    a: array [2] float;
+    fill(a, x);
+    print a[0];
+}''', errors=[(4, 'Valor inválido para un array tipado, se obtuvo NoneType')]),
+
+    EngineCase('store_uninitialized_ndarray', '''x: integer;
+m: array [2] array [2] integer;
+main: function void () = {
+    m[0][1] = x;
+    print m[0][1];
+}''', errors=[(4, 'Valor inválido para un array tipado, se obtuvo NoneType')]),
+
+    # LICM no saca de un ciclo que no se ejecuta un cálculo con una
+    # variable sin inicializar
+    EngineCase('licm_uninitialized', '''x: integer;
+main: function void () = {
+    i: integer = 0;
+    y: integer = 0;
+    while (i < 0) { y = x * 2 + 1; i++; }
+    print y;
+}''', output='0\n'),
+
+    # Las temporales de LICM (ciclos anidados, dentro de una función)
+    # tienen slot: el programa compilado se ejecuta sin volver a verificar
+    EngineCase('licm_hoisted', '''f: function integer (n: integer) = {
+    total: integer = 0;
+    i: integer;
+    for (i = 0; i < n; i++) {
+        j: integer = 0;
+        while (j < n) { total = total + n * 2 + 1; j++; }
+    }
+    return total;
+}
+main: function void () = {
+    print f(3), " ", f(0);
+}''', output='63 0\n'),
+
+    # Los operadores con una variable sin inicializar reportan el mismo
+    # error en todos los motores (pyexec traduce el TypeError de Python)
+    EngineCase('operand_uninitialized_left', '''x: integer;
+main: function void () = {
+    print 1;
+    print x * 2 + 1;
+}''', output='1\n', errors=[(4, "Operando izquierdo en '*' debe ser numérico, se obtuvo NoneType")]),
+
+    EngineCase('operand_uninitialized_right', '''x: float;
+main: function void () = {
+    y: float = 2.0;
+    print y ^ x;
+}''', errors=[(4, "Operando derecho en '^' debe ser numérico, se obtuvo NoneType")]),
+
+    EngineCase('operand_uninitialized_compare', '''x: integer;
+main: function void () = {
+    i: integer = 0;
+    while (i < x) { i++; }
+}''', errors=[(4, "Operando derecho en '<' debe ser numérico, se obtuvo NoneType")]),
+
+    EngineCase('operand_uninitialized_unary', '''x: integer;
+main: function void () = {
+    print -x;
+}''', errors=[(3, "Operando izquierdo en '-' debe ser numérico, se obtuvo NoneType")]),
+
+    EngineCase('operand_uninitialized_string', '''s: string;
+main: function void () = {
+    t: string = "a";
+    print t + s;
+}''', errors=[(4, "Operando izquierdo en '+' debe ser numérico, se obtuvo str")]),
+
+    # Guardar fuera de los límites es un error de ejecución de B-Minor
+    # en todos los motores, con índice constante o calculado
+    EngineCase('store_out_of_bounds', '''a: array [3] integer;
+main: function void () = {
+    i: integer = 3;
+    a[2] = 1;
+    print a[2];
+    a[i] = 2;
+}''', output='1\n', errors=[(6, 'Índice fuera de rango: 3')]),
+
+    EngineCase('store_out_of_bounds_negative', '''a: array [3] integer;
+main: function void () = {
+    i: integer = 0;
+    a[i - 1] = 2;
+}''', errors=[(4, 'Índice fuera de rango: -1')]),
+
+    # Las identidades del optimizador (y + 0 -> y) no eliminan el error
+    # de una variable sin inicializar
+    EngineCase('identity_uninitialized', '''y: integer;
+main: function void () = {
+    print y + 0;
+}''', errors=[(3, "Operando izquierdo en '+' debe ser numérico, se obtuvo NoneType")]),
+
+    # Una constante que desborda no se pliega a un literal inf
+    EngineCase('fold_overflow', '''main: function void () = {
+    x: float = 1.0e308 * 10.0;
+    print x, " ", 1.0e400;
+}''', output='inf inf\n'),
+
+    # Una recursión más profunda que la pila de Python termina con un
+    # error de B-Minor, no con RecursionError; con --max-depth, como
+    # ese límite (superado a la profundidad que se alcanzó)
+    EngineCase('recursion_native', DEEP_RECURSION, errors=None),
+
+    # El mismo mensaje en todos los motores (la llamada y la declaración
+    # están en la misma línea: unos reportan una y otros la otra)
+    EngineCase('recursion_message', '''f: function integer (n: integer) = { return 1 + f(n + 1); }
+main: function void () = {
+    print f(0);
+}''', errors=[(1, 'Recursión demasiado profunda')]),
+
+    EngineCase('recursion_max_depth', DEEP_RECURSION, errors=None,
+               options={'limits': Limits(max_depth=50000)}, exceeded='depth'),
+]
+
+
+def run_case(case):
+    """Ejecuta 'case' en cada motor; retorna los motores con otro resultado."""
+    program = compile_program(case.source)
+    failures = []
+    for engine in sorted(engines):
+        program.engine = engine
+        try:
+            result = program.run(**case.options)
+            actual = (result.output, result.errors if case.errors is not None else None,
+                      result.exceeded.kind if result.exceeded else None)
+        except Exception as err:
+            actual = (None, [(None, f'{type(err).__name__}: {err}')], None)
+        if actual != (case.output, case.errors, case.exceeded):
+            failures.append((engine, actual))
+    return failures
+
+
+def main():
+    selected = [case for case in CASES if all(word in case.name for word in sys.argv[1:])]
+    failed = 0
+    for case in selected:
+        failures = run_case(case)
+        if not failures:
+            print(f"[green]OK[/green]    {case.name}")
+            continue
+        failed += 1
+        print(f"[red]FALLA[/red] {case.name}: se esperaba {(case.output, case.errors, case.exceeded)!r}")
+        for engine, actual in failures:
+            print(f"        {engine}: {actual!r}")
+    print(f"\n{len(selected) - failed} de {len(selected)} casos correctos")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
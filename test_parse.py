@@ -17,7 +17,7 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from bminor_lexer import Lexer
 from parser import Parser, parse
-from errors import error, errors_detected, clear_errors
+from errors import error, errors_detected, clear_errors, default_collector
 from model import *
 
 console = Console()
@@ -574,6 +574,7 @@ def test_single_file(filepath, show_ast=False):
         ast = parse(code)
         
         if errors_detected():
+            default_collector.render()
             console.print(f"[red]Se encontraron {errors_detected()} errores[/red]")
         else:
             console.print("[green]Análisis sintáctico exitoso[/green]")
@@ -640,6 +641,7 @@ def interactive_mode():
             ast = parse(code)
             
             if errors_detected():
+                default_collector.render()
                 console.print(f"[red]Se encontraron {errors_detected()} errores[/red]")
             else:
                 console.print("[green]Análisis sintáctico exitoso[/green]")
@@ -16,14 +16,107 @@ como punto de partida. Puede volver a refactorizar el sistema de tipos
 más adelante.
 '''
 
+from model import SimpleType, ArrayType
+
 class CheckError(Exception):
 	pass
-	
-	
+
+
+class BminorType:
+	'''
+	Tipo internado. Existe una única instancia por tipo, así que dos
+	tipos son iguales si y solo si son el mismo objeto: la igualdad y
+	el hash son los de identidad (O(1)), sin comparar estructuras.
+	Cada tipo recibe además un índice denso en orden de creación.
+	'''
+	__slots__ = ('name', 'index')
+
+	def __init__(self, name):
+		self.name = name
+		self.index = len(_all_types)
+		_all_types.append(self)
+
+	def __str__(self):
+		return self.name
+
+	def __repr__(self):
+		return f'<type {self.name}>'
+
+
+class PrimitiveType(BminorType):
+	__slots__ = ()
+
+	def __reduce__(self):
+		# Al deserializar (p. ej. en otro proceso) se recupera el singleton
+		return (lookup_type, (self.name,))
+
+
+class ArrayOf(BminorType):
+	'''
+	Tipo array. El tamaño no forma parte del tipo (igual que en los
+	parámetros 'array [] T'); los tamaños siguen en el AST.
+	'''
+	__slots__ = ('element',)
+
+	def __init__(self, element):
+		super().__init__(f'array [] {element}')
+		self.element = element
+
+	def __reduce__(self):
+		return (array_of, (self.element,))
+
+
+class FunctionType(BminorType):
+	__slots__ = ('result', 'params')
+
+	def __init__(self, result, params):
+		super().__init__(f"function {result} ({', '.join(map(str, params))})")
+		self.result = result
+		self.params = params
+
+	def __reduce__(self):
+		return (function_of, (self.result, self.params))
+
+
+_all_types = []
+_array_types = {}
+_function_types = {}
+
+integer_type = PrimitiveType('integer')
+float_type   = PrimitiveType('float')
+boolean_type = PrimitiveType('boolean')
+char_type    = PrimitiveType('char')
+string_type  = PrimitiveType('string')
+void_type    = PrimitiveType('void')
+# Tipo asignado a expresiones con errores (no es un tipo del lenguaje)
+error_type   = PrimitiveType('error')
+
+_primitive_types = { t.name: t for t in _all_types }
+
 typenames = { 'integer', 'float', 'boolean', 'char', 'string' }
 
+def array_of(element):
+	'''
+	Retorna el tipo canónico 'array [] element'.
+	'''
+	array_type = _array_types.get(element)
+	if array_type is None:
+		array_type = _array_types[element] = ArrayOf(element)
+	return array_type
+
+def function_of(result, params):
+	'''
+	Retorna el tipo canónico de una función con el tipo de retorno y
+	los tipos de parámetros dados.
+	'''
+	key = (result, tuple(params))
+	function_type = _function_types.get(key)
+	if function_type is None:
+		function_type = _function_types[key] = FunctionType(result, key[1])
+	return function_type
+
 # Capabilities
-_bin_ops = {
+_bin_op_names = {
 	# Integer operations
 	('integer', '+', 'integer') : 'integer',
 	('integer', '-', 'integer') : 'integer',
@@ -79,7 +172,7 @@ _bin_ops = {
 	('string', '=', 'string') : 'string',
 }
 
-_unary_ops = {
+_unary_op_names = {
 	('+', 'integer') : 'integer',
 	('-', 'integer') : 'integer',
 	('^', 'integer') : 'integer',
@@ -90,23 +183,91 @@ _unary_ops = {
 	('!', 'boolean') : 'boolean',
 }
 
-# Check if a binary operator is supported. Returns the
-# result type or None (if not supported). Type checker
-# uses this function.
+# Las tablas se escriben con nombres y se traducen a tipos internados
+_bin_ops = {
+	(_primitive_types[left], op, _primitive_types[right]) : _primitive_types[result]
+	for (left, op, right), result in _bin_op_names.items()
+}
+
+_unary_ops = {
+	(op, _primitive_types[operand]) : _primitive_types[result]
+	for (op, operand), result in _unary_op_names.items()
+}
+
+# Identificadores enteros de los operadores
+bin_operators   = ('+', '-', '*', '/', '%', '^', '=',
+                   '<', '<=', '>', '>=', '==', '!=', '&&', '||')
+unary_operators = ('+', '-', '^', '!')
+
+bin_op_ids   = { op: i for i, op in enumerate(bin_operators) }
+unary_op_ids = { op: i for i, op in enumerate(unary_operators) }
+
+# Tablas densas de resultados, indexadas por identificador de
+# operador e índice de tipo: binop_table[op_id][izq.index][der.index]
+# y unary_table[op_id][operando.index]. Solo los tipos primitivos
+# (índices 0 .. num_primitive_types-1) tienen filas; las celdas sin
+# operación válida valen None.
+num_primitive_types = len(_primitive_types)
+
+binop_table = [[[None] * num_primitive_types for _ in range(num_primitive_types)]
+               for _ in bin_operators]
+for (left, op, right), result in _bin_ops.items():
+	binop_table[bin_op_ids[op]][left.index][right.index] = result
+
+unary_table = [[None] * num_primitive_types for _ in unary_operators]
+for (op, operand), result in _unary_ops.items():
+	unary_table[unary_op_ids[op]][operand.index] = result
 
-def loockup_type(name):
+def lookup_type(name):
 	'''
-	Dado el nombre de un tipo primitivo, se busca el objeto "type" apropiado.
-	Para empezar, los tipos son solo nombres, pero mas adelante pueden ser
-	objetos mas avanzados.
+	Dado el nombre de un tipo primitivo, se busca el objeto "type" apropiado
+	(el singleton internado), o None si el nombre no es un tipo.
 	'''
-	if name in typenames:
-		return name
-	else:
+	return _primitive_types.get(name)
+
+# Nombre histórico
+loockup_type = lookup_type
+
+def type_of_node(type_node):
+	'''
+	Convierte un nodo de tipo del AST (SimpleType / ArrayType) en el
+	tipo internado correspondiente.
+	'''
+	if isinstance(type_node, ArrayType):
+		return array_of(type_of_node(type_node.element_type))
+	if isinstance(type_node, SimpleType):
+		return _primitive_types.get(type_node.name, error_type)
+	return error_type
+
+def binop_result(op_id, left_type, right_type):
+	'''
+	Tipo resultado de un operador binario dado por su identificador,
+	o None si la operación no está soportada.
+	'''
+	try:
+		return binop_table[op_id][left_type.index][right_type.index]
+	except IndexError:
+		# Arrays y funciones no tienen filas en la tabla
+		return None
+
+def unaryop_result(op_id, operand_type):
+	try:
+		return unary_table[op_id][operand_type.index]
+	except IndexError:
 		return None
-		
+
+# Check if a binary operator is supported. Returns the
+# result type or None (if not supported). Type checker
+# uses this function.
+
 def check_binop(op, left_type, right_type):
-	return _bin_ops.get((left_type, op, right_type))
+	op_id = bin_op_ids.get(op)
+	if op_id is None:
+		return None
+	return binop_result(op_id, left_type, right_type)
 
 def check_unaryop(op, operand_type):
-	return _unary_ops.get((op, operand_type))
+	op_id = unary_op_ids.get(op)
+	if op_id is None:
+		return None
+	return unaryop_result(op_id, operand_type)
@@ -31,6 +31,22 @@ def check_clang():
         return False
     return True
 
+def run_with_lli(runtime_file):
+    """
+    Sin clang: compila el runtime como biblioteca compartida con el
+    compilador de C/C++ disponible y ejecuta output.ll con lli.
+    """
+    compiler = shutil.which('c++' if runtime_file.endswith('.cpp') else 'cc')
+    if compiler is None:
+        print("ERROR: se necesita clang, o lli y un compilador de C/C++, para ejecutar el codigo generado.")
+        return None
+    print(f"[3/4] Compilando {runtime_file} como biblioteca compartida...")
+    library = os.path.abspath("runtime.so")
+    if run_command([compiler, "-shared", "-fPIC", runtime_file, "-o", library]) is None:
+        return None
+    print("[4/4] Ejecutando output.ll con lli...")
+    return run_command(["lli", f"-load={library}", "output.ll"])
+
 def verify_consistency(source_file):
     print(f"--- Verificando consistencia para: {source_file} ---")
     
@@ -49,7 +65,7 @@ def verify_consistency(source_file):
     for line in interp_lines:
         if "Ejecucion completada exitosamente" in line:
             capture = False
-        if capture:
+        if capture and "=====" not in line:
             program_output_interp.append(line)
         if "Ejecucion del Interprete" in line:
              # La siguiente línea suele ser los separadores
@@ -74,25 +90,26 @@ def verify_consistency(source_file):
         print("Error: No se genero output.ll")
         return False
 
-    # 3. Compilar con Clang
-    print("[3/4] Compilando con Clang...")
-    if not check_clang():
-        return False
-        
-    exe_name = "program.exe"
-    # Asumimos que runtime.cpp esta en el directorio actual
-    if not os.path.exists("runtime.cpp") and not os.path.exists("runtime.c"):
-        print("Advertencia: No se encontro runtime.cpp o runtime.c. La compilacion podria fallar si se usan funciones externas.")
-    
+    # 3. Compilar con Clang (o, sin clang, ejecutar el IR con lli)
     runtime_file = "runtime.cpp" if os.path.exists("runtime.cpp") else "runtime.c"
-    
-    compile_cmd = ["clang", "output.ll", runtime_file, "-o", exe_name]
-    if run_command(compile_cmd) is None:
-        return False
-        
-    # 4. Ejecutar Binario Compilado
-    print("[4/4] Ejecutando Binario Compilado...")
-    compiled_output = run_command([f".\\{exe_name}"], shell=True)
+    if not os.path.exists(runtime_file):
+        print("Advertencia: No se encontro runtime.cpp o runtime.c. La compilacion podria fallar si se usan funciones externas.")
+
+    if shutil.which('clang') is None and shutil.which('lli') is not None:
+        compiled_output = run_with_lli(runtime_file)
+    else:
+        print("[3/4] Compilando con Clang...")
+        if not check_clang():
+            return False
+
+        exe_name = "program.exe"
+        compile_cmd = ["clang", "output.ll", runtime_file, "-o", exe_name]
+        if run_command(compile_cmd) is None:
+            return False
+
+        # 4. Ejecutar Binario Compilado
+        print("[4/4] Ejecutando Binario Compilado...")
+        compiled_output = run_command([os.path.abspath(exe_name)])
     if compiled_output is None:
         return False
         
@@ -0,0 +1,1004 @@
+# vm.py
+'''
+Compilador a bytecode y máquina virtual de pila
+===============================================
+Motor de ejecución alternativo a interp.Interpreter. El AST ya
+verificado se compila a un bytecode compacto: por cada función un
+objeto Code con una lista plana de enteros (código de operación,
+argumento), un pool de constantes y las variables locales resueltas
+a posiciones (slots) de un arreglo. Las variables globales también se
+resuelven a slots de un único arreglo de globales.
+
+La VM ejecuta el bytecode en un solo ciclo de despacho con su propia
+pila de marcos de llamada, así que la recursión de B-Minor no consume
+la pila de Python. Las operaciones se eligen con los tipos anotados
+por el checker (p. ej. IDIV para 'integer / integer') y, igual que el
+motor de closures, recurren a la implementación genérica de
+Interpreter cuando un operando no sirve, para reportar los mismos
+errores en tiempo de ejecución.
+
+Como los marcos son datos de la VM, una ejecución puede guardarse a
+mitad de camino (con sus marcos, pila y globales) cada cierto número de
+iteraciones y continuarse después desde ese punto (ver snapshot.py).
+
+Limitación: una función anidada dentro de otra solo puede usar sus
+propias variables y las globales (no las locales de la función que
+la contiene).
+'''
+
+import pickle
+
+from model   import *
+from typesys import integer_type, float_type
+from interp  import Interpreter, CallError
+from arrays  import (new_array, new_ndarray, dimensions, subscript_chain, locate,
+                     array_types, array_classes, store_message, values_message)
+from snapshot import Snapshot, SnapshotError, save_snapshot, load_snapshot
+from pyexec  import ast_hash
+
+class VMError(Exception):
+  '''
+  Construcción que la VM no puede compilar.
+  '''
+  pass
+
+# =====================================================================
+# Códigos de operación. Cada instrucción ocupa dos posiciones de la
+# lista de código: (opcode, argumento).
+# =====================================================================
+(
+  LOAD_LOCAL, STORE_LOCAL, CONST, LOAD_GLOBAL, STORE_GLOBAL,
+  JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP,
+  ADD, SUB, MUL, IDIV, FDIV, MOD, POW,
+  LT, LE, GT, GE, EQ, NE,
+  BINOP, NEG, NOT, UNARY,
+  INCDEC_LOCAL, INCDEC_GLOBAL, INCDEC_INDEX,
+  LOAD_INDEX, STORE_INDEX, NEW_ARRAY,
+  LOAD_ELEMENT, STORE_ELEMENT, INCDEC_ELEMENT,
+  LOAD_FUNCTION, CALL, TAIL_CALL, CALL_BUILTIN, RETURN, RETURN_NONE,
+  PRINT, POP, DUP, FAIL, STEP,
+) = range(47)
+
+opnames = [
+  'LOAD_LOCAL', 'STORE_LOCAL', 'CONST', 'LOAD_GLOBAL', 'STORE_GLOBAL',
+  'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_TRUE', 'JUMP_IF_FALSE_OR_POP', 'JUMP_IF_TRUE_OR_POP',
+  'ADD', 'SUB', 'MUL', 'IDIV', 'FDIV', 'MOD', 'POW',
+  'LT', 'LE', 'GT', 'GE', 'EQ', 'NE',
+  'BINOP', 'NEG', 'NOT', 'UNARY',
+  'INCDEC_LOCAL', 'INCDEC_GLOBAL', 'INCDEC_INDEX',
+  'LOAD_INDEX', 'STORE_INDEX', 'NEW_ARRAY',
+  'LOAD_ELEMENT', 'STORE_ELEMENT', 'INCDEC_ELEMENT',
+  'LOAD_FUNCTION', 'CALL', 'TAIL_CALL', 'CALL_BUILTIN', 'RETURN', 'RETURN_NONE',
+  'PRINT', 'POP', 'DUP', 'FAIL', 'STEP',
+]
+
+# Operaciones binarias especializadas por (tipo izquierdo, operador, tipo derecho).
+# Su argumento es el índice del nodo en Code.nodes, usado para reportar errores.
+_typed_binops = {}
+for _type in (integer_type, float_type):
+  for _op, _opcode in (('+', ADD), ('-', SUB), ('*', MUL), ('%', MOD), ('^', POW),
+                       ('<', LT), ('<=', LE), ('>', GT), ('>=', GE)):
+    _typed_binops[(_type, _op, _type)] = _opcode
+_typed_binops[(integer_type, '/', integer_type)] = IDIV
+_typed_binops[(float_type, '/', float_type)] = FDIV
+
+# Variable global aún no declarada en tiempo de ejecución
+class _Undefined:
+  def __repr__(self):
+    return '<undefined>'
+
+UNDEFINED = _Undefined()
+
+
+class Code:
+  '''
+  Bytecode de una función (o del programa principal).
+  '''
+  __slots__ = ('name', 'code', 'consts', 'nodes', 'nlocals', 'nparams')
+
+  def __init__(self, name, nparams=0):
+    self.name = name
+    self.code = []
+    self.consts = []
+    self.nodes = []
+    self.nlocals = nparams
+    self.nparams = nparams
+
+  def __repr__(self):
+    return f'<code {self.name}>'
+
+
+class VMFunction:
+  '''
+  Función de usuario compilada. Como interp.Function, expone 'arity'
+  y se invoca con el intérprete como primer argumento.
+  '''
+  __slots__ = ('name', 'code', 'vm')
+
+  def __init__(self, name, code, vm):
+    self.name = name
+    self.code = code
+    self.vm = vm
+
+  @property
+  def arity(self) -> int:
+    return self.code.nparams
+
+  def __call__(self, interp, *args):
+    return self.vm.run(self.code, args)
+
+
+def disassemble(code: Code):
+  '''
+  Devuelve el listado legible de un objeto Code.
+  '''
+  lines = [f'{code.name}: {code.nparams} parametros, {code.nlocals} locales']
+  for pc in range(0, len(code.code), 2):
+    op, arg = code.code[pc], code.code[pc + 1]
+    detail = ''
+    if op in (CONST, LOAD_FUNCTION):
+      detail = f'  ({code.consts[arg]!r})'
+    lines.append(f'{pc:5d} {opnames[op]:<22}{arg}{detail}')
+  return '\n'.join(lines)
+
+
+# =====================================================================
+# Compilador AST -> bytecode
+# =====================================================================
+
+class _FunctionScope:
+  '''
+  Estado del compilador mientras genera el Code de una función:
+  pila de alcances léxicos (nombre -> slot).
+  '''
+  def __init__(self, code, is_program=False):
+    self.code = code
+    self.is_program = is_program
+    self.scopes = [{}]
+
+  def declare(self, name):
+    slot = self.code.nlocals
+    self.code.nlocals += 1
+    self.scopes[-1][name] = slot
+    return slot
+
+  def resolve(self, name):
+    for scope in reversed(self.scopes):
+      if name in scope:
+        return scope[name]
+    return None
+
+
+class Compiler(Visitor):
+  '''
+  Genera el bytecode del programa. Las sentencias dejan la pila
+  como la encontraron; las expresiones dejan un valor.
+  '''
+  def __init__(self, vm):
+    self.vm = vm
+    self.function = None
+
+  def compile_program(self, node: Program):
+    # Las declaraciones de nivel superior son globales. Se reservan
+    # antes de compilar porque una función puede usar una global
+    # declarada después de ella.
+    for stmt in node.body:
+      if isinstance(stmt, (VarDecl, ArrayDecl, FuncDecl)):
+        self.vm.global_slot(stmt.name)
+
+    code = Code('<programa>')
+    self.vm.codes.append(code)
+    self.function = _FunctionScope(code, is_program=True)
+    for stmt in node.body:
+      self.statement(stmt)
+    self.emit(RETURN_NONE)
+    return code
+
+  # Emisión -----------------------------------------------------------
+  def emit(self, op, arg=0):
+    code = self.function.code.code
+    code.append(op)
+    code.append(arg)
+    return len(code) - 2
+
+  def label(self):
+    return len(self.function.code.code)
+
+  def patch(self, position, target=None):
+    self.function.code.code[position + 1] = self.label() if target is None else target
+
+  def const(self, value):
+    consts = self.function.code.consts
+    for i, existing in enumerate(consts):
+      if existing is value or (type(existing) is type(value) and existing == value):
+        return i
+    consts.append(value)
+    return len(consts) - 1
+
+  def node_index(self, node):
+    nodes = self.function.code.nodes
+    nodes.append(node)
+    return len(nodes) - 1
+
+  # Nombres -----------------------------------------------------------
+  def _at_program_level(self):
+    return self.function.is_program and len(self.function.scopes) == 1
+
+  def declare(self, name):
+    if self._at_program_level():
+      return STORE_GLOBAL, self.vm.global_slot(name)
+    return STORE_LOCAL, self.function.declare(name)
+
+  def resolve(self, name, node):
+    slot = self.function.resolve(name)
+    if slot is not None:
+      return LOAD_LOCAL, STORE_LOCAL, slot
+    if name in self.vm.global_slots:
+      return LOAD_GLOBAL, STORE_GLOBAL, self.vm.global_slots[name]
+    raise VMError(f"Linea {node.lineno}: la VM no puede resolver '{name}' "
+                  "(las funciones anidadas solo ven sus variables y las globales)")
+
+  def statement(self, node):
+    if isinstance(node, Assignment):
+      self.assignment(node, keep_value=False)
+    elif isinstance(node, Expression):
+      node.accept(self)
+      self.emit(POP)
+    else:
+      node.accept(self)
+
+  # Declarations
+  def visit(self, node: VarDecl):
+    if node.value:
+      node.value.accept(self)
+    else:
+      self.emit(CONST, self.const(None))
+    store, slot = self.declare(node.name)
+    self.emit(store, slot)
+
+  def visit(self, node: ArrayDecl):
+    size_expr = node.size or getattr(node.type, 'size', None)
+    if size_expr:
+      size_expr.accept(self)
+    inner_sizes = dimensions(node.type)
+    for inner_size in inner_sizes:
+      inner_size.accept(self)
+    values = node.value or []
+    for value in values:
+      value.accept(self)
+    spec = (node, size_expr is not None, bool(node.value), len(values), node.sym_type.element,
+            len(inner_sizes))
+    self.emit(NEW_ARRAY, self.const(spec))
+    store, slot = self.declare(node.name)
+    self.emit(store, slot)
+
+  def visit(self, node: FuncDecl):
+    code = Code(node.name, len(node.params))
+    self.vm.codes.append(code)
+    enclosing = self.function
+    self.function = _FunctionScope(code)
+    for i, param in enumerate(node.params):
+      self.function.scopes[-1][param.name] = i
+    if node.body:
+      node.body.accept(self)
+      self.emit(RETURN_NONE)
+    else:
+      self.emit(FAIL, self.const((node, f"La función '{node.name}' no tiene cuerpo")))
+    self.function = enclosing
+
+    function = VMFunction(node.name, code, self.vm)
+    self.vm.functions.append(function)
+    self.emit(CONST, self.const(function))
+    store, slot = self.declare(node.name)
+    self.emit(store, slot)
+
+  def visit(self, node: BlockStmt):
+    self.function.scopes.append({})
+    for stmt in node.statements:
+      self.statement(stmt)
+    self.function.scopes.pop()
+
+  # Statements
+  def visit(self, node: PrintStmt):
+    for value in node.values:
+      value.accept(self)
+    self.emit(PRINT, len(node.values))
+
+  def visit(self, node: IfStmt):
+    node.condition.accept(self)
+    to_else = self.emit(JUMP_IF_FALSE)
+    node.true_body.accept(self)
+    if node.false_body:
+      to_end = self.emit(JUMP)
+      self.patch(to_else)
+      node.false_body.accept(self)
+      self.patch(to_end)
+    else:
+      self.patch(to_else)
+
+  def step(self, node):
+    # Con límites de ejecución cada iteración de un ciclo cuenta un paso,
+    # y con checkpoints es un punto donde se puede guardar la ejecución.
+    # Al continuar un checkpoint el bytecode debe ser el mismo que al
+    # guardarlo (los pc guardados se refieren a él)
+    interp = self.vm.interp
+    if interp.limits is not None or interp.checkpoint is not None or interp.resume is not None:
+      self.emit(STEP, self.const(node))
+
+  def visit(self, node: WhileStmt):
+    start = self.label()
+    node.condition.accept(self)
+    to_end = self.emit(JUMP_IF_FALSE)
+    self.step(node)
+    node.body.accept(self)
+    self.emit(JUMP, start)
+    self.patch(to_end)
+
+  def visit(self, node: DoWhileStmt):
+    start = self.label()
+    self.step(node)
+    node.body.accept(self)
+    node.condition.accept(self)
+    self.emit(JUMP_IF_TRUE, start)
+
+  def visit(self, node: ForStmt):
+    if node.init:
+      self.statement(node.init)
+    start = self.label()
+    to_end = None
+    if node.condition:
+      node.condition.accept(self)
+      to_end = self.emit(JUMP_IF_FALSE)
+    self.step(node)
+    node.body.accept(self)
+    if node.update:
+      self.statement(node.update)
+    self.emit(JUMP, start)
+    if to_end is not None:
+      self.patch(to_end)
+
+  def visit(self, node: ReturnStmt):
+    if node.tail_call:
+      # Llamada en posición de cola: reutiliza el marco actual
+      self.call(node.value, TAIL_CALL)
+    elif node.value:
+      node.value.accept(self)
+      self.emit(RETURN)
+    else:
+      self.emit(RETURN_NONE)
+
+  # Expressions
+  def visit(self, node: BinOper):
+    node.left.accept(self)
+    if node.op in ('&&', '||'):
+      # Cortocircuito: si el izquierdo decide, queda como resultado
+      jump = self.emit(JUMP_IF_FALSE_OR_POP if node.op == '&&' else JUMP_IF_TRUE_OR_POP)
+      node.right.accept(self)
+      self.patch(jump)
+      return
+    node.right.accept(self)
+    if node.op == '==':
+      self.emit(EQ)
+    elif node.op == '!=':
+      self.emit(NE)
+    else:
+      opcode = _typed_binops.get((node.left.type, node.op, node.right.type))
+      if opcode is None and node.op == '+' and node.left.type is node.right.type:
+        # Concatenación de strings
+        opcode = ADD
+      if self.vm.interp.paranoid:
+        opcode = None
+      self.emit(BINOP if opcode is None else opcode, self.node_index(node))
+
+  def visit(self, node: UnaryOper):
+    node.expr.accept(self)
+    if node.op == '!':
+      self.emit(NOT)
+    elif node.op == '-' and not self.vm.interp.paranoid:
+      self.emit(NEG, self.node_index(node))
+    else:
+      self.emit(UNARY, self.node_index(node))
+
+  def _inc_dec(self, node, delta, post):
+    target = node.expr
+    if isinstance(target, VarLocation):
+      load, store, slot = self.resolve(target.name, target)
+      op = INCDEC_LOCAL if load == LOAD_LOCAL else INCDEC_GLOBAL
+      self.emit(op, self.const((node, slot, delta, post)))
+    elif isinstance(target, ArraySubscript) and isinstance(target.location, VarLocation):
+      target.location.accept(self)
+      target.index.accept(self)
+      self.emit(INCDEC_INDEX, self.const((node, target, delta, post)))
+    elif subscript_chain(target):
+      levels = self.element(target)
+      self.emit(INCDEC_ELEMENT, self.const((node, levels, delta, post)))
+    else:
+      if isinstance(target, ArraySubscript):
+        message = "Solo se soportan incrementos/decrementos en variables o arrays simples"
+      else:
+        message = "El operando de incremento/decremento debe ser un lvalue (variable o elemento de array)"
+      target.accept(self)
+      self.emit(FAIL, self.const((node, message)))
+
+  def visit(self, node: PreInc):
+    self._inc_dec(node, 1, False)
+
+  def visit(self, node: PreDec):
+    self._inc_dec(node, -1, False)
+
+  def visit(self, node: PostInc):
+    self._inc_dec(node, 1, True)
+
+  def visit(self, node: PostDec):
+    self._inc_dec(node, -1, True)
+
+  def visit(self, node: Assignment):
+    self.assignment(node, keep_value=True)
+
+  def assignment(self, node, keep_value):
+    node.value.accept(self)
+    if keep_value:
+      self.emit(DUP)
+    location = node.location
+    if isinstance(location, VarLocation):
+      load, store, slot = self.resolve(location.name, location)
+      self.emit(store, slot)
+    elif isinstance(location, ArraySubscript) and isinstance(location.location, VarLocation):
+      location.location.accept(self)
+      location.index.accept(self)
+      self.emit(STORE_INDEX, self.node_index(node))
+    elif subscript_chain(location):
+      levels = self.element(location)
+      self.emit(STORE_ELEMENT, self.const((node, levels)))
+    else:
+      raise NotImplementedError(f"Tipo de asignación no soportado: {type(location)}")
+
+  def visit(self, node: FuncCall):
+    if node.builtin is not None:
+      # Builtin resuelto por el checker: se invoca sin LOAD_FUNCTION
+      # ni verificar la cantidad de argumentos
+      for arg in node.args:
+        arg.accept(self)
+      function = self.vm.interp.builtin_functions[node.builtin]
+      self.emit(CALL_BUILTIN, self.const((node, function, len(node.args))))
+    else:
+      self.call(node, CALL)
+
+  def call(self, node: FuncCall, op):
+    slot = self.function.resolve(node.name)
+    if slot is not None:
+      self.emit(LOAD_LOCAL, slot)
+    elif node.name in self.vm.global_slots:
+      self.emit(LOAD_FUNCTION, self.const((node, self.vm.global_slots[node.name])))
+    else:
+      raise VMError(f"Linea {node.lineno}: la VM no puede resolver la funcion '{node.name}'")
+    for arg in node.args:
+      arg.accept(self)
+    self.emit(op, self.const((node, len(node.args))))
+
+  def visit(self, node: VarLocation):
+    load, store, slot = self.resolve(node.name, node)
+    self.emit(load, slot)
+
+  def element(self, node):
+    '''
+    Apila el array base de 'a[i][j]...' y todos sus índices; retorna los
+    nodos de cada nivel para arrays.locate().
+    '''
+    base, levels = subscript_chain(node)
+    base.accept(self)
+    for level in levels:
+      level.index.accept(self)
+    return tuple(levels)
+
+  def visit(self, node: ArraySubscript):
+    if subscript_chain(node):
+      self.emit(LOAD_ELEMENT, self.const(self.element(node)))
+      return
+    node.location.accept(self)
+    node.index.accept(self)
+    self.emit(LOAD_INDEX, self.node_index(node))
+
+  # Literales
+  def visit(self, node: Literal):
+    self.emit(CONST, self.const(node.value))
+
+
+# =====================================================================
+# Máquina virtual
+# =====================================================================
+
+class VM:
+  # Profundidad máxima de llamadas anidadas de B-Minor
+  max_depth = 100000
+
+  def __init__(self, interp):
+    self.interp = interp
+    self.global_slots = {}
+    self.global_names = []
+    self.globals = []
+    # Objetos Code (el del programa primero) y funciones, en orden de
+    # compilación: los snapshots se refieren a ellos por su posición
+    self.codes = []
+    self.functions = []
+    self.builtin_names = set()
+
+  def global_slot(self, name):
+    slot = self.global_slots.get(name)
+    if slot is None:
+      slot = self.global_slots[name] = len(self.global_names)
+      self.global_names.append(name)
+      self.globals.append(UNDEFINED)
+    return slot
+
+  def load(self, node: Program, env):
+    '''
+    Compila el programa. Los nombres ya definidos en 'env' (builtins
+    y constantes) se copian a sus slots globales.
+    '''
+    for name, value in env.items():
+      self.globals[self.global_slot(name)] = value
+      self.builtin_names.add(name)
+    return Compiler(self).compile_program(node)
+
+  # Snapshots ---------------------------------------------------------
+  def references(self):
+    '''
+    Objetos que un snapshot guarda como referencia: las funciones
+    compiladas, los builtins y el marcador de variable sin definir.
+    '''
+    refs = [(('undefined',), UNDEFINED)]
+    refs.extend((('function', index), function) for index, function in enumerate(self.functions))
+    for name in self.builtin_names:
+      value = self.globals[self.global_slots[name]]
+      if callable(value):
+        refs.append((('builtin', name), value))
+    return refs
+
+  def user_globals(self):
+    return {name: self.globals[slot] for name, slot in self.global_slots.items()
+            if name not in self.builtin_names and self.globals[slot] is not UNDEFINED}
+
+  def save(self, checkpoint, frames, stack):
+    '''
+    Guarda la ejecución en curso. 'frames' son los marcos de run(), el
+    último el que se está ejecutando.
+    '''
+    index = {id(code.code): i for i, code in enumerate(self.codes)}
+    snapshot = Snapshot(
+      program = self.program_hash,
+      globals = self.user_globals(),
+      frames  = [(index[id(instructions)], fast, pc) for instructions, _, _, fast, pc in frames],
+      stack   = list(stack),
+    )
+    # Lo impreso antes del punto guardado ya no se repite al continuar
+    self.interp.output.flush()
+    save_snapshot(checkpoint.path, snapshot, self.references())
+    checkpoint.saved += 1
+
+  def resume(self, path):
+    '''
+    Carga el snapshot 'path' sobre el programa ya compilado: restaura
+    las globales y devuelve el snapshot, cuyos marcos continúa run().
+    '''
+    snapshot = load_snapshot(path, self.references())
+    if snapshot.program != self.program_hash or not snapshot.frames:
+      raise SnapshotError(f"'{path}' no es un checkpoint de este programa")
+    for name, value in snapshot.globals.items():
+      self.globals[self.global_slot(name)] = value
+    return snapshot
+
+  def run(self, code: Code, args=(), state=None):
+    '''
+    Ejecuta 'code' con los argumentos 'args', o continúa los marcos
+    guardados en el snapshot 'state'.
+    '''
+    interp = self.interp
+    validator = interp.validator
+    max_depth = self.max_depth
+    # Con --max-depth la profundidad se cuenta como en los otros motores:
+    # la función en ejecución (este marco) más las de 'frames'
+    limits = interp.limits
+    emit = interp.output.emit
+    checkpoint = interp.checkpoint
+    if limits is not None and limits.max_depth is not None:
+      max_depth = min(max_depth, limits.max_depth - 1)
+    globals_ = self.globals
+    global_names = self.global_names
+
+    frames = []
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    instructions = code.code
+    consts = code.consts
+    nodes = code.nodes
+    fast = list(args)
+    fast.extend([None] * (code.nlocals - len(fast)))
+    pc = 0
+    if state is not None:
+      for index, saved_fast, saved_pc in state.frames:
+        saved = self.codes[index]
+        frames.append((saved.code, saved.consts, saved.nodes, saved_fast, saved_pc))
+      instructions, consts, nodes, fast, pc = frames.pop()
+      stack.extend(state.stack)
+
+    while True:
+      op = instructions[pc]
+      arg = instructions[pc + 1]
+      pc += 2
+
+      if op == LOAD_LOCAL:
+        push(fast[arg])
+      elif op == CONST:
+        push(consts[arg])
+      elif op == STORE_LOCAL:
+        fast[arg] = pop()
+      elif op == JUMP_IF_FALSE:
+        if not pop():
+          pc = arg
+      elif op == JUMP:
+        pc = arg
+      elif op == LOAD_GLOBAL:
+        value = globals_[arg]
+        if value is UNDEFINED:
+          interp.error(None, f"Variable '{global_names[arg]}' no definida")
+        push(value)
+      elif op == STORE_GLOBAL:
+        globals_[arg] = pop()
+      elif op == ADD:
+        b = pop()
+        a = stack[-1]
+        try:
+          stack[-1] = a + b
+        except TypeError:
+          stack[-1] = interp._binop(nodes[arg], a, b)
+      elif op == SUB:
+        b = pop()
+        a = stack[-1]
+        try:
+          stack[-1] = a - b
+        except TypeError:
+          stack[-1] = interp._binop(nodes[arg], a, b)
+      elif op == LT:
+        b = pop()
+        a = stack[-1]
+        try:
+          stack[-1] = a < b
+        except TypeError:
+          stack[-1] = interp._binop(nodes[arg], a, b)
+      elif op == LE:
+        b = pop()
+        a = stack[-1]
+        try:
+          stack[-1] = a <= b
+        except TypeError:
+          stack[-1] = interp._binop(nodes[arg], a, b)
+      elif op == GT:
+        b = pop()
+        a = stack[-1]
+        try:
+          stack[-1] = a > b
+        except TypeError:
+          stack[-1] = interp._binop(nodes[arg], a, b)
+      elif op == GE:
+        b = pop()
+        a = stack[-1]
+        try:
+          stack[-1] = a >= b
+        except TypeError:
+          stack[-1] = interp._binop(nodes[arg], a, b)
+      elif op == EQ:
+        b = pop()
+        stack[-1] = stack[-1] == b
+      elif op == NE:
+        b = pop()
+        stack[-1] = stack[-1] != b
+      elif op == MUL:
+        b = pop()
+        a = stack[-1]
+        try:
+          stack[-1] = a * b
+        except TypeError:
+          stack[-1] = interp._binop(nodes[arg], a, b)
+      elif op == IDIV or op == FDIV or op == MOD:
+        b = pop()
+        a = stack[-1]
+        if b:
+          try:
+            stack[-1] = a // b if op == IDIV else a / b if op == FDIV else a % b
+            continue
+          except TypeError:
+            pass
+        stack[-1] = interp._binop(nodes[arg], a, b)
+      elif op == CALL:
+        node, nargs = consts[arg]
+        base = len(stack) - nargs
+        callee = stack[base - 1]
+        values = stack[base:]
+        del stack[base - 1:]
+        if type(callee) is VMFunction:
+          callee_code = callee.code
+          if nargs != callee_code.nparams:
+            interp.error(node, f"Esperado {callee_code.nparams} argumentos, se recibieron {nargs}")
+          if len(frames) >= max_depth:
+            if limits is not None and limits.max_depth is not None and len(frames) >= limits.max_depth - 1:
+              limits.fail('depth', node)
+            # El mismo error que los motores que se quedan sin pila de Python
+            interp.recursion_error(node, len(frames) + 1)
+          if limits is not None:
+            limits.step(node)
+          frames.append((instructions, consts, nodes, fast, pc))
+          instructions = callee_code.code
+          consts = callee_code.consts
+          nodes = callee_code.nodes
+          fast = values
+          fast.extend([None] * (callee_code.nlocals - nargs))
+          pc = 0
+        else:
+          try:
+            if hasattr(callee, 'arity'):
+              if callee.arity != -1 and nargs != callee.arity:
+                interp.error(node, f"Esperado {callee.arity} argumentos, se recibieron {nargs}")
+              push(callee(interp, *values))
+            else:
+              push(callee(*values))
+          except CallError as err:
+            interp.error(node, str(err))
+      elif op == CALL_BUILTIN:
+        node, function, nargs = consts[arg]
+        try:
+          if nargs:
+            values = stack[len(stack) - nargs:]
+            del stack[len(stack) - nargs:]
+            push(function(*values))
+          else:
+            push(function())
+        except CallError as err:
+          interp.error(node, str(err))
+      elif op == TAIL_CALL:
+        node, nargs = consts[arg]
+        base = len(stack) - nargs
+        callee = stack[base - 1]
+        values = stack[base:]
+        del stack[base - 1:]
+        if type(callee) is VMFunction:
+          # Como CALL, pero el marco del llamador se descarta
+          callee_code = callee.code
+          if nargs != callee_code.nparams:
+            interp.error(node, f"Esperado {callee_code.nparams} argumentos, se recibieron {nargs}")
+          if limits is not None:
+            limits.step(node)
+          instructions = callee_code.code
+          consts = callee_code.consts
+          nodes = callee_code.nodes
+          fast = values
+          fast.extend([None] * (callee_code.nlocals - nargs))
+          pc = 0
+          continue
+        try:
+          if hasattr(callee, 'arity'):
+            if callee.arity != -1 and nargs != callee.arity:
+              interp.error(node, f"Esperado {callee.arity} argumentos, se recibieron {nargs}")
+            value = callee(interp, *values)
+          else:
+            value = callee(*values)
+        except CallError as err:
+          interp.error(node, str(err))
+        if not frames:
+          return value
+        instructions, consts, nodes, fast, pc = frames.pop()
+        push(value)
+      elif op == RETURN or op == RETURN_NONE:
+        value = pop() if op == RETURN else None
+        if not frames:
+          return value
+        instructions, consts, nodes, fast, pc = frames.pop()
+        push(value)
+      elif op == LOAD_FUNCTION:
+        node, slot = consts[arg]
+        callee = globals_[slot]
+        if callee is UNDEFINED:
+          interp.error(node, f"Funcion '{node.name}' no definida")
+        if not callable(callee):
+          interp.error(node, f'{node.name!r} no es invocable')
+        push(callee)
+      elif op == LOAD_INDEX:
+        idx = pop()
+        arr = stack[-1]
+        if type(arr) not in array_classes or type(idx) is not int or not 0 <= idx < len(arr):
+          validator.validate_array_index(nodes[arg], arr, idx)
+        stack[-1] = arr[idx]
+      elif op == STORE_INDEX:
+        idx = pop()
+        arr = pop()
+        value = pop()
+        node = nodes[arg]
+        if not isinstance(arr, array_types):
+          interp.error(node, f"'{node.location.location.name}' no es un array")
+        if not isinstance(idx, int):
+          interp.error(node, f"El índice debe ser un entero")
+        if idx < 0 or idx >= len(arr):
+          interp.error(node, f"Índice fuera de rango: {idx}")
+        try:
+          arr[idx] = value
+        except (OverflowError, TypeError):
+          interp.error(node, store_message(value))
+      elif op == INCDEC_LOCAL or op == INCDEC_GLOBAL:
+        node, slot, delta, post = consts[arg]
+        scope = fast if op == INCDEC_LOCAL else globals_
+        value = scope[slot]
+        if value is UNDEFINED:
+          interp.error(node.expr, f"Variable '{node.expr.name}' no definida")
+        interp._validate_numeric_operands(node, value)
+        scope[slot] = value + delta
+        push(value if post else value + delta)
+      elif op == INCDEC_INDEX:
+        node, target, delta, post = consts[arg]
+        idx = pop()
+        arr = pop()
+        validator.validate_array_index(target, arr, idx)
+        value = arr[idx]
+        interp._validate_numeric_operands(node, value)
+        try:
+          arr[idx] = value + delta
+        except (OverflowError, TypeError):
+          interp.error(node, store_message(value + delta))
+        push(value if post else value + delta)
+      elif op == LOAD_ELEMENT:
+        levels = consts[arg]
+        indices = stack[len(stack) - len(levels):]
+        del stack[len(stack) - len(levels):]
+        container, idx = locate(levels, stack[-1], indices, validator.validate_array_index)
+        stack[-1] = container[idx]
+      elif op == STORE_ELEMENT:
+        node, levels = consts[arg]
+        indices = stack[len(stack) - len(levels):]
+        del stack[len(stack) - len(levels):]
+        arr = pop()
+        value = pop()
+        container, idx = locate(levels, arr, indices, validator.validate_array_index)
+        try:
+          container[idx] = value
+        except (OverflowError, TypeError):
+          interp.error(node, store_message(value))
+      elif op == INCDEC_ELEMENT:
+        node, levels, delta, post = consts[arg]
+        indices = stack[len(stack) - len(levels):]
+        del stack[len(stack) - len(levels):]
+        container, idx = locate(levels, stack[-1], indices, validator.validate_array_index)
+        value = container[idx]
+        interp._validate_numeric_operands(node, value)
+        try:
+          container[idx] = value + delta
+        except (OverflowError, TypeError):
+          interp.error(node, store_message(value + delta))
+        stack[-1] = value if post else value + delta
+      elif op == NOT:
+        stack[-1] = not stack[-1]
+      elif op == NEG:
+        value = stack[-1]
+        try:
+          stack[-1] = -value
+        except TypeError:
+          stack[-1] = interp._unaryop(nodes[arg], value)
+      elif op == POW:
+        b = pop()
+        a = stack[-1]
+        try:
+          stack[-1] = a ** b
+        except (TypeError, ZeroDivisionError):
+          stack[-1] = interp._binop(nodes[arg], a, b)
+      elif op == BINOP:
+        b = pop()
+        stack[-1] = interp._binop(nodes[arg], stack[-1], b)
+      elif op == UNARY:
+        stack[-1] = interp._unaryop(nodes[arg], stack[-1])
+      elif op == JUMP_IF_TRUE:
+        if pop():
+          pc = arg
+      elif op == JUMP_IF_FALSE_OR_POP:
+        if not stack[-1]:
+          pc = arg
+        else:
+          pop()
+      elif op == JUMP_IF_TRUE_OR_POP:
+        if stack[-1]:
+          pc = arg
+        else:
+          pop()
+      elif op == POP:
+        pop()
+      elif op == DUP:
+        push(stack[-1])
+      elif op == PRINT:
+        values = stack[len(stack) - arg:]
+        del stack[len(stack) - arg:]
+        emit(values)
+      elif op == NEW_ARRAY:
+        node, has_size, has_values, nvalues, element, ninner = consts[arg]
+        items = stack[len(stack) - nvalues:] if nvalues else []
+        del stack[len(stack) - nvalues:]
+        shape = stack[len(stack) - ninner:] if ninner else []
+        del stack[len(stack) - ninner:]
+        array_size = pop() if has_size else 0
+        shape.insert(0, array_size)
+        for size in shape:
+          if not isinstance(size, int):
+            interp.error(node, f"El tamaño del array debe ser un entero, se obtuvo {type(size).__name__}")
+        if limits is not None:
+          limits.allocate(node, shape)
+        try:
+          if ninner:
+            push(new_ndarray(element, shape, items if has_values else None))
+          else:
+            push(new_array(element, array_size, items if has_values else None))
+        except (OverflowError, TypeError):
+          interp.error(node, values_message(items))
+      elif op == FAIL:
+        node, message = consts[arg]
+        interp.error(node, message)
+      elif op == STEP:
+        if limits is not None:
+          limits.step(consts[arg])
+        if checkpoint is not None:
+          checkpoint.countdown -= 1
+          if checkpoint.countdown <= 0:
+            checkpoint.countdown = checkpoint.every
+            self.save(checkpoint, frames + [(instructions, consts, nodes, fast, pc)], stack)
+      else:
+        raise VMError(f'Opcode desconocido {op}')
+
+
+class VMInterpreter(Interpreter):
+  '''
+  Intérprete que compila el programa a bytecode y lo ejecuta en la VM.
+  Comparte con Interpreter los builtins y el manejo de errores.
+  'checkpoint' (snapshot.Checkpoint) guarda la ejecución periódicamente;
+  'resume' es la ruta de un checkpoint desde el cual continuar.
+  '''
+  def __init__(self, *args, checkpoint=None, resume=None, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.checkpoint = checkpoint
+    self.resume = resume
+
+  def execute(self, node):
+    vm = VM(self)
+    try:
+      program = vm.load(node, self.env)
+    except VMError as err:
+      self.error(node, str(err))
+    vm.program_hash = ast_hash(node) if self.checkpoint or self.resume else None
+    state = None
+    if self.resume is not None:
+      try:
+        state = vm.resume(self.resume)
+      except (OSError, SnapshotError, pickle.UnpicklingError) as err:
+        self.error(node, f'No se puede continuar desde el checkpoint: {err}')
+    in_main = state is not None and state.frames[0][0] != 0
+    if not in_main:
+      # Sin checkpoint, o guardado durante las declaraciones globales
+      vm.run(program, state=state)
+    # Publicar las globales en el entorno (interpret() busca 'main' allí)
+    for name, slot in vm.global_slots.items():
+      value = vm.globals[slot]
+      if value is not UNDEFINED:
+        self.env[name] = value
+    if in_main:
+      # Guardado dentro de main: la llamada a main continúa los marcos
+      self.env['main'] = _Resumed(vm, state)
+
+
+class _Resumed:
+  '''
+  Reemplaza a main al continuar un checkpoint tomado dentro de main.
+  '''
+  arity = 0
+
+  def __init__(self, vm, state):
+    self.vm = vm
+    self.state = state
+
+  def __call__(self, interp):
+    code = self.vm.codes[self.state.frames[0][0]]
+    return self.vm.run(code, state=self.state)